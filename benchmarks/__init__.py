@@ -0,0 +1 @@
+"""Offline benchmarks using a local stand-in for a ChurchTools server."""
@@ -0,0 +1,193 @@
+"""Offline benchmark of the main getters against a local mock server.
+
+Reports wall time, number of HTTP requests and peak memory
+for each getter and data size. No ChurchTools instance or credentials required.
+
+Usage:
+    python -m benchmarks.benchmark_getters --sizes 100 1000 --latency 0.005
+"""
+
+import argparse
+import json
+import logging
+import time
+import tracemalloc
+from collections.abc import Callable
+from statistics import median
+
+from benchmarks.mock_server import NUMBER_OF_RESOURCES, MockChurchToolsServer
+from churchtools_api import ratelimitedsession
+from churchtools_api.churchtools_api import ChurchToolsApi
+from churchtools_api.pagination import PageSizeTuner
+
+logger = logging.getLogger(__name__)
+
+GETTERS: dict[str, Callable[[ChurchToolsApi], list]] = {
+    "get_persons": lambda api: api.get_persons(),
+    "get_songs": lambda api: api.get_songs(),
+    "get_events": lambda api: api.get_events(from_="2026-01-01", to_="2027-12-31"),
+    "get_bookings": lambda api: api.get_bookings(
+        resource_ids=list(range(1, NUMBER_OF_RESOURCES + 1))
+    ),
+    "get_posts": lambda api: api.get_posts(),
+}
+
+
+def run_benchmarks(  # noqa: PLR0913
+    sizes: list[int],
+    *,
+    getters: list[str] | None = None,
+    latency: float = 0.0,
+    latency_per_item: float = 0.0,
+    rate_limit_every: int = 0,
+    rate_limit_wait: float = 0.0,
+    repeats: int = 3,
+    page_sizes: Callable[[], PageSizeTuner] = PageSizeTuner,
+) -> list[dict]:
+    """Runs each getter against a mock server for each data size.
+
+    Args:
+        sizes: number of items generated on the mock server for each run
+        getters: names of GETTERS to run. Defaults to all
+        latency: seconds each response of the mock server is delayed
+        latency_per_item: additional delay for each item in a response
+        rate_limit_every: every nth request is answered with 429. 0 disables
+        rate_limit_wait: seconds the session waits after a 429
+            instead of the default RATE_LIMIT_WAIT_SECONDS
+        repeats: number of timed runs - the median is reported
+        page_sizes: creates the page size configuration used for each data size
+            e.g. lambda: PageSizeTuner(auto_tune=True)
+
+    Returns:
+        list of results with getter, size, items, requests, rate_limited,
+        wall_time (seconds) and peak_memory (bytes)
+    """
+    results = []
+    original_wait = ratelimitedsession.RATE_LIMIT_WAIT_SECONDS
+    ratelimitedsession.RATE_LIMIT_WAIT_SECONDS = rate_limit_wait
+    try:
+        for size in sizes:
+            with MockChurchToolsServer(
+                size=size,
+                latency=latency,
+                latency_per_item=latency_per_item,
+                rate_limit_every=rate_limit_every,
+            ) as server:
+                api = ChurchToolsApi(domain=server.domain, ct_token="benchmark")  # noqa: S106
+                api.page_sizes = page_sizes()
+                for name in getters or GETTERS:
+                    results.append(
+                        _run_getter(api=api, server=server, name=name, repeats=repeats)
+                    )
+                    results[-1]["size"] = size
+    finally:
+        ratelimitedsession.RATE_LIMIT_WAIT_SECONDS = original_wait
+    return results
+
+
+def _run_getter(
+    api: ChurchToolsApi, server: MockChurchToolsServer, name: str, repeats: int
+) -> dict:
+    """Helper which measures one getter.
+
+    Timing runs are executed without tracemalloc
+    because tracing allocations slows down execution.
+
+    Args:
+        api: logged in api connected to the mock server
+        server: the mock server used
+        name: name of the getter in GETTERS
+        repeats: number of timed runs
+
+    Returns:
+        measured values of the getter
+    """
+    getter = GETTERS[name]
+    wall_times = []
+    for _ in range(repeats):
+        server.reset_request_count()
+        api.session.metrics.reset()
+        start = time.perf_counter()
+        items = getter(api)
+        wall_times.append(time.perf_counter() - start)
+    requests_sent = server.request_count
+    rate_limited = sum(
+        entry["rate_limited"]
+        for entry in api.session.metrics.snapshot()["endpoints"].values()
+    )
+
+    tracemalloc.start()
+    try:
+        getter(api)
+        _, peak_memory = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "getter": name,
+        "items": len(items or []),
+        "requests": requests_sent,
+        "rate_limited": rate_limited,
+        "wall_time": median(wall_times),
+        "peak_memory": peak_memory,
+    }
+
+
+def format_results(results: list[dict]) -> str:
+    """Formats results as text table.
+
+    Args:
+        results: as returned by run_benchmarks
+
+    Returns:
+        one line per getter and size
+    """
+    lines = [
+        f"{'getter':<14}{'size':>8}{'items':>8}{'requests':>10}"
+        f"{'429':>6}{'wall ms':>10}{'peak KiB':>10}"
+    ]
+    lines.extend(
+        f"{result['getter']:<14}{result['size']:>8}{result['items']:>8}"
+        f"{result['requests']:>10}{result['rate_limited']:>6}"
+        f"{result['wall_time'] * 1000:>10.1f}{result['peak_memory'] / 1024:>10.0f}"
+        for result in results
+    )
+    return "\n".join(lines)
+
+
+def main() -> None:
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000])
+    parser.add_argument("--getters", nargs="+", choices=list(GETTERS))
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--latency-per-item", type=float, default=0.0)
+    parser.add_argument("--page-size", type=int, default=50)
+    parser.add_argument("--auto-tune", action="store_true")
+    parser.add_argument("--rate-limit-every", type=int, default=0)
+    parser.add_argument("--rate-limit-wait", type=float, default=0.0)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--json", help="optional path to save results as JSON")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.ERROR)
+    results = run_benchmarks(
+        sizes=args.sizes,
+        getters=args.getters,
+        latency=args.latency,
+        latency_per_item=args.latency_per_item,
+        rate_limit_every=args.rate_limit_every,
+        rate_limit_wait=args.rate_limit_wait,
+        repeats=args.repeats,
+        page_sizes=lambda: PageSizeTuner(
+            default=args.page_size, auto_tune=args.auto_tune
+        ),
+    )
+    print(format_results(results))  # noqa: T201
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as json_file:  # noqa: PTH123
+            json.dump(results, json_file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
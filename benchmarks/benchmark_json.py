@@ -0,0 +1,114 @@
+"""Benchmark of decoding large response pages.
+
+Compares the json standard library with orjson (if installed)
+and the former copy of each decoded data list.
+
+Usage:
+    python -m benchmarks.benchmark_json --page-size 50 --pages 200
+"""
+
+import argparse
+import json
+import logging
+import time
+from collections.abc import Callable
+
+from benchmarks.mock_server import generate_data
+from churchtools_api import churchtools_api_abstract
+
+logger = logging.getLogger(__name__)
+
+# number of additional fields which makes persons as wide as with all permissions
+WIDE_PERSON_FIELDS = 60
+
+
+def generate_pages(page_size: int, pages: int) -> list[bytes]:
+    """Creates encoded person pages shaped like /api/persons responses.
+
+    Args:
+        page_size: number of persons on each page
+        pages: number of pages
+
+    Returns:
+        list of response bodies
+    """
+    persons = generate_data(size=page_size * pages)["persons"]
+    for person in persons:
+        person.update(
+            {f"field{field}": f"value {field}" for field in range(WIDE_PERSON_FIELDS)}
+        )
+    return [
+        json.dumps(
+            {
+                "data": persons[page * page_size : (page + 1) * page_size],
+                "meta": {"pagination": {"current": page + 1, "lastPage": pages}},
+            }
+        ).encode()
+        for page in range(pages)
+    ]
+
+
+def measure(bodies: list[bytes], decode: Callable, *, copy: bool) -> float:
+    """Helper which decodes all bodies and combines their data.
+
+    Args:
+        bodies: encoded pages
+        decode: function used to decode one body
+        copy: if the data of each page is copied like before
+
+    Returns:
+        seconds used
+    """
+    start = time.perf_counter()
+    response_data = []
+    for body in bodies:
+        data = decode(body)["data"]
+        response_data.extend(data.copy() if copy else data)
+    return time.perf_counter() - start
+
+
+def run_benchmark(page_size: int, pages: int, repeats: int = 5) -> dict[str, float]:
+    """Measures the available decode variants.
+
+    Args:
+        page_size: number of persons on each page
+        pages: number of pages
+        repeats: number of runs - the fastest is reported
+
+    Returns:
+        seconds used for each variant
+    """
+    bodies = generate_pages(page_size=page_size, pages=pages)
+    variants = {
+        "json + copy": (json.loads, True),
+        "json": (json.loads, False),
+        "decode_json": (churchtools_api_abstract.decode_json, False),
+    }
+    return {
+        name: min(measure(bodies, decode, copy=copy) for _ in range(repeats))
+        for name, (decode, copy) in variants.items()
+    }
+
+
+def main() -> None:
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--page-size", type=int, default=50)
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    backend = "orjson" if churchtools_api_abstract.orjson else "json"
+    results = run_benchmark(
+        page_size=args.page_size, pages=args.pages, repeats=args.repeats
+    )
+    baseline = results["json + copy"]
+    for name, seconds in results.items():
+        print(  # noqa: T201
+            f"{name:<14}{seconds * 1000:>10.1f} ms{baseline / seconds:>8.2f}x"
+            + (f" (using {backend})" if name == "decode_json" else "")
+        )
+
+
+if __name__ == "__main__":
+    main()
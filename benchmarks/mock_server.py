@@ -0,0 +1,609 @@
+"""module containing a local stand-in for a ChurchTools server.
+
+The server generates deterministic data for the most common REST endpoints,
+answers using the same pagination meta data as ChurchTools
+and can simulate latency and rate limiting (HTTP 429).
+It is only intended for offline benchmarks and tests - never for production use.
+"""
+
+import json
+import logging
+import math
+import random
+import re
+import threading
+import time
+from collections.abc import Mapping
+from datetime import UTC, datetime, timedelta
+from http.cookies import SimpleCookie
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import TracebackType
+from urllib.parse import parse_qs, urlsplit
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PAGE_LIMIT = 10
+MAX_PAGE_LIMIT = 500
+NUMBER_OF_RESOURCES = 5
+NUMBER_OF_GROUPS = 20
+NUMBER_OF_CALENDARS = 4
+SESSION_COOKIE = "ChurchTools_benchmark"
+
+FIRST_NAMES = ["Anna", "Ben", "Clara", "David", "Eva", "Felix", "Greta", "Hannes"]
+LAST_NAMES = ["Müller", "Schmidt", "Schneider", "Fischer", "Weber", "Becker"]
+SONG_WORDS = ["Grace", "Light", "Hope", "Glory", "Praise", "Mercy", "Joy", "Peace"]
+
+# static content of reference data endpoints by path
+REFERENCE_DATA = {
+    "/api/dbfields": [
+        {"name": "sex", "options": [{"id": 1, "name": "sex.male"}]},
+    ],
+    "/api/services": [{"id": 1, "name": "Predigt", "serviceGroupId": 1}],
+    "/api/person/masterdata": {
+        "sexes": [{"id": 1, "name": "sex.male"}, {"id": 2, "name": "sex.female"}],
+        "roles": [{"id": 1, "name": "Teilnehmer"}],
+    },
+    "/api/event/masterdata": {
+        "services": [{"id": 1, "name": "Predigt"}],
+        "serviceGroups": [{"id": 1, "name": "Programm"}],
+    },
+    "/api/group/grouptypes": [{"id": 1, "name": "Kleingruppe"}],
+    "/api/permissions/global": {"churchcore": {"administer settings": False}},
+}
+
+
+def generate_data(size: int, seed: int = 0) -> dict[str, list[dict]]:
+    """Generates deterministic sample data shaped like ChurchTools responses.
+
+    Args:
+        size: number of items for each type
+        seed: seed of the random generator
+
+    Returns:
+        dict with list of items for persons, groups, group_members, songs,
+        calendars, events, bookings, resources and posts
+    """
+    rng = random.Random(seed)  # noqa: S311
+    base_date = datetime(2026, 1, 1, 10, tzinfo=UTC)
+
+    persons = [
+        {
+            "id": item,
+            "guid": f"{item:08x}-0000-4000-8000-{item:012x}",
+            "firstName": rng.choice(FIRST_NAMES),
+            "lastName": rng.choice(LAST_NAMES),
+            "email": f"person{item}@example.com",
+            "sexId": rng.choice([1, 2]),
+            "birthday": (base_date - timedelta(days=rng.randint(6000, 30000)))
+            .date()
+            .isoformat(),
+            "campusId": rng.randint(0, 2),
+            "statusId": rng.randint(1, 5),
+            "imageUrl": None,
+            "meta": {"createdDate": base_date.isoformat(), "modifiedDate": None},
+        }
+        for item in range(1, size + 1)
+    ]
+
+    songs = [
+        {
+            "id": item,
+            "name": " ".join(rng.sample(SONG_WORDS, k=3)),
+            "category": {"id": rng.randint(1, 4), "name": "Worship"},
+            "shouldPractice": rng.random() < 0.1,  # noqa: PLR2004
+            "author": f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+            "ccli": str(rng.randint(100000, 9999999)),
+            "copyright": None,
+            "note": "",
+            "arrangements": [
+                {
+                    "id": item * 10 + arrangement,
+                    "name": f"Arrangement {arrangement}",
+                    "isDefault": arrangement == 0,
+                    "keyOfArrangement": rng.choice(["C", "D", "E", "G", "A"]),
+                    "bpm": str(rng.randint(60, 140)),
+                    "files": [],
+                    "links": [],
+                }
+                for arrangement in range(rng.randint(1, 3))
+            ],
+            "tags": [{"id": rng.randint(1, 60)}],
+        }
+        for item in range(1, size + 1)
+    ]
+
+    events = []
+    for item in range(1, size + 1):
+        start = base_date + timedelta(days=item // 3, hours=rng.randint(0, 8))
+        events.append(
+            {
+                "id": item,
+                "guid": f"event-{item}",
+                "name": f"Event {item}",
+                "description": "",
+                "startDate": start.strftime("%Y-%m-%dT%H:%M:%SZ"),
+                "endDate": (start + timedelta(hours=2)).strftime("%Y-%m-%dT%H:%M:%SZ"),
+                "note": "",
+                "isCanceled": False,
+                "calendar": {"domainIdentifier": str(rng.randint(1, 4))},
+                "appointmentId": 100000 + item,
+                "eventServices": [
+                    {
+                        "id": item * 100 + service,
+                        "personId": rng.randint(1, max(size, 1)),
+                        "serviceId": rng.randint(1, 30),
+                        "agreed": rng.random() < 0.8,  # noqa: PLR2004
+                        "isValid": True,
+                    }
+                    for service in range(rng.randint(0, 6))
+                ],
+            }
+        )
+
+    # ChurchTools returns events and bookings ordered by their start
+    events.sort(key=lambda event: (event["startDate"], event["id"]))
+
+    bookings = []
+    for item in range(1, size + 1):
+        start = base_date + timedelta(days=item // 4, hours=rng.randint(0, 10))
+        bookings.append(
+            {
+                "base": {
+                    "id": item,
+                    "caption": f"Booking {item}",
+                    "appointmentId": 100000 + item,
+                    "resource": {
+                        "id": rng.randint(1, NUMBER_OF_RESOURCES),
+                        "name": "Room",
+                    },
+                    "statusId": rng.choice([1, 2]),
+                },
+                "calculated": {
+                    "startDate": start.strftime("%Y-%m-%dT%H:%M:%SZ"),
+                    "endDate": (start + timedelta(hours=1)).strftime(
+                        "%Y-%m-%dT%H:%M:%SZ"
+                    ),
+                },
+            }
+        )
+
+    bookings.sort(
+        key=lambda booking: (booking["calculated"]["startDate"], booking["base"]["id"])
+    )
+
+    posts = [
+        {
+            "id": item,
+            "guid": f"post-{item}",
+            "title": f"Post {item}",
+            "content": " ".join(rng.choices(SONG_WORDS, k=30)),
+            # distinct timestamps are required for pagination using before
+            "publishedDate": (base_date - timedelta(hours=item)).strftime(
+                "%Y-%m-%dT%H:%M:%SZ"
+            ),
+            "visibility": "group_intern",
+            "group": {"domainIdentifier": str(rng.randint(1, 20))},
+            "actor": {"domainIdentifier": str(rng.randint(1, max(size, 1)))},
+            "commentCount": rng.randint(0, 5),
+        }
+        for item in range(1, size + 1)
+    ]
+
+    group_members = [
+        {
+            "personId": item,
+            "groupId": rng.randint(1, NUMBER_OF_GROUPS),
+            "groupTypeRoleId": rng.randint(1, 16),
+            "groupMemberStatus": rng.choice(["active", "active", "waiting"]),
+            "memberStartDate": (base_date - timedelta(days=rng.randint(0, 3000)))
+            .date()
+            .isoformat(),
+            "memberEndDate": None,
+            "deleted": False,
+        }
+        for item in range(1, size + 1)
+    ]
+
+    groups = [
+        {
+            "id": item,
+            "guid": f"group-{item}",
+            "name": f"Group {item}",
+            "information": {"groupTypeId": rng.randint(1, 4), "note": ""},
+            "meta": {
+                "createdDate": base_date.isoformat(),
+                "modifiedDate": base_date.isoformat(),
+            },
+        }
+        for item in range(1, NUMBER_OF_GROUPS + 1)
+    ]
+
+    return {
+        "persons": persons,
+        "groups": groups,
+        "group_members": group_members,
+        "songs": songs,
+        "calendars": [
+            {"id": item, "name": f"Calendar {item}", "isPublic": item == 1}
+            for item in range(1, NUMBER_OF_CALENDARS + 1)
+        ],
+        "events": events,
+        "bookings": bookings,
+        "resources": [
+            {"id": item, "name": f"Room {item}", "resourceTypeId": 1}
+            for item in range(1, NUMBER_OF_RESOURCES + 1)
+        ],
+        "posts": posts,
+    }
+
+
+def paginate(
+    items: list[dict], query: dict[str, list[str]], max_limit: int = MAX_PAGE_LIMIT
+) -> dict:
+    """Helper which returns one page of items with ChurchTools meta data.
+
+    Args:
+        items: all items matching the request
+        query: parsed query of the request
+        max_limit: larger limit params are reduced to this value
+
+    Returns:
+        response content including meta/pagination
+    """
+    limit = min(int(query.get("limit", [DEFAULT_PAGE_LIMIT])[0]), max_limit)
+    page = int(query.get("page", [1])[0])
+    last_page = max(1, math.ceil(len(items) / limit))
+    data = items[(page - 1) * limit : page * limit]
+    return {
+        "data": data,
+        "meta": {
+            "count": len(data),
+            "all": len(items),
+            "pagination": {
+                "total": len(items),
+                "limit": limit,
+                "current": page,
+                "lastPage": last_page,
+            },
+        },
+    }
+
+
+def filter_date_window(
+    items: list[dict], query: dict[str, list[str]], field: str
+) -> list[dict]:
+    """Helper which keeps items starting within the from and to params.
+
+    Args:
+        items: all items
+        query: parsed query of the request
+        field: dotted name of the start date e.g. calculated.startDate
+
+    Returns:
+        items starting on or after from and before to
+    """
+    from_ = query.get("from", [""])[0]
+    to_ = query.get("to", ["9999"])[0]
+    result = []
+    for item in items:
+        start_date = item
+        for key in field.split("."):
+            start_date = start_date[key]
+        if from_ <= start_date < to_:
+            result.append(item)
+    return result
+
+
+class MockChurchToolsServer:
+    """Local HTTP server answering like a ChurchTools instance.
+
+    Can be used as context manager which starts and stops the server thread.
+    """
+
+    def __init__(  # noqa: PLR0913
+        self,
+        size: int = 100,
+        *,
+        latency: float = 0.0,
+        latency_per_item: float = 0.0,
+        rate_limit_every: int = 0,
+        error_status: int = 0,
+        error_count: int = 0,
+        max_page_limit: int = MAX_PAGE_LIMIT,
+        seed: int = 0,
+    ) -> None:
+        """Prepares data and the server - it is not started yet.
+
+        Set login_expired to answer all requests with 401 until the next token
+        login. Like ChurchTools a token login starts a session - requests
+        without the cookie of a session are answered with 401 as well.
+        POST requests are answered with 403 unless using csrf_token.
+
+        Args:
+            size: number of items generated for each endpoint
+            latency: seconds each response is delayed
+            latency_per_item: additional seconds for each item in the response
+            rate_limit_every: every nth request is answered with 429.
+                Defaults to 0 which never rate limits
+            error_status: all requests are answered with this status e.g. 503.
+                Defaults to 0 which answers normally
+            error_count: number of requests answered with error_status.
+                Defaults to 0 which answers all requests with error_status
+            max_page_limit: largest page size returned by the server
+            seed: seed of the random generator used for the data
+        """
+        self.data = generate_data(size=size, seed=seed)
+        self.latency = latency
+        self.latency_per_item = latency_per_item
+        self.rate_limit_every = rate_limit_every
+        self.error_status = error_status
+        self.error_count = error_count
+        self.max_page_limit = max_page_limit
+        self.request_count = 0
+        self.connection_count = 0
+        # path including query of each request since the last reset
+        self.urls: list[str] = []
+        self.login_expired = False
+        self.sessions: set[str] = set()
+        self.csrf_token = "benchmark-csrf-token"  # noqa: S105
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler_class())
+        self._thread = None
+
+    @property
+    def domain(self) -> str:
+        """Url which can be used as domain of ChurchToolsApi.
+
+        Returns:
+            e.g. http://127.0.0.1:12345
+        """
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> None:
+        """Starts serving requests in a background thread."""
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        logger.debug("mock server started on %s", self.domain)
+
+    def stop(self) -> None:
+        """Stops the server and waits for the background thread."""
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread:
+            self._thread.join()
+
+    def __enter__(self) -> "MockChurchToolsServer":
+        """Starts the server.
+
+        Returns:
+            the running server
+        """
+        self.start()
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        """Stops the server."""
+        self.stop()
+
+    def reset_request_count(self) -> None:
+        """Sets the number of received requests and accepted connections to 0."""
+        with self._lock:
+            self.request_count = 0
+            self.connection_count = 0
+            self.urls = []
+
+    def respond(
+        self, method: str, url: str, headers: Mapping[str, str] | None = None
+    ) -> tuple[int, dict, dict]:
+        """Creates the response for one request including simulated delays.
+
+        Args:
+            method: HTTP method
+            url: path including query of the request
+            headers: headers of the request
+
+        Returns:
+            status code, JSON content and headers of the response
+        """
+        with self._lock:
+            self.request_count += 1
+            request_number = self.request_count
+            self.urls.append(url)
+            error_status = self.error_status
+            if error_status and self.error_count:
+                self.error_count -= 1
+                if not self.error_count:
+                    self.error_status = 0
+        if self.rate_limit_every and request_number % self.rate_limit_every == 0:
+            time.sleep(self.latency)
+            return 429, {"message": "Too Many Requests"}, {}
+        if error_status:
+            time.sleep(self.latency)
+            return error_status, {"message": "simulated error"}, {}
+
+        headers = headers or {}
+        response_headers = {}
+        if session_id := self._login(url, headers):
+            response_headers["Set-Cookie"] = f"{SESSION_COOKIE}={session_id}; Path=/"
+        status, content = self._route(method, url, headers)
+        data = content.get("data")
+        time.sleep(
+            self.latency
+            + self.latency_per_item * (len(data) if isinstance(data, list) else 1)
+        )
+        return status, content, response_headers
+
+    def _login(self, url: str, headers: Mapping[str, str]) -> str | None:
+        """Helper which starts a new session for a token login.
+
+        Args:
+            url: path including query of the request
+            headers: headers of the request
+
+        Returns:
+            id of the new session or None if the request is no token login
+        """
+        path = urlsplit(url).path.rstrip("/")
+        if path != "/api/whoami" or not headers.get("Authorization"):
+            return None
+        with self._lock:
+            self.login_expired = False
+            session_id = f"session-{len(self.sessions) + 1}"
+            self.sessions.add(session_id)
+        return session_id
+
+    def _route(  # noqa: C901, PLR0911, PLR0912
+        self, method: str, url: str, headers: Mapping[str, str]
+    ) -> tuple[int, dict]:
+        """Helper which returns the content for a request.
+
+        Args:
+            method: HTTP method
+            url: path including query of the request
+            headers: headers of the request
+
+        Returns:
+            status code and JSON content
+        """
+        split_url = urlsplit(url)
+        query = parse_qs(split_url.query)
+        path = split_url.path.rstrip("/")
+
+        cookie = SimpleCookie(headers.get("Cookie", "")).get(SESSION_COOKIE)
+        logging_in = path == "/api/whoami" and headers.get("Authorization")
+        if not logging_in and (
+            self.login_expired or cookie is None or cookie.value not in self.sessions
+        ):
+            return 401, {"message": "Session expired!"}
+        if method != "GET":
+            if headers.get("CSRF-Token") != self.csrf_token:
+                return 403, {"message": "CSRF-Token is invalid"}
+            return 405, {"message": "only GET requests are supported"}
+        if path == "/api/whoami":
+            return 200, {"data": {"id": 1, "email": "benchmark@example.com"}}
+        if path == "/api/csrftoken":
+            return 200, {"data": self.csrf_token}
+        if match := re.fullmatch(r"/api/persons/(\d+)(/groups)?", path):
+            return self._route_person(int(match[1]), groups=bool(match[2]))
+        if path == "/api/persons":
+            persons = self.data["persons"]
+            if ids := query.get("ids[]"):
+                persons = [person for person in persons if str(person["id"]) in ids]
+            return 200, paginate(persons, query, self.max_page_limit)
+        if path == "/api/groups/members":
+            members = self.data["group_members"]
+            if ids := query.get("ids[]"):
+                members = [
+                    member for member in members if str(member["groupId"]) in ids
+                ]
+            return 200, paginate(members, query, self.max_page_limit)
+        if path in {"/api/songs", "/api/groups"}:
+            return 200, paginate(
+                self.data[path.split("/")[-1]], query, self.max_page_limit
+            )
+        if path in REFERENCE_DATA:
+            return 200, {"data": REFERENCE_DATA[path]}
+        if path == "/api/calendars":
+            return 200, {"data": self.data["calendars"]}
+        if path == "/api/resource/masterdata":
+            return 200, {
+                "data": {"resourceTypes": [], "resources": self.data["resources"]}
+            }
+        if path == "/api/events":
+            events = filter_date_window(self.data["events"], query, "startDate")
+            return 200, paginate(events, query, self.max_page_limit)
+        if path == "/api/bookings":
+            resource_ids = query.get("resource_ids[]", [])
+            bookings = [
+                booking
+                for booking in filter_date_window(
+                    self.data["bookings"], query, "calculated.startDate"
+                )
+                if str(booking["base"]["resource"]["id"]) in resource_ids
+            ]
+            return 200, paginate(bookings, query, self.max_page_limit)
+        if path == "/api/posts":
+            posts = self.data["posts"]
+            if before := query.get("before"):
+                posts = [post for post in posts if post["publishedDate"] < before[0]]
+            # posts are paginated using before - only the first page is returned
+            return 200, paginate(posts, {"limit": query.get("limit", ["10"])})
+        return 404, {"message": f"{path} is not available on mock server"}
+
+    def _route_person(self, person_id: int, *, groups: bool) -> tuple[int, dict]:
+        """Helper which returns a single person or the groups of a person.
+
+        Args:
+            person_id: id of the person
+            groups: return the current group memberships instead of the person
+
+        Returns:
+            status code and JSON content
+        """
+        persons = [
+            person for person in self.data["persons"] if person["id"] == person_id
+        ]
+        if not persons:
+            return 404, {"message": f"person {person_id} not found"}
+        if not groups:
+            return 200, {"data": persons[0]}
+        return 200, {
+            "data": [
+                {
+                    "group": {
+                        "domainType": "group",
+                        "domainIdentifier": str(member["groupId"]),
+                    },
+                    "groupTypeRoleId": member["groupTypeRoleId"],
+                    "groupMemberStatus": member["groupMemberStatus"],
+                }
+                for member in self.data["group_members"]
+                if member["personId"] == person_id and not member["deleted"]
+            ]
+        }
+
+    def _handler_class(self) -> type[BaseHTTPRequestHandler]:
+        """Helper which creates a request handler bound to this server.
+
+        Returns:
+            request handler class
+        """
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # headers and body are sent separately - avoids delayed ACK stalls
+            disable_nagle_algorithm = True
+
+            def setup(self) -> None:
+                super().setup()
+                with server._lock:  # noqa: SLF001
+                    server.connection_count += 1
+
+            def do_GET(self) -> None:
+                self._send(*server.respond("GET", self.path, self.headers))
+
+            def do_POST(self) -> None:
+                self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                self._send(*server.respond("POST", self.path, self.headers))
+
+            def _send(self, status: int, content: dict, headers: dict) -> None:
+                body = json.dumps(content).encode()
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format: str, *args: list) -> None:  # noqa: A002
+                logger.debug(format, *args)
+
+        return Handler
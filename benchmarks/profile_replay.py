@@ -0,0 +1,169 @@
+"""Record traffic of a ChurchTools instance once and profile it offline afterwards.
+
+Recording requires connection details like the tests (secure/config.py or ENV).
+Replaying does not require network access and reports requests,
+CPU time and wall time for each step which allows comparing pull requests
+using production shaped payloads.
+
+Usage:
+    python -m benchmarks.profile_replay record recording.jsonl.gz
+    python -m benchmarks.profile_replay replay recording.jsonl.gz --timing-scale 0
+"""
+
+import argparse
+import logging
+import os
+import time
+from collections.abc import Callable
+
+from benchmarks.benchmark_getters import format_results
+from churchtools_api.churchtools_api import ChurchToolsApi
+from churchtools_api.ratelimitedsession import RateLimitedSession
+from churchtools_api.recording import RecordingAdapter, ReplayAdapter
+
+logger = logging.getLogger(__name__)
+
+REPLAY_DOMAIN = "https://replay.invalid"
+
+
+def run_scenario(
+    api: ChurchToolsApi, from_: str, to_: str, max_agendas: int
+) -> list[dict]:
+    """Executes the profiled api calls.
+
+    The same arguments must be used for recording and replaying.
+
+    Args:
+        api: logged in api
+        from_: first day of events YYYY-MM-DD
+        to_: last day of events YYYY-MM-DD
+        max_agendas: number of events for which an agenda docx is generated
+
+    Returns:
+        list of results with getter, items, requests, cpu_time and wall_time
+    """
+    results = []
+    _measure(api, "get_persons", api.get_persons, results)
+    events = _measure(
+        api, "get_events", lambda: api.get_events(from_=from_, to_=to_), results
+    )
+    service_groups = _measure(
+        api,
+        "get_event_masterdata",
+        lambda: api.get_event_masterdata(
+            resultClass="serviceGroups", returnAsDict=True
+        ),
+        results,
+    )
+
+    def agenda_docx() -> list:
+        agendas = [
+            api.get_event_agenda(event_id=event["id"])
+            for event in (events or [])[:max_agendas]
+        ]
+        return [
+            api.get_event_agenda_docx(agenda, serviceGroups=service_groups)
+            for agenda in agendas
+            if agenda
+        ]
+
+    _measure(api, "agenda_docx", agenda_docx, results)
+    return results
+
+
+def _measure(
+    api: ChurchToolsApi, name: str, function: Callable, results: list[dict]
+) -> list | dict | None:
+    """Helper which executes one step and appends its measurements.
+
+    Args:
+        api: the api used - requests are counted using its session metrics
+        name: name of the step
+        function: callable without arguments
+        results: list which the measurements are appended to
+
+    Returns:
+        the result of the function
+    """
+    api.session.metrics.reset()
+    cpu_start = time.process_time()
+    wall_start = time.perf_counter()
+    result = function()
+    results.append(
+        {
+            "getter": name,
+            "size": "-",
+            "items": len(result or []),
+            "requests": sum(
+                entry["count"]
+                for entry in api.session.metrics.snapshot()["endpoints"].values()
+            ),
+            "rate_limited": 0,
+            "wall_time": time.perf_counter() - wall_start,
+            "cpu_time": time.process_time() - cpu_start,
+            "peak_memory": 0,
+        }
+    )
+    return result
+
+
+def connect(domain: str, token: str, adapter: RecordingAdapter) -> ChurchToolsApi:
+    """Creates an api which uses the adapter for all requests including login.
+
+    Args:
+        domain: domain of the instance
+        token: login token
+        adapter: RecordingAdapter or ReplayAdapter
+
+    Returns:
+        logged in api
+    """
+    api = ChurchToolsApi(domain=domain)
+    api.session = RateLimitedSession()
+    api.session.mount("https://", adapter)
+    api.session.mount("http://", adapter)
+    api.login_ct_rest_api(ct_token=token)
+    return api
+
+
+def main() -> None:
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("mode", choices=["record", "replay"])
+    parser.add_argument("path", help="recording file e.g. recording.jsonl.gz")
+    parser.add_argument("--from", dest="from_", default="2026-01-01")
+    parser.add_argument("--to", dest="to_", default="2026-03-31")
+    parser.add_argument("--max-agendas", type=int, default=5)
+    parser.add_argument("--timing-scale", type=float, default=0.0)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.ERROR)
+    if args.mode == "record":
+        if "CT_TOKEN" in os.environ:
+            domain, token = os.environ["CT_DOMAIN"], os.environ["CT_TOKEN"]
+        else:
+            from secure.config import ct_domain, ct_token
+
+            domain, token = ct_domain, ct_token
+        adapter = RecordingAdapter()
+        api = connect(domain=domain, token=token, adapter=adapter)
+    else:
+        adapter = ReplayAdapter(args.path, timing_scale=args.timing_scale)
+        api = connect(domain=REPLAY_DOMAIN, token="replay", adapter=adapter)  # noqa: S106
+
+    results = run_scenario(
+        api, from_=args.from_, to_=args.to_, max_agendas=args.max_agendas
+    )
+    print(format_results(results))  # noqa: T201
+    print(  # noqa: T201
+        "cpu ms: "
+        + ", ".join(f"{r['getter']}={r['cpu_time'] * 1000:.1f}" for r in results)
+    )
+    if args.mode == "record":
+        adapter.save(args.path)
+    elif adapter.unmatched:
+        logger.error("%s requests were not recorded", len(adapter.unmatched))
+
+
+if __name__ == "__main__":
+    main()
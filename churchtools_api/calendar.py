@@ -1,16 +1,25 @@
 """module containing parts used for calendar handling."""
 
-import json
 import logging
-from datetime import datetime
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextvars import copy_context
+from datetime import datetime, tzinfo
 from pathlib import Path
 
 import requests
 
-from churchtools_api.churchtools_api_abstract import ChurchToolsApiAbstract
+from churchtools_api.churchtools_api_abstract import (
+    ChurchToolsApiAbstract,
+    cached_reference_data,
+    decode_json,
+)
+from churchtools_api.recurrence import expand_appointments
 
 logger = logging.getLogger(__name__)
 
+CALENDAR_IDS_PER_REQUEST = 10
+
 
 class ChurchToolsApiCalendar(ChurchToolsApiAbstract):
     """Part definition of ChurchToolsApi which focuses on calendars.
@@ -21,8 +30,9 @@ class ChurchToolsApiCalendar(ChurchToolsApiAbstract):
 
     def __init__(self) -> None:
         """Inherited initialization."""
-        super()
+        super().__init__()
 
+    @cached_reference_data
     def get_calendars(self) -> list[dict]:
         """Function to retrieve all calendar objects.
 
@@ -38,8 +48,8 @@ class ChurchToolsApiCalendar(ChurchToolsApiAbstract):
         response = self.session.get(url=url, params=params, headers=headers)
 
         if response.status_code == requests.codes.ok:
-            response_content = json.loads(response.content)
-            return response_content["data"].copy()
+            response_content = decode_json(response.content)
+            return response_content["data"]
         logger.warning(
             "%s Something went wrong fetching events: %s",
             response.status_code,
@@ -92,11 +102,12 @@ class ChurchToolsApiCalendar(ChurchToolsApiAbstract):
         response = self.session.get(url=url, params=params, headers=headers)
 
         if response.status_code == requests.codes.ok:
-            response_content = json.loads(response.content)
+            response_content = decode_json(response.content)
             response_data = self.combine_paginated_response_data(
                 response_content,
                 url=url,
                 headers=headers,
+                params=params,
             )
 
             result = (
@@ -138,6 +149,149 @@ class ChurchToolsApiCalendar(ChurchToolsApiAbstract):
         )
         return None
 
+    def get_calendar_appointment_occurrences(
+        self,
+        calendar_ids: list,
+        from_: str | datetime,
+        to_: str | datetime,
+        timezone: tzinfo | None = None,
+    ) -> list[dict]:
+        """Retrieve all occurrences of appointments within a timeframe.
+
+        Sends one request per calendar and expands series appointments
+        including exceptions and additions locally
+        instead of requesting each occurrence individually.
+
+        Arguments:
+            calendar_ids: list of calendar ids to be checked
+            from_: first day of the timeframe in format YYYY-MM-DD
+            to_: last day of the timeframe in format YYYY-MM-DD
+            timezone: zoneinfo timezone used for repetition.
+                Defaults to local timezone
+
+        Returns:
+            list of appointments - one item per occurrence sorted by startDate
+            startDate and endDate overwritten by the date of the occurrence
+        """
+        appointments = []
+        for calendar_id in calendar_ids:
+            params = self._get_calendar_appointments_params(
+                params={}, from_=from_, to_=to_
+            )
+            appointments.extend(
+                self._get_calendar_appointments_raw(
+                    calendar_ids=[calendar_id], params=params
+                )
+                or []
+            )
+
+        return expand_appointments(
+            appointments, from_=from_, to_=to_, timezone=timezone
+        )
+
+    def iter_calendar_appointments(
+        self,
+        calendar_ids: list,
+        chunk_size: int = CALENDAR_IDS_PER_REQUEST,
+        max_workers: int = 4,
+        *,
+        from_: str | datetime,
+        to_: str | datetime,
+    ) -> Iterator[dict]:
+        """Retrieve appointments of many calendars using concurrent requests.
+
+        Calendar ids are split into chunks which are requested in parallel
+        in order to keep URLs and responses small.
+        Results are yielded as soon as a chunk is complete.
+        The timeframe is required because only then ChurchTools
+        returns the calculated date of each occurrence.
+
+        Arguments:
+            calendar_ids: list of calendar ids to be checked
+            chunk_size: max number of calendar ids per request
+            max_workers: max number of concurrent requests
+            from_: starting date in format YYYY-MM-DD
+            to_: end date in format YYYY-MM-DD
+
+        Raises:
+            ValueError: if from_ or to_ are not in format YYYY-MM-DD
+
+        Yields:
+            calendar appointments - one per occurrence
+            startDate and endDate overwritten by the calculated date
+            each occurrence is only yielded once
+        """
+        params = self._get_calendar_appointments_params(params={}, from_=from_, to_=to_)
+        if "from" not in params or "to" not in params:
+            msg = f"timeframe {from_} - {to_} is not in format YYYY-MM-DD"
+            raise ValueError(msg)
+        chunks = [
+            calendar_ids[index : index + chunk_size]
+            for index in range(0, len(calendar_ids), chunk_size)
+        ]
+        seen = set()
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [
+                executor.submit(
+                    copy_context().run,
+                    self._get_calendar_appointments_raw,
+                    calendar_ids=chunk,
+                    params=dict(params),
+                )
+                for chunk in chunks
+            ]
+            for future in as_completed(futures):
+                for appointment in future.result() or []:
+                    occurrence = {
+                        **appointment["base"],
+                        "startDate": appointment["calculated"]["startDate"],
+                        "endDate": appointment["calculated"]["endDate"],
+                    }
+                    key = (occurrence["id"], occurrence["startDate"])
+                    if key in seen:
+                        continue
+                    seen.add(key)
+                    yield occurrence
+
+    def _get_calendar_appointments_raw(
+        self, calendar_ids: list, params: dict
+    ) -> list[dict]:
+        """Helper which requests appointments of calendars without simplification.
+
+        Arguments:
+            calendar_ids: list of calendar ids to be checked
+            params: prepared params which are also used for pagination
+
+        Returns:
+            list of dicts with "base" and "calculated" appointment
+            None in case of issues
+        """
+        url = self.domain + "/api/calendars"
+        if len(calendar_ids) > 1:
+            url += "/appointments"
+            params["calendar_ids[]"] = calendar_ids
+        else:
+            url += f"/{calendar_ids[0]}/appointments"
+
+        headers = {"accept": "application/json"}
+        response = self.session.get(url=url, params=params, headers=headers)
+
+        if response.status_code != requests.codes.ok:
+            logger.warning(
+                "%s Something went wrong fetching calendar appointments: %s",
+                response.status_code,
+                response.content,
+            )
+            return None
+
+        response_content = decode_json(response.content)
+        return self.combine_paginated_response_data(
+            response_content,
+            url=url,
+            headers=headers,
+            params=params,
+        )
+
     def _get_calendar_appointments_params(self, params: dict, **kwargs: dict) -> dict:
         """Helper function which generates params from kwargs.
 
@@ -235,10 +389,10 @@ class ChurchToolsApiCalendar(ChurchToolsApiAbstract):
         response = self.session.post(url=url, json=data, headers=headers)
 
         if response.status_code != requests.codes.created:
-            logger.warning(json.loads(response.content).get("errors"))
+            logger.warning(decode_json(response.content).get("errors"))
             return None
 
-        result_data = json.loads(response.content)["data"]
+        result_data = decode_json(response.content)["data"]
 
         self._handle_calendar_image(
             appointment_id=result_data["id"], image=image, image_options=image_options
@@ -278,6 +432,139 @@ class ChurchToolsApiCalendar(ChurchToolsApiAbstract):
             image: path to a file which should be uploaded. Defaults to None
             image_options: additional crop and focus dict to alter image
 
+        Returns:
+            The dict of the calendar appointment updated or None in case of issues
+        """
+        existing_calendar_appointments = self.get_calendar_appointments(
+            calendar_ids=[calendar_id], appointment_id=appointment_id
+        )
+        if not existing_calendar_appointments:
+            logger.warning(
+                "appointment %s of calendar %s could not be loaded for update",
+                appointment_id,
+                calendar_id,
+            )
+            return None
+
+        return self._put_calender_appointment(
+            calendar_id=calendar_id,
+            appointment_id=appointment_id,
+            existing_calendar_appointment=existing_calendar_appointments[0],
+            changes=kwargs,
+        )
+
+    def update_calender_appointments(
+        self,
+        updates: list[tuple[int, int, dict]],
+        from_: str | datetime,
+        to_: str | datetime,
+        max_workers: int = 4,
+    ) -> list[dict]:
+        """Method used to update many calendar appointments at once.
+
+        Instead of loading each appointment before it's update
+        the existing appointments are loaded with one request per calendar
+        for the timeframe specified.
+        Appointments which are not part of the timeframe are loaded individually.
+        Changes are merged locally and submitted using concurrent requests.
+        Entries of the same appointment are combined into one request
+        with later changes taking precedence.
+
+        Args:
+            updates: list of (calendar_id, appointment_id, changes) entries
+                changes is a dict using the keywords of update_calender_appointment
+            from_: first day of the timeframe containing the appointments
+            to_: last day of the timeframe containing the appointments
+            max_workers: max number of concurrent requests
+
+        Returns:
+            list of updated appointments in the same order as updates
+            None for each entry which could not be updated
+        """
+        # concurrent PUTs of the same appointment would overwrite each other
+        merged_changes: dict[tuple[int, int], dict] = {}
+        for calendar_id, appointment_id, changes in updates:
+            merged_changes.setdefault((calendar_id, appointment_id), {}).update(changes)
+
+        existing_calendar_appointments = {}
+        for calendar_id in {calendar_id for calendar_id, _ in merged_changes}:
+            params = self._get_calendar_appointments_params(
+                params={}, from_=from_, to_=to_
+            )
+            appointments = self._get_calendar_appointments_raw(
+                calendar_ids=[calendar_id], params=params
+            )
+            for appointment in appointments or []:
+                key = (calendar_id, appointment["base"]["id"])
+                existing_calendar_appointments[key] = appointment["base"]
+        logger.debug(
+            "loaded %s existing appointments for %s updates",
+            len(existing_calendar_appointments),
+            len(updates),
+        )
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {}
+            for (calendar_id, appointment_id), changes in merged_changes.items():
+                existing = existing_calendar_appointments.get(
+                    (calendar_id, appointment_id)
+                )
+                if existing is None:
+                    logger.debug(
+                        "appointment %s not within timeframe - loading individually",
+                        appointment_id,
+                    )
+                    future = executor.submit(
+                        copy_context().run,
+                        self.update_calender_appointment,
+                        calendar_id=calendar_id,
+                        appointment_id=appointment_id,
+                        **changes,
+                    )
+                else:
+                    future = executor.submit(
+                        copy_context().run,
+                        self._put_calender_appointment,
+                        calendar_id=calendar_id,
+                        appointment_id=appointment_id,
+                        existing_calendar_appointment=existing,
+                        changes=changes,
+                    )
+                futures[calendar_id, appointment_id] = future
+
+        results = {}
+        for (calendar_id, appointment_id), future in futures.items():
+            try:
+                result = future.result()
+            except Exception as exception:  # noqa: BLE001
+                logger.warning(
+                    "update of appointment %s of calendar %s failed: %s",
+                    appointment_id,
+                    calendar_id,
+                    exception,
+                )
+                result = None
+            results[calendar_id, appointment_id] = result
+        return [
+            results[calendar_id, appointment_id]
+            for calendar_id, appointment_id, _ in updates
+        ]
+
+    def _put_calender_appointment(
+        self,
+        calendar_id: int,
+        appointment_id: int,
+        existing_calendar_appointment: dict,
+        changes: dict,
+    ) -> dict:
+        """Helper which merges changes into an existing appointment and submits it.
+
+        Args:
+            calendar_id: id of the calendar to work with
+            appointment_id: id of the individual calendar appointment
+            existing_calendar_appointment: appointment as loaded from ChurchTools
+            changes: keywords as described in update_calender_appointment
+
         Returns:
             The dict of the calendar appointment updated or None in case of issues
         """
@@ -287,23 +574,23 @@ class ChurchToolsApiCalendar(ChurchToolsApiAbstract):
 
         headers = {"accept": "application/json"}
 
-        existing_calendar_appointment = self.get_calendar_appointments(
-            calendar_ids=[calendar_id], appointment_id=appointment_id
-        )[0]
+        existing_calendar_appointment = existing_calendar_appointment.copy()
+        image = changes.pop("image", None)
+        image_options = changes.pop("image_options", None)
 
         # overwrite params in respective type
         for date_param in ["startDate", "endDate"]:
-            if date_param in list(kwargs):
+            if date_param in list(changes):
                 existing_calendar_appointment[date_param] = (
-                    kwargs.pop(date_param).strftime("%Y-%m-%dT%H:%M:%S") + "Z"
+                    changes.pop(date_param).strftime("%Y-%m-%dT%H:%M:%S") + "Z"
                 )
         for bool_param in ["isInternal"]:
-            if bool_param in list(kwargs):
+            if bool_param in list(changes):
                 existing_calendar_appointment[bool_param] = (
-                    "true" if kwargs.pop(bool_param) else "false"
+                    "true" if changes.pop(bool_param) else "false"
                 )
-        for param in list(kwargs):
-            existing_calendar_appointment[param] = kwargs.pop(param)
+        for param in list(changes):
+            existing_calendar_appointment[param] = changes.pop(param)
 
         # remove items that should not be updated with this function
         drop_fields = ["calendar", "@deprecated", "meta", "version"]
@@ -315,9 +602,12 @@ class ChurchToolsApiCalendar(ChurchToolsApiAbstract):
         }
 
         # remove null values in address
-        for address_key in list(updated_calendar_appointment.get("address", {})):
-            if not updated_calendar_appointment["address"].get(address_key):
-                updated_calendar_appointment["address"].pop(address_key)
+        if "address" in updated_calendar_appointment:
+            updated_calendar_appointment["address"] = {
+                key: value
+                for key, value in updated_calendar_appointment["address"].items()
+                if value
+            }
 
         # bool cleanup
         for key in ["allDay", "isInternal"]:
@@ -334,16 +624,16 @@ class ChurchToolsApiCalendar(ChurchToolsApiAbstract):
         )
 
         if response.status_code != requests.codes.ok:
-            logger.warning(json.loads(response.content).get("errors"))
+            logger.warning(decode_json(response.content).get("errors"))
             return None
 
         self._handle_calendar_image(
             appointment_id=appointment_id,
-            image=kwargs.get("image"),
-            image_options=kwargs.get("image_options"),
+            image=image,
+            image_options=image_options,
         )
 
-        return json.loads(response.content)["data"]
+        return decode_json(response.content)["data"]
 
     def delete_calender_appointment(
         self, calendar_id: int, appointment_id: int
@@ -366,7 +656,7 @@ class ChurchToolsApiCalendar(ChurchToolsApiAbstract):
         response = self.session.delete(url=url, headers=headers)
 
         if response.status_code != requests.codes.no_content:
-            logger.warning(json.loads(response.content).get("errors"))
+            logger.warning(decode_json(response.content).get("errors"))
             return False
 
         return True
@@ -1,17 +1,27 @@
 """module containing combining all parts into a single class."""
 
-import json
 import logging
+import threading
+from collections.abc import Iterable
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
 
 import requests
 
 from churchtools_api.calendar import ChurchToolsApiCalendar
+from churchtools_api.churchtools_api_abstract import (
+    cached_reference_data,
+    decode_json,
+)
 from churchtools_api.events import ChurchToolsApiEvents
 from churchtools_api.files import ChurchToolsApiFiles
 from churchtools_api.groups import ChurchToolsApiGroups
 from churchtools_api.persons import ChurchToolsApiPersons
 from churchtools_api.posts import ChurchToolsApiPosts
-from churchtools_api.ratelimitedsession import RateLimitedSession
+from churchtools_api.ratelimitedsession import (
+    RateLimitedSession,
+    without_reauthentication,
+)
 from churchtools_api.resources import ChurchToolsApiResources
 from churchtools_api.songs import ChurchToolsApiSongs
 
@@ -19,6 +29,18 @@ from churchtools_api.songs import ChurchToolsApiSongs
 
 logger = logging.getLogger(__name__)
 
+# getters of rarely changing data which can be loaded by warm_up_reference_data
+REFERENCE_DATA = (
+    "get_options",
+    "get_services",
+    "get_persons_masterdata",
+    "get_event_masterdata",
+    "get_resource_masterdata",
+    "get_grouptypes",
+    "get_calendars",
+    "get_global_permissions",
+)
+
 
 class ChurchToolsApi(
     ChurchToolsApiPersons,
@@ -43,32 +65,48 @@ class ChurchToolsApi(
         ChurchToolsApiTags: all functions used for tags
     """
 
-    def __init__(
+    def __init__(  # noqa: PLR0913
         self,
         domain: str,
         ct_token: str | None = None,
         ct_user: str | None = None,
         ct_password: str | None = None,
+        *,
+        max_workers: int | None = None,
+        warm_up: Iterable[str] | None = None,
     ) -> None:
         """Setup of a ChurchToolsApi object.
 
         for the specified ct_domain using a token login.
+        One object can be shared by multiple threads e.g. of a ThreadPoolExecutor.
 
         Arguments:
             domain: including https:// ending on e.g. .de
             ct_token: direct access using a user token
             ct_user: indirect login using user and password combination
             ct_password: indirect login using user and password combination
+            max_workers: number of threads sharing this object - used as size
+                of the connection pool. Defaults to None using 10 connections
+            warm_up: names of REFERENCE_DATA loaded concurrently after login
+                see warm_up_reference_data. Defaults to None loading nothing
 
         """
         super().__init__()
         self.session : None | RateLimitedSession = None
         self.domain : str = domain
+        self.max_workers = max_workers
+        # serializes login and CSRF refresh of concurrent threads
+        self._auth_lock = threading.RLock()
+        # used to renew an expired login - see _reauthenticate
+        self._credentials: dict[str, str] = {}
 
+        logged_in = None
         if ct_token is not None:
-            self.login_ct_rest_api(ct_token=ct_token)
+            logged_in = self.login_ct_rest_api(ct_token=ct_token)
         elif ct_user is not None and ct_password is not None:
-            self.login_ct_rest_api(ct_user=ct_user, ct_password=ct_password)
+            logged_in = self.login_ct_rest_api(ct_user=ct_user, ct_password=ct_password)
+        if logged_in and warm_up:
+            self.warm_up_reference_data(warm_up)
 
         logger.debug("ChurchToolsApi init finished")
 
@@ -92,10 +130,40 @@ class ChurchToolsApi(
             ct_user: the username to be used in case of unknown login token
             ct_password: the password to be used in case of unknown login token
 
+        An expired login or CSRF token is renewed automatically
+        keeping the session and its connection pool.
+
         Returns:
             personId if login successful otherwise False
         """
-        self.session = RateLimitedSession()
+        with self._auth_lock, without_reauthentication():
+            return self._login(
+                ct_token=ct_token, ct_user=ct_user, ct_password=ct_password
+            )
+
+    def _login(
+        self,
+        *,
+        ct_token: str | None,
+        ct_user: str | None,
+        ct_password: str | None,
+    ) -> int | bool:
+        """Helper which executes the login - requires _auth_lock.
+
+        Like _reauthenticate the login is renewed on the existing session,
+        so requests of other threads keep their cookies and connections
+        and a failed login keeps the previous one.
+
+        Arguments:
+            ct_token: token to be used for login into CT
+            ct_user: the username to be used in case of unknown login token
+            ct_password: the password to be used in case of unknown login token
+
+        Returns:
+            personId if login successful otherwise False
+        """
+        if self.session is None:
+            self.session = RateLimitedSession(pool_maxsize=self.max_workers)
 
         if ct_token:
             logger.info("Trying Login with token")
@@ -104,13 +172,13 @@ class ChurchToolsApi(
             response = self.session.get(url=url, headers=headers)
 
             if response.status_code == requests.codes.ok:
-                response_content = json.loads(response.content)
+                response_content = decode_json(response.content)
                 logger.info(
                     "Token Login Successful as %s",
                     response_content["data"]["email"],
                 )
-                self.session.headers["CSRF-Token"] = self.get_ct_csrf_token()
-                return json.loads(response.content)["data"]["id"]
+                self._logged_in({"ct_token": ct_token})
+                return response_content["data"]["id"]
             logger.warning(
                 "Token Login failed with %s",
                 response.content.decode(),
@@ -124,9 +192,10 @@ class ChurchToolsApi(
             response = self.session.post(url=url, data=data)
 
             if response.status_code == requests.codes.ok:
-                response_content = json.loads(response.content)
+                response_content = decode_json(response.content)
                 person = self.who_am_i()
                 logger.info("User/Password Login Successful as %s", person["email"])
+                self._logged_in(data)
                 return person["id"]
             logger.warning(
                 "User/Password Login failed with %s",
@@ -135,6 +204,57 @@ class ChurchToolsApi(
             return False
         return None
 
+    def _logged_in(self, credentials: dict[str, str]) -> None:
+        """Helper which prepares the session after a successful login.
+
+        Arguments:
+            credentials: used to renew the login - see _reauthenticate
+        """
+        # reference data of a previous login might differ for another user
+        self.reference_cache.clear()
+        self.refresh_csrf_token()
+        self._credentials = credentials
+        self.session.reauthenticate = self._reauthenticate
+
+    def _reauthenticate(self) -> bool:
+        """Helper which renews an expired login using the credentials of the login.
+
+        The session and its connection pool are kept like by login_ct_rest_api.
+        Called by the session for requests answered with 401 or a CSRF error.
+
+        Returns:
+            True if login and CSRF token were renewed
+        """
+        with self._auth_lock, without_reauthentication():
+            if ct_token := self._credentials.get("ct_token"):
+                response = self.session.get(
+                    url=self.domain + "/api/whoami",
+                    headers={"Authorization": "Login " + ct_token},
+                )
+            else:
+                response = self.session.post(
+                    url=self.domain + "/api/login", data=self._credentials
+                )
+            if response.status_code != requests.codes.ok:
+                logger.warning(
+                    "Renewing login failed with %s", response.content.decode()
+                )
+                return False
+            return self.refresh_csrf_token() is not None
+
+    def refresh_csrf_token(self) -> str | None:
+        """Requests a new CSRF token used by all following requests.
+
+        Thread safe - concurrent refreshes are executed one after another.
+
+        Returns:
+            token or None if it could not be requested
+        """
+        with self._auth_lock, without_reauthentication():
+            csrf_token = self.get_ct_csrf_token()
+            self.session.set_header("CSRF-Token", csrf_token)
+            return csrf_token
+
     def get_ct_csrf_token(self) -> str:
         """Requests CSRF Token https://hilfe.church.tools/wiki/0/API-CSRF.
 
@@ -148,7 +268,7 @@ class ChurchToolsApi(
         url = self.domain + "/api/csrftoken"
         response = self.session.get(url=url)
         if response.status_code == requests.codes.ok:
-            csrf_token = json.loads(response.content)["data"]
+            csrf_token = decode_json(response.content)["data"]
             logger.debug("CSRF Token erfolgreich abgerufen %s", csrf_token)
             return csrf_token
         logger.warning(
@@ -167,7 +287,7 @@ class ChurchToolsApi(
         response = self.session.get(url=url)
 
         if response.status_code == requests.codes.ok:
-            response_content = json.loads(response.content)
+            response_content = decode_json(response.content)
             if "email" in response_content["data"]:
                 logger.info("Who am I as %s", response_content["data"]["email"])
                 return response_content["data"]
@@ -208,10 +328,11 @@ class ChurchToolsApi(
             return True
         logger.debug(
             "Response AJAX Connection failed with %s",
-            json.load(response.content),
+            response.content.decode(),
         )
         return False
 
+    @cached_reference_data
     def get_global_permissions(self) -> dict:
         """Get global permissions of the current user.
 
@@ -222,8 +343,8 @@ class ChurchToolsApi(
         headers = {"accept": "application/json"}
         response = self.session.get(url=url, headers=headers)
         if response.status_code == requests.codes.ok:
-            response_content = json.loads(response.content)
-            response_data = response_content["data"].copy()
+            response_content = decode_json(response.content)
+            response_data = response_content["data"]
             logger.debug(
                 "First response of Global Permissions successful len=%s",
                 len(response_content),
@@ -237,6 +358,7 @@ class ChurchToolsApi(
         )
         return None
 
+    @cached_reference_data
     def get_services(self, **kwargs: dict) -> list[dict]:
         """Function to get list of all or a single services configuration item from CT.
 
@@ -259,8 +381,8 @@ class ChurchToolsApi(
         response = self.session.get(url=url, headers=headers)
 
         if response.status_code == requests.codes.ok:
-            response_content = json.loads(response.content)
-            response_data = response_content["data"].copy()
+            response_content = decode_json(response.content)
+            response_data = response_content["data"]
 
             if kwargs.get("returnAsDict", False) and "serviceId" not in kwargs:
                 result = {}
@@ -276,6 +398,7 @@ class ChurchToolsApi(
         logger.info("Services requested failed: %s", response.status_code)
         return None
 
+    @cached_reference_data
     def get_options(self) -> dict:
         """Helper function which returns all configurable option fields from CT.
 
@@ -292,8 +415,8 @@ class ChurchToolsApi(
         response = self.session.get(url=url, params=params, headers=headers)
 
         if response.status_code == requests.codes.ok:
-            response_content = json.loads(response.content)
-            response_data = response_content["data"].copy()
+            response_content = decode_json(response.content)
+            response_data = response_content["data"]
             logger.debug("Options load successful len=%s", len(response_content))
             return {item["name"]: item for item in response_data}
         logger.warning(
@@ -302,3 +425,50 @@ class ChurchToolsApi(
             response.content,
         )
         return None
+
+    def warm_up_reference_data(
+        self, names: Iterable[str] = REFERENCE_DATA, *, max_workers: int | None = None
+    ) -> dict[str, bool]:
+        """Loads reference data concurrently into the reference_cache.
+
+        Afterwards calls of these getters without arguments are answered from
+        the cache - startup costs about the latency of the slowest request
+        instead of the sum of all. Use reference_cache.clear() to load
+        current data again.
+
+        Arguments:
+            names: getters listed in REFERENCE_DATA. Defaults to all of them
+            max_workers: max number of concurrent requests. Defaults to one per name
+
+        Raises:
+            ValueError: for names which are not part of REFERENCE_DATA
+
+        Returns:
+            dict by name - True if loaded
+        """
+        names = list(dict.fromkeys(names))
+        if unknown := [name for name in names if name not in REFERENCE_DATA]:
+            msg = f"{unknown} are not part of REFERENCE_DATA"
+            raise ValueError(msg)
+        if not names:
+            return {}
+
+        for name in names:
+            self.reference_cache.pop(name, None)
+        with ThreadPoolExecutor(max_workers=max_workers or len(names)) as executor:
+            futures = {
+                name: executor.submit(copy_context().run, getattr(self, name))
+                for name in names
+            }
+        result = {}
+        for name, future in futures.items():
+            try:
+                response_data = future.result()
+            except (requests.RequestException, TimeoutError) as exception:
+                logger.warning("warm up of %s failed: %s", name, exception)
+                response_data = None
+            if response_data is not None:
+                self.reference_cache[name] = response_data
+            result[name] = response_data is not None
+        logger.info("warm up loaded %s", [name for name in names if result[name]])
+        return result
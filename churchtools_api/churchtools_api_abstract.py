@@ -1,16 +1,120 @@
 """module containing abstract reference used by all implementation parts."""
 
+import copy
+import functools
 import json
 import logging
+import time
 from abc import ABC, abstractmethod
+from collections.abc import Callable
 from typing import TYPE_CHECKING
 
+from churchtools_api.deadlines import budget_public_methods
+from churchtools_api.metrics import normalize_endpoint
+from churchtools_api.pagination import PageSizeTuner
+from churchtools_api.planner import QueryPlan, QueryPlanner
+from churchtools_api.ratelimitedsession import last_request_latency
+from churchtools_api.tracing import trace_public_methods
+
+try:
+    import orjson
+except ImportError:  # optional dependency - pip install churchtools-api[fast]
+    orjson = None
+
 if TYPE_CHECKING:
     import requests
 
 logger = logging.getLogger(__name__)
 
 
+def decode_json(content: bytes | str) -> dict | list:
+    """Decodes the JSON content of a response.
+
+    Uses orjson if installed which decodes large pages considerably faster
+    and falls back to json of the standard library otherwise.
+    Both raise a json.JSONDecodeError on invalid content.
+
+    Args:
+        content: usually response.content
+
+    Returns:
+        decoded content
+    """
+    if orjson is not None:
+        return orjson.loads(content)
+    return json.loads(content)
+
+
+def select_fields(data: list[dict] | dict, fields: list[str] | None) -> list | dict:
+    """Keeps only the requested fields of decoded items.
+
+    Nested fields are selected using dots e.g. "calendar.domainIdentifier"
+    and keep their nesting. Fields missing in an item are skipped.
+
+    Args:
+        data: list of items or a single item
+        fields: names of the fields to keep - None keeps everything
+
+    Returns:
+        new items containing the selected fields only
+    """
+    if fields is None:
+        return data
+    if isinstance(data, dict):
+        return _select_item_fields(data, fields)
+    return [_select_item_fields(item, fields) for item in data]
+
+
+def _select_item_fields(item: dict, fields: list[str]) -> dict:
+    """Helper which selects fields of one item.
+
+    Args:
+        item: decoded item
+        fields: names of the fields to keep
+
+    Returns:
+        new dict containing the selected fields only
+    """
+    result = {}
+    for field in fields:
+        keys = field.split(".")
+        value = item
+        for key in keys:
+            if not isinstance(value, dict) or key not in value:
+                break
+            value = value[key]
+        else:
+            target = result
+            for key in keys[:-1]:
+                target = target.setdefault(key, {})
+            target[keys[-1]] = value
+    return result
+
+
+def cached_reference_data(function: Callable) -> Callable:
+    """Decorator which answers calls without arguments from the reference_cache.
+
+    Entries are only added by ChurchToolsApi.warm_up_reference_data -
+    without warm up each call is sent to the server.
+    Callers receive a copy which can be modified safely.
+
+    Args:
+        function: getter of reference data e.g. get_options
+
+    Returns:
+        wrapped getter
+    """
+
+    @functools.wraps(function)
+    def wrapper(self, *args: list, **kwargs: dict):  # noqa: ANN001, ANN202
+        cache = getattr(self, "reference_cache", {})
+        if not args and not kwargs and function.__name__ in cache:
+            return copy.deepcopy(cache[function.__name__])
+        return function(self, *args, **kwargs)
+
+    return wrapper
+
+
 class ChurchToolsApiAbstract(ABC):
     """This abstract is used to define minimum references available for all api parts.
 
@@ -18,16 +122,72 @@ class ChurchToolsApiAbstract(ABC):
         ABC: python default abstract
     """
 
+    def __init_subclass__(cls, **kwargs: dict) -> None:
+        """Each public method of api parts opens a span if tracing is enabled.
+
+        and accepts the keyword time_budget (seconds) limiting the whole call.
+        Defaults to the time_budget of the session.
+
+        Args:
+            kwargs: passthrough to default implementation
+        """
+        super().__init_subclass__(**kwargs)
+        budget_public_methods(cls)
+        trace_public_methods(cls)
+
     @abstractmethod
     def __init__(self) -> None:
         """Preparing base variables."""
         self.session:requests.Session |None = None
         self.domain:str|None = None
+        self.page_sizes: PageSizeTuner = PageSizeTuner()
+        self.reference_cache: dict[str, object] = {}
+        self.planner: QueryPlanner = QueryPlanner()
+
+    def _get_page_size(self, url: str) -> int:
+        """Helper which returns the limit param for a paginated request.
+
+        Args:
+            url: the url of the request
+
+        Returns:
+            page size configured or tuned for the endpoint
+        """
+        return self.page_sizes.get(normalize_endpoint(url))
+
+    def _plan_lookup(
+        self,
+        url: str,
+        ids: list,
+        strategies: tuple[str],
+        items_per_id: float | None = None,
+    ) -> QueryPlan:
+        """Helper which chooses how items of a collection are looked up by id.
+
+        Args:
+            url: the url of the collection
+            ids: requested ids
+            strategies: strategies supported by the endpoint - see planner
+            items_per_id: expected number of items matching one id.
+                Defaults to the value learned for the endpoint
+
+        Returns:
+            the cheapest plan
+        """
+        return self.planner.plan(
+            normalize_endpoint(url),
+            ids,
+            page_size=self._get_page_size(url),
+            strategies=strategies,
+            items_per_id=items_per_id,
+        )
 
     def combine_paginated_response_data(
         self,
         response_content: dict,
         url: str,
+        fields: list[str] | None = None,
+        page_consumer: Callable[[list[dict]], None] | None = None,
         **kwargs: dict,
     ) -> dict:
         """Helper function which combines data for requests for pagination.
@@ -36,14 +196,42 @@ class ChurchToolsApiAbstract(ABC):
             response_content: the original response form ChurchTools
                 which either has meta/pagination or not
             url: the url used for the original request in order to repear it
+            fields: optional projection applied to each page right after decoding
+                so that only one page of full items is kept in memory
+            page_consumer: optional callable which receives the items of each page
+                instead of collecting them - e.g. to stream into an export
             kwargs: can contain headers and params passthrough
 
         Returns:
             response 'data' without pagination
+                the data list of response_content might be extended in place
+                empty list if a page_consumer is used
         """
-        response_data = response_content["data"].copy()
+        response_data = select_fields(response_content["data"], fields)
+        first_page_records = (
+            len(response_data) if isinstance(response_data, list) else 1
+        )
+        if page_consumer:
+            page_consumer(
+                [response_data] if isinstance(response_data, dict) else response_data
+            )
+            response_data = []
 
         if pagination := response_content.get("meta", {}).get("pagination"):
+            endpoint = normalize_endpoint(url)
+            limit = int(kwargs.get("params", {}).get("limit") or 0)
+            total = pagination.get("total")
+            if limit:
+                # the first page was requested by the caller right before
+                self.page_sizes.record_page(
+                    endpoint,
+                    limit=limit,
+                    records=first_page_records,
+                    size_bytes=0,
+                    latency=last_request_latency() or 0,
+                    server_limit=pagination.get("limit"),
+                    total=total,
+                )
             for page in range(pagination["current"], pagination["lastPage"]):
                 logger.debug(
                     "running paginated request for page %s of %s",
@@ -56,7 +244,27 @@ class ChurchToolsApiAbstract(ABC):
                 else:
                     kwargs["params"] = new_param
 
-                response = self.session.get(url=url, **kwargs)
-                response_content = json.loads(response.content)
-                response_data.extend(response_content["data"])
+                start = time.perf_counter()
+                with self.session.tracer.span(
+                    "pagination page", page=page + 1, last_page=pagination["lastPage"]
+                ):
+                    response = self.session.get(url=url, **kwargs)
+                latency = time.perf_counter() - start
+                # failures remaining after retries raise HTTPError instead of
+                # decoding the error message
+                response.raise_for_status()
+                page_data = decode_json(response.content)["data"]
+                if page_consumer:
+                    page_consumer(select_fields(page_data, fields))
+                else:
+                    response_data.extend(select_fields(page_data, fields))
+                if limit:
+                    self.page_sizes.record_page(
+                        endpoint,
+                        limit=limit,
+                        records=len(page_data),
+                        size_bytes=len(response.content),
+                        latency=latency,
+                        total=total,
+                    )
         return response_data
@@ -0,0 +1,199 @@
+"""module containing a circuit breaker for unhealthy ChurchTools servers.
+
+The breaker opens if too many of the recent requests failed.
+Failures are 5xx responses, timeouts, connection errors and 429 responses
+which are received again after waiting for the rate limit.
+While open all requests fail immediately. After open_seconds a limited number
+of probe requests is allowed (half open) - closing the breaker on success
+and opening it again on failure. Only the results of these probes change
+the half open state.
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(requests.ConnectionError):
+    """Raised instead of sending a request while the circuit breaker is open."""
+
+    # see retry.RetryPolicy - repeating would only add load to the server
+    retryable = False
+
+
+@dataclass
+class Permit:
+    """Admission of one request returned by CircuitBreaker.allow_request."""
+
+    probe: bool
+    # number of the half open period the probe belongs to
+    generation: int
+    done: bool = False
+
+
+class CircuitBreaker:
+    """Thread safe circuit breaker which can be shared by multiple sessions."""
+
+    def __init__(
+        self,
+        *,
+        failure_rate: float = 0.5,
+        minimum_requests: int = 10,
+        window_seconds: float = 30.0,
+        open_seconds: float = 30.0,
+        half_open_requests: int = 1,
+    ) -> None:
+        """Prepares a closed breaker.
+
+        Args:
+            failure_rate: share of failed requests within the window
+                which opens the breaker
+            minimum_requests: number of requests within the window
+                required before the failure rate is considered
+            window_seconds: seconds of recent requests considered
+            open_seconds: seconds requests fail immediately before probing
+            half_open_requests: number of concurrent probe requests
+        """
+        self.failure_rate = failure_rate
+        self.minimum_requests = minimum_requests
+        self.window_seconds = window_seconds
+        self.open_seconds = open_seconds
+        self.half_open_requests = half_open_requests
+        self._lock = threading.Lock()
+        self._results: deque[tuple[float, bool]] = deque()
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._probes = 0
+        self._generation = 0
+
+    @property
+    def state(self) -> str:
+        """Current state - open changes to half open after open_seconds.
+
+        Returns:
+            closed, open or half_open
+        """
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self) -> str:
+        """Helper which returns the state - requires lock.
+
+        Returns:
+            closed, open or half_open
+        """
+        if (
+            self._state == OPEN
+            and time.monotonic() - self._opened_at >= self.open_seconds
+        ):
+            self._state = HALF_OPEN
+            self._probes = 0
+            self._generation += 1
+            logger.info("circuit breaker half open - probing server")
+        return self._state
+
+    def allow_request(self) -> Permit | None:
+        """Checks if a request may be sent.
+
+        Each permit must be passed to record or release once the request ended.
+
+        Returns:
+            permit of the request - None while open or if all probe requests
+            are in flight
+        """
+        with self._lock:
+            state = self._current_state()
+            if state == CLOSED:
+                return Permit(probe=False, generation=self._generation)
+            if state == HALF_OPEN and self._probes < self.half_open_requests:
+                self._probes += 1
+                return Permit(probe=True, generation=self._generation)
+            return None
+
+    def record(self, permit: Permit, *, failed: bool) -> None:
+        """Adds the result of an allowed request.
+
+        Args:
+            permit: returned by allow_request for the request
+            failed: if the request failed because of the server
+        """
+        with self._lock:
+            if permit.done:
+                return
+            self._end_probe(permit)
+            now = time.monotonic()
+            if permit.probe:
+                if self._state != HALF_OPEN or permit.generation != self._generation:
+                    return
+                if failed:
+                    self._open(now)
+                else:
+                    logger.info("circuit breaker closed - server recovered")
+                    self._state = CLOSED
+                    self._results.clear()
+                return
+            # the breaker opened since admitting the request
+            if self._state != CLOSED:
+                return
+
+            self._results.append((now, failed))
+            while self._results and self._results[0][0] < now - self.window_seconds:
+                self._results.popleft()
+            failures = sum(1 for _, result in self._results if result)
+            if (
+                len(self._results) >= self.minimum_requests
+                and failures / len(self._results) >= self.failure_rate
+            ):
+                self._open(now)
+
+    def release(self, permit: Permit) -> None:
+        """Ends a request without result e.g. after an unexpected exception.
+
+        Frees the probe slot of a half open breaker - permits which were
+        already recorded are ignored.
+
+        Args:
+            permit: returned by allow_request for the request
+        """
+        with self._lock:
+            self._end_probe(permit)
+
+    def _end_probe(self, permit: Permit) -> None:
+        """Helper which marks a permit as done and frees its probe slot - requires lock.
+
+        Args:
+            permit: returned by allow_request for the request
+        """
+        if permit.done:
+            return
+        permit.done = True
+        if (
+            permit.probe
+            and self._state == HALF_OPEN
+            and permit.generation == self._generation
+        ):
+            self._probes = max(self._probes - 1, 0)
+
+    def _open(self, now: float) -> None:
+        """Helper which opens the breaker - requires lock.
+
+        Args:
+            now: time.monotonic() of the failure
+        """
+        logger.warning(
+            "circuit breaker open - failing requests for %s seconds",
+            self.open_seconds,
+        )
+        self._state = OPEN
+        self._opened_at = now
+        self._results.clear()
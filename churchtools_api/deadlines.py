@@ -0,0 +1,139 @@
+"""module containing time budgets of api calls.
+
+A time budget covers everything done for one public api call including
+connecting, reading, retries and waiting for rate limits.
+Budgets are kept in a context variable - nested calls and requests sent by
+other threads using contextvars.copy_context() share the outer deadline.
+"""
+
+import functools
+import inspect
+import logging
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class Deadline:
+    """Point in time (time.monotonic) at which an operation has to be finished."""
+
+    expires: float
+    budget: float
+    operation: str
+
+    def remaining(self) -> float:
+        """Seconds left until the deadline.
+
+        Returns:
+            remaining seconds - negative if already expired
+        """
+        return self.expires - time.monotonic()
+
+
+class DeadlineExceededError(TimeoutError):
+    """Raised if the time budget of an api call is used up."""
+
+    def __init__(self, deadline: Deadline, detail: str) -> None:
+        """Creates the error message.
+
+        Args:
+            deadline: the deadline which was exceeded
+            detail: what was done when the budget was used up
+        """
+        self.deadline = deadline
+        super().__init__(
+            f"{deadline.operation} exceeded its time budget of "
+            f"{deadline.budget:.1f} s while {detail}"
+        )
+
+
+_current_deadline: ContextVar[Deadline | None] = ContextVar(
+    "current_deadline", default=None
+)
+
+
+def current_deadline() -> Deadline | None:
+    """Deadline of the current context.
+
+    Returns:
+        deadline or None if unlimited
+    """
+    return _current_deadline.get()
+
+
+@contextmanager
+def time_budget(seconds: float | None, operation: str = "call") -> Iterator[Deadline]:
+    """Context manager which limits the time of all requests within.
+
+    A budget within an existing budget can only shorten the deadline.
+
+    Args:
+        seconds: time budget - None keeps the current deadline
+        operation: name used in error messages e.g. get_persons
+
+    Yields:
+        the active deadline - None if unlimited
+    """
+    current = _current_deadline.get()
+    if seconds is None or (current and current.remaining() <= seconds):
+        yield current
+        return
+    deadline = Deadline(
+        expires=time.monotonic() + seconds, budget=seconds, operation=operation
+    )
+    token = _current_deadline.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _current_deadline.reset(token)
+
+
+def with_time_budget(function: Callable) -> Callable:
+    """Decorator which applies a time budget to each call of an api method.
+
+    The budget can be passed as keyword time_budget (seconds) and
+    defaults to the time_budget of the session of the api object.
+
+    Args:
+        function: method of a ChurchToolsApi part
+
+    Returns:
+        wrapped method
+    """
+
+    @functools.wraps(function)
+    def wrapper(self, *args: list, **kwargs: dict):  # noqa: ANN001, ANN202
+        seconds = kwargs.pop("time_budget", None)
+        if seconds is None:
+            seconds = getattr(getattr(self, "session", None), "time_budget", None)
+        if seconds is None:
+            return function(self, *args, **kwargs)
+        with time_budget(seconds, operation=function.__name__):
+            return function(self, *args, **kwargs)
+
+    wrapper.__budgeted__ = True
+    return wrapper
+
+
+def budget_public_methods(cls: type) -> None:
+    """Wraps all public methods defined on a class using with_time_budget.
+
+    Generator methods are not wrapped because they run after the call returned.
+
+    Args:
+        cls: the class to modify
+    """
+    for name, attribute in list(cls.__dict__.items()):
+        if (
+            name.startswith("_")
+            or not inspect.isfunction(attribute)
+            or inspect.isgeneratorfunction(attribute)
+            or getattr(attribute, "__budgeted__", False)
+        ):
+            continue
+        setattr(cls, name, with_time_budget(attribute))
@@ -1,6 +1,5 @@
 """module containing parts used for events handling."""
 
-import json
 import logging
 from datetime import datetime, timedelta
 from pathlib import Path
@@ -9,7 +8,11 @@ import docx
 import requests
 from tzlocal import get_localzone
 
-from churchtools_api.churchtools_api_abstract import ChurchToolsApiAbstract
+from churchtools_api.churchtools_api_abstract import (
+    ChurchToolsApiAbstract,
+    cached_reference_data,
+    decode_json,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -23,7 +26,7 @@ class ChurchToolsApiEvents(ChurchToolsApiAbstract):
 
     def __init__(self) -> None:
         """Inherited initialization."""
-        super()
+        super().__init__()
 
     def get_events(self, **kwargs: dict) -> list[dict]:
         """Method to get all the events from given timespan or only the next event.
@@ -46,6 +49,10 @@ class ChurchToolsApiEvents(ChurchToolsApiAbstract):
                 be retrieved insert 'None', only applies if direction is specified
             include (str): if Parameter is set to 'eventServices', the services of
                 the event will be included
+            fields (list[str]): only keep these fields of each event
+                nested fields are separated by dots e.g. "calendar.domainIdentifier"
+            page_consumer (callable): receives the events of each page
+                instead of returning them - see churchtools_api.export
 
         Returns:
             list of events
@@ -53,7 +60,7 @@ class ChurchToolsApiEvents(ChurchToolsApiAbstract):
         url = self.domain + "/api/events"
 
         headers = {"accept": "application/json"}
-        params = {"limit": 50}  # increases default pagination size
+        params = {"limit": self._get_page_size(url)}  # configured in self.page_sizes
 
         if "eventId" in kwargs:
             url += "/{}".format(kwargs["eventId"])
@@ -65,10 +72,12 @@ class ChurchToolsApiEvents(ChurchToolsApiAbstract):
         response = self.session.get(url=url, headers=headers, params=params)
 
         if response.status_code == requests.codes.ok:
-            response_content = json.loads(response.content)
+            response_content = decode_json(response.content)
             response_data = self.combine_paginated_response_data(
                 response_content,
                 url=url,
+                fields=kwargs.get("fields"),
+                page_consumer=kwargs.get("page_consumer"),
                 headers=headers,
                 params=params,
             )
@@ -214,7 +223,7 @@ class ChurchToolsApiEvents(ChurchToolsApiAbstract):
                 "%s Something went wrong updating event %s: %s",
                 response.status_code,
                 event_id,
-                json.loads(response.content).get("errors"),
+                decode_json(response.content).get("errors"),
             )
             return False
 
@@ -306,7 +315,7 @@ class ChurchToolsApiEvents(ChurchToolsApiAbstract):
         response = self.session.post(url=url, headers=headers, params=params, data=data)
 
         if response.status_code == requests.codes.ok:
-            response_content = json.loads(response.content)
+            response_content = decode_json(response.content)
             response_success = response_content["status"] == "success"
 
             number_match = (
@@ -342,8 +351,8 @@ class ChurchToolsApiEvents(ChurchToolsApiAbstract):
         response = self.session.get(url=url, headers=headers)
 
         if response.status_code == requests.codes.ok:
-            response_content = json.loads(response.content)
-            response_data = response_content["data"].copy()
+            response_content = decode_json(response.content)
+            response_data = response_content["data"]
             logger.debug("Agenda load successful %s items", len(response_content))
 
             return response_data
@@ -416,8 +425,8 @@ class ChurchToolsApiEvents(ChurchToolsApiAbstract):
         )
         result_ok = False
         if response.status_code == requests.codes.ok:
-            response_content = json.loads(response.content)
-            agenda_data = response_content["data"].copy()
+            response_content = decode_json(response.content)
+            agenda_data = response_content["data"]
             logger.debug("Agenda package found %s", response_content)
             result_ok = self.file_download_from_url(
                 "{}/{}".format(self.domain, agenda_data["url"]),
@@ -577,6 +586,7 @@ class ChurchToolsApiEvents(ChurchToolsApiAbstract):
             service for service in eventServices if service["serviceId"] == serviceId
         ]
 
+    @cached_reference_data
     def get_event_masterdata(
         self, **kwargs: dict
     ) -> list | list[list] | dict | list[dict]:
@@ -603,14 +613,13 @@ class ChurchToolsApiEvents(ChurchToolsApiAbstract):
         response = self.session.get(url=url, headers=headers)
 
         if response.status_code == requests.codes.ok:
-            response_content = json.loads(response.content)
-            response_data = response_content["data"].copy()
+            response_content = decode_json(response.content)
+            response_data = response_content["data"]
 
             if "resultClass" in kwargs:
                 response_data = response_data[kwargs["resultClass"]]
                 if kwargs.get("returnAsDict"):
-                    response_data2 = response_data.copy()
-                    response_data = {item["id"]: item for item in response_data2}
+                    response_data = {item["id"]: item for item in response_data}
             logger.debug("Event Masterdata load successful len=%s", len(response_data))
 
             return response_data
@@ -0,0 +1,387 @@
+"""module containing compact columnar exports of entity lists.
+
+Paginated results are streamed page by page into typed array backed columns
+instead of keeping lists of dicts. Strings are dictionary encoded which keeps
+repeated values like status or last names only once.
+Tables can be written as CSV or as Parquet if the optional pyarrow is installed.
+"""
+
+import csv
+import logging
+import math
+from array import array
+from collections.abc import Callable, Iterator
+from datetime import UTC, date, datetime
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from churchtools_api.recurrence import LENGTH_OF_DATE_WITH_HYPHEN, parse_ct_date
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # optional dependency - pip install churchtools-api[export]
+    pa = None
+
+if TYPE_CHECKING:
+    from churchtools_api.churchtools_api import ChurchToolsApi
+
+logger = logging.getLogger(__name__)
+
+# used for missing values of int, date and datetime columns
+NULL_INT = -(2**63)
+
+PERSON_COLUMNS = {
+    "id": "int",
+    "firstName": "str",
+    "lastName": "str",
+    "email": "str",
+    "sexId": "int",
+    "birthday": "date",
+    "campusId": "int",
+    "statusId": "int",
+}
+EVENT_COLUMNS = {
+    "id": "int",
+    "name": "str",
+    "startDate": "datetime",
+    "endDate": "datetime",
+    "isCanceled": "bool",
+    "calendar.domainIdentifier": "str",
+    "appointmentId": "int",
+}
+BOOKING_COLUMNS = {
+    "base.id": "int",
+    "base.caption": "str",
+    "base.appointmentId": "int",
+    "base.resource.id": "int",
+    "base.statusId": "int",
+    "calculated.startDate": "datetime",
+    "calculated.endDate": "datetime",
+}
+GROUP_MEMBER_COLUMNS = {
+    "personId": "int",
+    "groupId": "int",
+    "groupTypeRoleId": "int",
+    "groupMemberStatus": "str",
+    "memberStartDate": "date",
+    "memberEndDate": "date",
+}
+
+
+class Column:
+    """Typed column backed by an array.
+
+    Supported types are int, float, bool, str, date and datetime.
+    Dates are stored as ordinal days and datetimes as UTC seconds since epoch.
+    """
+
+    def __init__(self, column_type: str) -> None:
+        """Prepares an empty column.
+
+        Args:
+            column_type: one of int, float, bool, str, date or datetime
+
+        Raises:
+            ValueError: for unknown column types
+        """
+        self.column_type = column_type
+        if column_type in {"int", "date", "datetime"}:
+            self.data = array("q")
+        elif column_type == "float":
+            self.data = array("d")
+        elif column_type == "bool":
+            self.data = array("b")
+        elif column_type == "str":
+            self.data = array("I")
+            self.dictionary = [None]
+            self._codes = {None: 0}
+        else:
+            msg = f"unknown column type {column_type}"
+            raise ValueError(msg)
+
+    def __len__(self) -> int:
+        """Number of values.
+
+        Returns:
+            number of values
+        """
+        return len(self.data)
+
+    def append(self, value: object) -> None:
+        """Adds one value converting it to the column type.
+
+        Args:
+            value: decoded JSON value or None
+        """
+        self.data.append(self._encode(value))
+
+    def _encode(self, value: object) -> int | float:  # noqa: PLR0911
+        """Helper which converts a value into its array representation.
+
+        Args:
+            value: decoded JSON value or None
+
+        Returns:
+            value stored in the array
+        """
+        if self.column_type == "str":
+            if value is not None and not isinstance(value, str):
+                value = str(value)
+            code = self._codes.get(value)
+            if code is None:
+                code = self._codes[value] = len(self.dictionary)
+                self.dictionary.append(value)
+            return code
+        if value is None or value == "":
+            return {"float": math.nan, "bool": -1}.get(self.column_type, NULL_INT)
+        if self.column_type == "int":
+            return int(value)
+        if self.column_type == "float":
+            return float(value)
+        if self.column_type == "bool":
+            return int(bool(value))
+        if self.column_type == "date":
+            return date.fromisoformat(value[:LENGTH_OF_DATE_WITH_HYPHEN]).toordinal()
+        return int(parse_ct_date(value, UTC).timestamp())
+
+    def __getitem__(self, index: int) -> object:  # noqa: PLR0911
+        """Decoded value at a position.
+
+        Args:
+            index: position in the column
+
+        Returns:
+            python value or None
+        """
+        value = self.data[index]
+        if self.column_type == "str":
+            return self.dictionary[value]
+        if self.column_type == "float":
+            return None if math.isnan(value) else value
+        if self.column_type == "bool":
+            return None if value < 0 else bool(value)
+        if value == NULL_INT:
+            return None
+        if self.column_type == "date":
+            return date.fromordinal(value)
+        if self.column_type == "datetime":
+            return datetime.fromtimestamp(value, UTC)
+        return value
+
+    def values(self) -> list:
+        """All decoded values.
+
+        Returns:
+            list of python values
+        """
+        return [self[index] for index in range(len(self))]
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate memory used by the stored values.
+
+        Returns:
+            number of bytes
+        """
+        size = self.data.itemsize * len(self.data)
+        if self.column_type == "str":
+            size += sum(len(value) for value in self.dictionary if value)
+        return size
+
+
+class ColumnarTable:
+    """Table of typed columns filled page by page."""
+
+    def __init__(self, columns: dict[str, str]) -> None:
+        """Prepares an empty table.
+
+        Args:
+            columns: column type by field name
+                nested fields are separated by dots e.g. {"base.id": "int"}
+        """
+        self.columns = {
+            name: Column(column_type) for name, column_type in columns.items()
+        }
+        self._paths = {name: name.split(".") for name in columns}
+
+    def __len__(self) -> int:
+        """Number of rows.
+
+        Returns:
+            number of rows
+        """
+        return len(next(iter(self.columns.values()))) if self.columns else 0
+
+    def append(self, items: list[dict]) -> None:
+        """Adds items as rows - can be used as page_consumer of getters.
+
+        Args:
+            items: decoded items - missing fields are stored as None
+        """
+        for item in items:
+            for name, column in self.columns.items():
+                value = item
+                for key in self._paths[name]:
+                    value = value.get(key) if isinstance(value, dict) else None
+                column.append(value)
+
+    def rows(self) -> Iterator[dict]:
+        """Generates rows as dicts with decoded values.
+
+        Yields:
+            one dict by row keyed by column name
+        """
+        for index in range(len(self)):
+            yield {name: column[index] for name, column in self.columns.items()}
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate memory used by all columns.
+
+        Returns:
+            number of bytes
+        """
+        return sum(column.nbytes for column in self.columns.values())
+
+    def to_csv(self, path: Path | str) -> None:
+        """Writes the table as CSV using ISO formats for dates.
+
+        Args:
+            path: target file
+        """
+        with Path(path).open("w", encoding="utf-8", newline="") as csv_file:
+            writer = csv.writer(csv_file)
+            writer.writerow(self.columns)
+            for row in self.rows():
+                writer.writerow(
+                    [
+                        value.isoformat() if isinstance(value, date) else value
+                        for value in row.values()
+                    ]
+                )
+
+    def to_parquet(self, path: Path | str) -> None:
+        """Writes the table as Parquet file with typed columns.
+
+        Args:
+            path: target file
+
+        Raises:
+            ImportError: if pyarrow is not installed
+        """
+        if pa is None:
+            msg = "to_parquet requires pyarrow - pip install churchtools-api[export]"
+            raise ImportError(msg)
+        arrow_types = {
+            "int": pa.int64(),
+            "float": pa.float64(),
+            "bool": pa.bool_(),
+            "str": pa.string(),
+            "date": pa.date32(),
+            "datetime": pa.timestamp("s", tz="UTC"),
+        }
+        table = pa.table(
+            {
+                name: pa.array(column.values(), type=arrow_types[column.column_type])
+                for name, column in self.columns.items()
+            }
+        )
+        pq.write_table(table, path)
+
+
+def export_table(
+    getter: Callable[..., list | None], columns: dict[str, str], **kwargs: dict
+) -> ColumnarTable | None:
+    """Streams all pages of a getter into a columnar table.
+
+    Only the fields of the columns are kept while decoding each page.
+
+    Args:
+        getter: a getter supporting page_consumer e.g. api.get_persons
+        columns: column type by field name
+        kwargs: passthrough to the getter e.g. from_ and to_
+
+    Returns:
+        filled table or None if the getter failed
+            instead of a table missing some or all rows
+    """
+    table = ColumnarTable(columns)
+    if getter(fields=list(columns), page_consumer=table.append, **kwargs) is None:
+        logger.warning("export using %s failed", getattr(getter, "__name__", getter))
+        return None
+    logger.debug("exported %s rows using %s bytes", len(table), table.nbytes)
+    return table
+
+
+def export_persons(
+    api: "ChurchToolsApi", columns: dict[str, str] = PERSON_COLUMNS, **kwargs: dict
+) -> ColumnarTable | None:
+    """Exports persons as columnar table.
+
+    Args:
+        api: logged in api
+        columns: column type by field name. Defaults to PERSON_COLUMNS
+        kwargs: passthrough to get_persons e.g. ids
+
+    Returns:
+        filled table or None if a request failed
+    """
+    return export_table(api.get_persons, columns, **kwargs)
+
+
+def export_events(
+    api: "ChurchToolsApi", columns: dict[str, str] = EVENT_COLUMNS, **kwargs: dict
+) -> ColumnarTable | None:
+    """Exports events as columnar table.
+
+    Args:
+        api: logged in api
+        columns: column type by field name. Defaults to EVENT_COLUMNS
+        kwargs: passthrough to get_events e.g. from_ and to_
+
+    Returns:
+        filled table or None if a request failed
+    """
+    return export_table(api.get_events, columns, **kwargs)
+
+
+def export_bookings(
+    api: "ChurchToolsApi", columns: dict[str, str] = BOOKING_COLUMNS, **kwargs: dict
+) -> ColumnarTable | None:
+    """Exports resource bookings as columnar table.
+
+    Args:
+        api: logged in api
+        columns: column type by field name. Defaults to BOOKING_COLUMNS
+        kwargs: passthrough to get_bookings e.g. resource_ids
+
+    Returns:
+        filled table or None if a request failed
+    """
+    return export_table(api.get_bookings, columns, **kwargs)
+
+
+def export_groups_members(
+    api: "ChurchToolsApi",
+    columns: dict[str, str] = GROUP_MEMBER_COLUMNS,
+    **kwargs: dict,
+) -> ColumnarTable | None:
+    """Exports person to group assignments as columnar table.
+
+    get_groups_members does not support fields - full items of one page are
+    decoded but only the columns are kept.
+
+    Args:
+        api: logged in api
+        columns: column type by field name. Defaults to GROUP_MEMBER_COLUMNS
+        kwargs: passthrough to get_groups_members e.g. group_ids
+
+    Returns:
+        filled table or None if a request failed
+    """
+    table = ColumnarTable(columns)
+    if api.get_groups_members(page_consumer=table.append, **kwargs) is None:
+        logger.warning("export of group members failed")
+        return None
+    return table
@@ -1,15 +1,31 @@
 """module containing parts used for file handling."""
 
+import hashlib
 import json
 import logging
+import re
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
 from pathlib import Path
 
 import requests
 
-from churchtools_api.churchtools_api_abstract import ChurchToolsApiAbstract
+from churchtools_api.churchtools_api_abstract import (
+    ChurchToolsApiAbstract,
+    decode_json,
+)
+from churchtools_api.multipart import StreamingMultipartEncoder
 
 logger = logging.getLogger(__name__)
 
+DOWNLOAD_CHUNK_SIZE = 8192
+
+# Content-Range of a 206 response e.g. "bytes 100-199/200"
+PARTIAL_CONTENT_RANGE = re.compile(r"bytes (\d+)-\d+/(?:\d+|\*)")
+# Content-Range of a 416 response containing the complete size e.g. "bytes */200"
+UNSATISFIED_CONTENT_RANGE = re.compile(r"bytes \*/(\d+)")
+
 
 class ChurchToolsApiFiles(ChurchToolsApiAbstract):
     """Part definition of ChurchToolsApi which focuses on files.
@@ -20,7 +36,7 @@ class ChurchToolsApiFiles(ChurchToolsApiAbstract):
 
     def __init__(self) -> None:
         """Inherited initialization."""
-        super()
+        super().__init__()
 
     def file_upload(  # noqa: PLR0913
         self,
@@ -31,6 +47,7 @@ class ChurchToolsApiFiles(ChurchToolsApiAbstract):
         image_options: dict | None = None,
         *,
         overwrite: bool = False,
+        progress: Callable[[int, int], None] | None = None,
     ) -> bool:
         """Helper function to upload an attachment to any module of ChurchTools.
 
@@ -47,70 +64,255 @@ class ChurchToolsApiFiles(ChurchToolsApiAbstract):
             it's content instead of creating a copy
             image_options: in case of an image additional params can be set as dict
                 see default value in code or API documentation for sample
+            progress: optional callback called with (bytes_sent, total_bytes)
+                while the file is streamed to the server
 
         Returns:
             if successful.
         """
-        if isinstance(source_filepath, Path) is not Path:
-            source_filepath = Path(source_filepath)
-
-        with source_filepath.open("rb") as source_file:
-            url = f"{self.domain}/api/files/{domain_type}/{domain_identifier}"
-
-            if overwrite:
-                logger.debug("deleting old file %s before new upload", source_file)
-                delete_file_name = (
-                    source_file.name.split("/")[-1]
-                    if custom_file_name is None
-                    else custom_file_name
-                )
-                self.file_delete(domain_type, domain_identifier, delete_file_name)
+        source_filepath = Path(source_filepath)
+        file_name = (
+            source_filepath.name if custom_file_name is None else custom_file_name
+        )
 
-            # add files as files form data with dict using 'files[]' as key and
-            # (tuple of filename and fileobject)
-            if custom_file_name is None:
-                files = {"files[]": (source_file.name.split("/")[-1], source_file)}
-            elif "/" in custom_file_name:
-                logger.warning(
-                    "/ in file name (%s) will fail upload!", custom_file_name
-                )
-                files = {}
-            else:
-                files = {"files[]": (custom_file_name, source_file)}
+        if "/" in file_name:
+            logger.warning("/ in file name (%s) will fail upload!", file_name)
+            return False
 
-            response = self.session.post(url=url, files=files)
+        if overwrite:
+            logger.debug("deleting old file %s before new upload", file_name)
+            self.file_delete(domain_type, domain_identifier, file_name)
 
-        """
-        # Issues with HEADERS in Request module when using non standard 'files[]'
-        # key in POST Request
-        # Workaround for ChurchTools - generate session with /api/whoami
-        # GET request and reuse it
-        # Requests module usually automatically completes required header
-        # Params e.g. Content-Type ...
-        # in case manual header e.g. for AUTH is used, headers don't auto complete
-        # and server rejects messsages or data is ommited
-        # Error Code 500 is also missing in API documentation
+        file_data = self._post_file(
+            source_filepath=source_filepath,
+            domain_type=domain_type,
+            domain_identifier=domain_identifier,
+            file_name=file_name,
+            progress=progress,
+        )
+        if file_data is None:
+            return False
+
+        if image_options:
+            self.set_image_options(
+                image_id=file_data["id"], image_options=image_options
+            )
+        return True
+
+    def _post_file(
+        self,
+        source_filepath: Path,
+        domain_type: str,
+        domain_identifier: int,
+        file_name: str,
+        progress: Callable[[int, int], None] | None = None,
+    ) -> dict | None:
+        """Helper which streams one file to ChurchTools.
 
-        headers = {'Authorization': 'Login GEHEIM'}
-        response_test = requests.post(url=url, headers=headers, files=files)
-        #> this fails !
+        The file is read in chunks while sending instead of loading it into memory.
+
+        Params:
+            source_filepath: file to be uploaded
+            domain_type: The ct_domain type see file_upload
+            domain_identifier: ID of the object in ChurchTools
+            file_name: name of the file in ChurchTools
+            progress: optional callback called with (bytes_sent, total_bytes)
+
+        Returns:
+            dict of the uploaded file including id or None if not successful
         """
+        url = f"{self.domain}/api/files/{domain_type}/{domain_identifier}"
+
+        # files are streamed as 'files[]' form data through the logged in session
+        # Requests module does not complete Content-Type and other header params
+        # if the session is not reused e.g. for manual AUTH headers
+        # and server rejects messsages or data is ommited
+        encoder = StreamingMultipartEncoder(
+            [("files[]", file_name, source_filepath)], progress=progress
+        )
+        headers = {"Content-Type": encoder.content_type}
+        response = self.session.post(url=url, data=encoder, headers=headers)
 
         if response.status_code != requests.codes.ok:
             logger.warning(response.content.decode())
-            return False
+            return None
         try:
-            response_content = json.loads(response.content)
-            file_id = response_content["data"][0]["id"]
-            logger.debug("Upload successful len=%s", response_content)
-
-            if image_options:
-                self.set_image_options(image_id=file_id, image_options=image_options)
+            response_content = decode_json(response.content)
+            file_data = response_content["data"][0]
         except (json.JSONDecodeError, TypeError, UnicodeDecodeError):
             logger.warning(response.content.decode())
-            return False
+            return None
         else:
-            return True
+            logger.debug("Upload successful len=%s", response_content)
+            return file_data
+
+    def file_upload_bulk(
+        self,
+        uploads: list[dict],
+        manifest_path: str | Path,
+        *,
+        max_workers: int = 4,
+    ) -> list[bool]:
+        """Uploads many files skipping those which did not change since last run.
+
+        A local manifest stores the sha256 content hash and file id
+        for each domain_type, domain_identifier and file name.
+        Unchanged files are skipped without any request.
+        Changed files replace the existing file with the same name.
+        Old files are deleted by the id from the manifest if known,
+        otherwise the files of each object are listed only once.
+
+        Params:
+            uploads: list of dicts with the keys
+                source_filepath: local file to be uploaded
+                domain_type: The ct_domain type see file_upload
+                domain_identifier: ID of the object in ChurchTools
+                custom_file_name: optional file name in ChurchTools
+            manifest_path: json file used to remember uploaded content
+                will be created if not exists
+            max_workers: max number of concurrent uploads
+
+        Returns:
+            list of success states in the same order as uploads
+                unchanged files are considered successful
+        """
+        manifest_path = Path(manifest_path)
+        manifest = (
+            json.loads(manifest_path.read_text(encoding="utf-8"))
+            if manifest_path.exists()
+            else {}
+        )
+
+        pending = {}
+        for index, upload in enumerate(uploads):
+            source_filepath = Path(upload["source_filepath"])
+            file_name = upload.get("custom_file_name") or source_filepath.name
+            key = f"{upload['domain_type']}/{upload['domain_identifier']}/{file_name}"
+            with source_filepath.open("rb") as source_file:
+                sha256 = hashlib.file_digest(source_file, "sha256").hexdigest()
+            if manifest.get(key, {}).get("sha256") == sha256:
+                continue
+            pending[index] = (key, source_filepath, file_name, sha256)
+
+        existing_file_ids = self._get_existing_file_ids(
+            uploads=uploads, pending=pending, manifest=manifest
+        )
+
+        results = [True] * len(uploads)
+        # uploads which finished are kept in the manifest even if others fail
+        try:
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                futures = {
+                    index: executor.submit(
+                        copy_context().run,
+                        self._replace_file,
+                        source_filepath=source_filepath,
+                        domain_type=uploads[index]["domain_type"],
+                        domain_identifier=uploads[index]["domain_identifier"],
+                        file_name=file_name,
+                        existing_file_ids=existing_file_ids.get(key, []),
+                    )
+                    for index, (key, source_filepath, file_name, _) in pending.items()
+                }
+                for index, future in futures.items():
+                    key, source_filepath, _, sha256 = pending[index]
+                    try:
+                        file_data = future.result()
+                    except Exception as exception:  # noqa: BLE001
+                        logger.warning(
+                            "upload of %s failed: %s", source_filepath, exception
+                        )
+                        file_data = None
+                    if file_data is None:
+                        results[index] = False
+                        manifest.pop(key, None)
+                    else:
+                        manifest[key] = {"sha256": sha256, "file_id": file_data["id"]}
+        finally:
+            manifest_path.parent.mkdir(parents=True, exist_ok=True)
+            manifest_path.write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+
+        logger.info(
+            "Bulk upload finished - %s unchanged, %s uploaded, %s failed",
+            len(uploads) - len(pending),
+            sum(results) - (len(uploads) - len(pending)),
+            len(results) - sum(results),
+        )
+        return results
+
+    def _get_existing_file_ids(
+        self, uploads: list[dict], pending: dict, manifest: dict
+    ) -> dict[str, list[int]]:
+        """Helper which looks up ids of files which will be replaced by a bulk upload.
+
+        Params:
+            uploads: list of uploads as described in file_upload_bulk
+            pending: uploads which need to be sent by index
+                with a tuple of manifest key, source path, file name and hash
+            manifest: the current manifest content
+
+        Returns:
+            dict of manifest key with list of file ids which should be deleted
+        """
+        existing_file_ids = {}
+        listed_objects = {}
+        for index, (key, _, file_name, _) in pending.items():
+            if file_id := manifest.get(key, {}).get("file_id"):
+                existing_file_ids[key] = [file_id]
+                continue
+            domain = (
+                uploads[index]["domain_type"],
+                uploads[index]["domain_identifier"],
+            )
+            if domain not in listed_objects:
+                listed_objects[domain] = self.get_files(*domain) or []
+            existing_file_ids[key] = [
+                file["id"]
+                for file in listed_objects[domain]
+                if file["name"] == file_name
+            ]
+        logger.debug("listed files of %s objects for bulk upload", len(listed_objects))
+        return existing_file_ids
+
+    def _replace_file(
+        self,
+        source_filepath: Path,
+        domain_type: str,
+        domain_identifier: int,
+        file_name: str,
+        existing_file_ids: list[int],
+    ) -> dict | None:
+        """Helper which deletes files by id before uploading the new content.
+
+        Params:
+            source_filepath: file to be uploaded
+            domain_type: The ct_domain type see file_upload
+            domain_identifier: ID of the object in ChurchTools
+            file_name: name of the file in ChurchTools
+            existing_file_ids: ids of the files which should be replaced
+
+        Returns:
+            dict of the uploaded file including id or None if not successful
+        """
+        for file_id in existing_file_ids:
+            response = self.session.delete(url=f"{self.domain}/api/files/{file_id}")
+            if response.status_code not in (
+                requests.codes.no_content,
+                requests.codes.not_found,
+            ):
+                logger.warning(
+                    "%s Something went wrong deleting file %s: %s",
+                    response.status_code,
+                    file_id,
+                    response.content,
+                )
+                return None
+        return self._post_file(
+            source_filepath=source_filepath,
+            domain_type=domain_type,
+            domain_identifier=domain_identifier,
+            file_name=file_name,
+        )
 
     def file_delete(
         self,
@@ -139,7 +341,7 @@ class ChurchToolsApiFiles(ChurchToolsApiAbstract):
 
         if filename_for_selective_delete is not None:
             response = self.session.get(url=url)
-            files = json.loads(response.content)["data"]
+            files = decode_json(response.content)["data"]
             selective_file_ids = [
                 item["id"]
                 for item in files
@@ -156,6 +358,41 @@ class ChurchToolsApiFiles(ChurchToolsApiAbstract):
         return response.status_code == requests.codes.no_content
         # success code for delete action upload
 
+    def get_files(self, domain_type: str, domain_identifier: int) -> list[dict]:
+        """Lists all files attached to one object of ChurchTools.
+
+        The result can be used to prepare file_download_bulk
+
+        Params:
+            domain_type:  The ct_domain type, currently supported are
+                'avatar', 'groupimage', 'logo', 'attatchments',
+                'html_template', 'service', 'song_arrangement',
+                'importtable', 'person', 'familyavatar', 'wiki_.?'.
+            domain_identifier: ID of the object in ChurchTools
+
+        Returns:
+            list of file dicts including name and fileUrl
+        """
+        url = f"{self.domain}/api/files/{domain_type}/{domain_identifier}"
+        headers = {"accept": "application/json"}
+        response = self.session.get(url=url, headers=headers)
+
+        if response.status_code == requests.codes.ok:
+            response_content = decode_json(response.content)
+            logger.debug(
+                "Files of %s %s load successful len=%s",
+                domain_type,
+                domain_identifier,
+                len(response_content["data"]),
+            )
+            return response_content["data"]
+        logger.warning(
+            "%s Something went wrong fetching files: %s",
+            response.status_code,
+            response.content,
+        )
+        return None
+
     def file_download(
         self,
         filename: str,
@@ -191,8 +428,8 @@ class ChurchToolsApiFiles(ChurchToolsApiAbstract):
         response = self.session.get(url=url)
 
         if response.status_code == requests.codes.ok:
-            response_content = json.loads(response.content)
-            arrangement_files = response_content["data"].copy()
+            response_content = decode_json(response.content)
+            arrangement_files = response_content["data"]
             logger.debug(
                 "SongArrangement-Files load successful len=%s",
                 len(response_content),
@@ -222,39 +459,229 @@ class ChurchToolsApiFiles(ChurchToolsApiAbstract):
         )
         return None
 
-    def file_download_from_url(self, file_url: str, target_path: str) -> bool:
+    def file_download_from_url(  # noqa: PLR0913
+        self,
+        file_url: str,
+        target_path: str,
+        *,
+        chunk_size: int = DOWNLOAD_CHUNK_SIZE,
+        resume: bool = False,
+        expected_size: int | None = None,
+        expected_sha256: str | None = None,
+    ) -> bool:
         """Retrieves file from ChurchTools for specific file_url from churchtools.
 
         This function is used by file_download(...).
+        The download is staged into a .part file next to the target
+        which is only renamed once the download is complete and verified.
 
         Params:
             file_url: Example file_url=https://lgv-oe.church.tools/?q=public/filedownload&id=631&filename=738db42141baec592aa2f523169af772fd02c1d21f5acaaf0601678962d06a00
                 Pay Attention: this file-url consists of a specific / random
                 filename which was created by churchtools
             target_path: directory to drop the download into - must exist before use!
+            chunk_size: number of bytes written at once. Defaults to 8 KB
+            resume: continue an existing .part file using a HTTP Range request
+                falls back to a full download if the server ignores the range,
+                answers with another range or the .part file can not be
+                confirmed as complete by the server or expected_size/sha256
+            expected_size: number of bytes the file must have if specified
+            expected_sha256: hex sha256 digest the file must have if specified
 
         Returns:
             if successful.
         """
+        target_path = Path(target_path)
+        part_path = target_path.with_name(target_path.name + ".part")
+
+        existing_size = part_path.stat().st_size if part_path.exists() else 0
+        offset = existing_size if resume else 0
+        if offset:
+            logger.debug("resuming %s from byte %s", file_url, offset)
+
+        downloaded = self._download_part(
+            file_url, part_path, chunk_size=chunk_size, offset=offset
+        )
+        if downloaded is None:
+            has_checks = expected_size is not None or expected_sha256 is not None
+            if has_checks and self._verify_download(
+                part_path, expected_size=expected_size, expected_sha256=expected_sha256
+            ):
+                logger.debug("%s was already downloaded completely", file_url)
+                downloaded = True
+            else:
+                logger.info("%s can not be resumed - downloading again", file_url)
+                part_path.unlink(missing_ok=True)
+                downloaded = self._download_part(
+                    file_url, part_path, chunk_size=chunk_size, offset=0
+                )
+        if not downloaded:
+            return False
+
+        if not self._verify_download(
+            part_path, expected_size=expected_size, expected_sha256=expected_sha256
+        ):
+            part_path.unlink(missing_ok=True)
+            return False
+
+        part_path.replace(target_path)
+        logger.debug("Download of %s successful", file_url)
+        return True
+
+    def _download_part(
+        self, file_url: str, part_path: Path, *, chunk_size: int, offset: int
+    ) -> bool | None:
+        """Helper which writes the response of one download request to a .part file.
+
+        Args:
+            file_url: url of the file
+            part_path: the .part file
+            chunk_size: number of bytes written at once
+            offset: bytes of the .part file kept using a HTTP Range request
+                0 requests the whole file
+
+        Returns:
+            True if the .part file is complete, False on failure
+            None if the range was not resumed and the .part file is unchanged
+        """
+        headers = {"Range": f"bytes={offset}-"} if offset else {}
         # NOTE the stream=True parameter below
+        with self.session.get(url=file_url, headers=headers, stream=True) as response:
+            content_range = response.headers.get("Content-Range", "")
+            if response.status_code == requests.codes.requested_range_not_satisfiable:
+                match = UNSATISFIED_CONTENT_RANGE.fullmatch(content_range)
+                if offset and match and int(match[1]) == offset:
+                    logger.debug("%s was already downloaded completely", file_url)
+                    return True
+                logger.debug("%s answered range %s with 416", file_url, offset)
+                return None
+            if response.status_code == requests.codes.partial_content:
+                match = PARTIAL_CONTENT_RANGE.fullmatch(content_range)
+                if not match or int(match[1]) != offset:
+                    logger.debug(
+                        "%s returned %s instead of byte %s",
+                        file_url,
+                        content_range,
+                        offset,
+                    )
+                    return None
+            elif response.status_code != requests.codes.ok:
+                logger.warning(
+                    "%s Something went wrong during file_download: %s",
+                    response.status_code,
+                    response.content,
+                )
+                return False
 
-        target_path = Path(target_path)
-        with self.session.get(url=file_url, stream=True) as response:
-            if response.status_code == requests.codes.ok:
-                with target_path.open("wb") as f:
-                    for chunk in response.iter_content(chunk_size=8192):
-                        # If you have chunk encoded response uncomment if
-                        # and set chunk_size parameter to None.
-                        # if chunk:
-                        f.write(chunk)
-                logger.debug("Download of %s successful", file_url)
-                return True
+            mode = (
+                "ab"
+                if offset and response.status_code == requests.codes.partial_content
+                else "wb"
+            )
+            with part_path.open(mode) as f:
+                for chunk in response.iter_content(chunk_size=chunk_size):
+                    f.write(chunk)
+        return True
+
+    def _verify_download(
+        self,
+        path: Path,
+        expected_size: int | None = None,
+        expected_sha256: str | None = None,
+    ) -> bool:
+        """Helper which checks size and hash of a downloaded file.
+
+        Args:
+            path: the file to check
+            expected_size: number of bytes the file must have if specified
+            expected_sha256: hex sha256 digest the file must have if specified
+
+        Returns:
+            if the file matches all expectations
+        """
+        if expected_size is not None and path.stat().st_size != expected_size:
             logger.warning(
-                "%s Something went wrong during file_download: %s",
-                response.status_code,
-                response.content,
+                "Download %s has %s bytes instead of %s",
+                path,
+                path.stat().st_size,
+                expected_size,
             )
             return False
+        if expected_sha256 is not None:
+            with path.open("rb") as f:
+                digest = hashlib.file_digest(f, "sha256").hexdigest()
+            if digest != expected_sha256.lower():
+                logger.warning("Download %s has unexpected sha256 %s", path, digest)
+                return False
+        return True
+
+    def file_download_bulk(
+        self,
+        downloads: list[dict],
+        *,
+        max_workers: int = 4,
+        chunk_size: int = DOWNLOAD_CHUNK_SIZE,
+        resume: bool = True,
+    ) -> list[bool]:
+        """Downloads many files concurrently.
+
+        Each download is staged as .part file and can be resumed
+        if the same bulk download is repeated after a failure.
+        Files which already exist and match the expected size are skipped.
+
+        Params:
+            downloads: list of dicts with the keys
+                file_url: url of the file as listed by ChurchTools as fileUrl
+                target_path: local path including filename
+                expected_size: optional number of bytes of the file
+                expected_sha256: optional hex sha256 digest of the file
+            max_workers: max number of concurrent downloads
+            chunk_size: number of bytes written at once
+            resume: continue existing .part files using HTTP Range requests
+
+        Returns:
+            list of success states in the same order as downloads
+        """
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = []
+            for download in downloads:
+                target_path = Path(download["target_path"])
+                target_path.parent.mkdir(parents=True, exist_ok=True)
+                expected_size = download.get("expected_size")
+                if (
+                    expected_size is not None
+                    and target_path.exists()
+                    and self._verify_download(
+                        target_path,
+                        expected_size=expected_size,
+                        expected_sha256=download.get("expected_sha256"),
+                    )
+                ):
+                    logger.debug("skipping existing download %s", target_path)
+                    futures.append(None)
+                    continue
+                futures.append(
+                    executor.submit(
+                        copy_context().run,
+                        self.file_download_from_url,
+                        file_url=download["file_url"],
+                        target_path=target_path,
+                        chunk_size=chunk_size,
+                        resume=resume,
+                        expected_size=expected_size,
+                        expected_sha256=download.get("expected_sha256"),
+                    )
+                )
+            results = [
+                True if future is None else future.result() for future in futures
+            ]
+
+        logger.info(
+            "Bulk download finished %s of %s successful",
+            sum(results),
+            len(results),
+        )
+        return results
 
     def set_image_options(self, image_id: int, image_options: dict | None) -> bool:
         """API endpoint used to PUT image options to an existing image.
@@ -2,13 +2,23 @@
 
 import json
 import logging
+from collections.abc import Callable
 
 import requests
 
-from churchtools_api.churchtools_api_abstract import ChurchToolsApiAbstract
+from churchtools_api.churchtools_api_abstract import (
+    ChurchToolsApiAbstract,
+    cached_reference_data,
+    decode_json,
+)
+from churchtools_api.metrics import normalize_endpoint
+from churchtools_api.planner import FULL_SCAN, ID_FILTER, PER_ID, QueryPlan
 
 logger = logging.getLogger(__name__)
 
+# endpoint template of the groups of one person used by the planner
+PERSON_GROUPS_ENDPOINT = "/api/persons/{id}/groups"
+
 
 class ChurchToolsApiGroups(ChurchToolsApiAbstract):
     """Part definition of ChurchToolsApi which focuses on groups.
@@ -19,13 +29,14 @@ class ChurchToolsApiGroups(ChurchToolsApiAbstract):
 
     def __init__(self) -> None:
         """Inherited initialization."""
-        super()
+        super().__init__()
 
     def get_groups(self, **kwargs: dict) -> list[dict]:
         """Gets list of all groups.
 
         Keywords:
             group_id: int: optional filter by group id (only to be used on it's own)
+            fields: list[str]: only keep these fields of each group e.g. ["id", "name"]
             kwargs: keyword arguments passthrough e.g. query
 
         Keywords:
@@ -40,21 +51,24 @@ class ChurchToolsApiGroups(ChurchToolsApiAbstract):
         """
         url = self.domain + "/api/groups"
         params = {}
+        fields = kwargs.pop("fields", None)
         if "group_id" in kwargs:
             url = url + "/{}".format(kwargs["group_id"])
         else:
-            params = {**kwargs}
+            params = {"limit": self._get_page_size(url), **kwargs}
 
         headers = {"accept": "application/json"}
         response = self.session.get(url=url, headers=headers, params=params)
 
         if response.status_code == requests.codes.ok:
-            response_content = json.loads(response.content)
+            response_content = decode_json(response.content)
 
             response_data = self.combine_paginated_response_data(
                 response_content,
                 url=url,
+                fields=fields,
                 headers=headers,
+                params=params,
             )
             return [response_data] if isinstance(response_data, dict) else response_data
         logger.warning(
@@ -74,8 +88,8 @@ class ChurchToolsApiGroups(ChurchToolsApiAbstract):
         headers = {"accept": "application/json"}
         response = self.session.get(url=url, headers=headers)
         if response.status_code == requests.codes.ok:
-            response_content = json.loads(response.content)
-            response_data = response_content["data"].copy()
+            response_content = decode_json(response.content)
+            response_data = response_content["data"]
             logger.debug(
                 "First response of Groups Hierarchies successful len=%s",
                 len(response_content),
@@ -104,8 +118,7 @@ class ChurchToolsApiGroups(ChurchToolsApiAbstract):
         response = self.session.get(url=url, headers=headers)
 
         if response.status_code == requests.codes.ok:
-            response_content = json.loads(response.content)
-            response_content = json.loads(response.content)
+            response_content = decode_json(response.content)
 
             response_data = self.combine_paginated_response_data(
                 response_content,
@@ -171,10 +184,10 @@ class ChurchToolsApiGroups(ChurchToolsApiAbstract):
         response = self.session.post(url=url, headers=headers, data=data)
 
         if response.status_code != requests.codes.created:
-            logger.warning(json.loads(response.content)["translatedMessage"])
+            logger.warning(decode_json(response.content)["translatedMessage"])
             return None
 
-        response_content = json.loads(response.content)
+        response_content = decode_json(response.content)
         response_data = self.combine_paginated_response_data(
             response_content,
             url=url,
@@ -207,8 +220,8 @@ class ChurchToolsApiGroups(ChurchToolsApiAbstract):
         response = self.session.patch(url=url, headers=headers, data=json.dumps(data))
 
         if response.status_code == requests.codes.ok:
-            response_content = json.loads(response.content)
-            response_data = response_content["data"].copy()
+            response_content = decode_json(response.content)
+            response_data = response_content["data"]
             logger.debug(
                 "First response of Update Group successful len=%s",
                 len(response_content),
@@ -243,8 +256,8 @@ class ChurchToolsApiGroups(ChurchToolsApiAbstract):
         response = self.session.patch(url=url, headers=headers, json=data)
 
         if response.status_code == requests.codes.ok:
-            response_content = json.loads(response.content)
-            response_data = response_content["data"].copy()
+            response_content = decode_json(response.content)
+            response_data = response_content["data"]
             logger.debug(
                 "First response of Update Group Member successful len=%s",
                 len(response_content),
@@ -283,6 +296,7 @@ class ChurchToolsApiGroups(ChurchToolsApiAbstract):
         )
         return None
 
+    @cached_reference_data
     def get_grouptypes(self, **kwargs: dict) -> dict:
         """Get list of all grouptypes.
 
@@ -300,8 +314,8 @@ class ChurchToolsApiGroups(ChurchToolsApiAbstract):
         response = self.session.get(url=url, headers=headers)
 
         if response.status_code == requests.codes.ok:
-            response_content = json.loads(response.content)
-            response_data = response_content["data"].copy()
+            response_content = decode_json(response.content)
+            response_data = response_content["data"]
             logger.debug(
                 "First response of Grouptypes successful len=%s",
                 len(response_content),
@@ -331,8 +345,8 @@ class ChurchToolsApiGroups(ChurchToolsApiAbstract):
         response = self.session.get(url=url, headers=headers)
 
         if response.status_code == requests.codes.ok:
-            response_content = json.loads(response.content)
-            response_data = response_content["data"].copy()
+            response_content = decode_json(response.content)
+            response_data = response_content["data"]
             logger.debug(
                 "First response of Group Permissions successful len=%s",
                 len(response_content),
@@ -361,7 +375,7 @@ class ChurchToolsApiGroups(ChurchToolsApiAbstract):
         """
         url = self.domain + f"/api/groups/{group_id}/members"
         headers = {"accept": "application/json"}
-        params = {}
+        params = {"limit": self._get_page_size(url)}
 
         if "role_ids" in kwargs:
             params["role_ids[]"] = kwargs["role_ids"]
@@ -371,12 +385,13 @@ class ChurchToolsApiGroups(ChurchToolsApiAbstract):
         response = self.session.get(url=url, headers=headers, params=params)
 
         if response.status_code == requests.codes.ok:
-            response_content = json.loads(response.content)
+            response_content = decode_json(response.content)
 
             response_data = self.combine_paginated_response_data(
                 response_content,
                 url=url,
                 headers=headers,
+                params=params,
             )
             return [response_data] if isinstance(response_data, dict) else response_data
 
@@ -403,7 +418,7 @@ class ChurchToolsApiGroups(ChurchToolsApiAbstract):
         response = self.session.get(url=url, headers=headers, params=params)
 
         if response.status_code == requests.codes.ok:
-            response_content = json.loads(response.content)
+            response_content = decode_json(response.content)
 
             response_data = self.combine_paginated_response_data(
                 response_content,
@@ -437,7 +452,11 @@ class ChurchToolsApiGroups(ChurchToolsApiAbstract):
 
         Keywords:
             grouptype_role_ids: list[int] of grouptype_role_ids to consider
-            person_ids: list[int]: person to consider for result
+            person_ids: list[int]: person to consider for result - without
+                group_ids and with_deleted few persons in small groups are looked
+                up by their groups instead of downloading all members (see planner)
+            page_consumer: callable: receives the members of each page
+                instead of returning them - see churchtools_api.export
 
         Permissions:
             requires "administer persons"
@@ -446,43 +465,192 @@ class ChurchToolsApiGroups(ChurchToolsApiAbstract):
             list of person to group assignments
         """
         url = self.domain + "/api/groups/members"
+        endpoint = normalize_endpoint(url)
+
+        page_consumer = kwargs.get("page_consumer")
+        if page_consumer:
+            consumer = page_consumer
+
+            def page_consumer(members: list[dict]) -> None:
+                consumer(self._filter_groups_members(members, **kwargs))
+
+        plan = None
+        if group_ids:
+            # many groups are requested in chunks keeping the url short
+            plan = self._plan_lookup(url, group_ids, strategies=(ID_FILTER,))
+        elif not with_deleted and (person_ids := kwargs.get("person_ids")):
+            plan = self._plan_groups_of_persons(url, person_ids)
+
+        result_list = []
+        for chunk in plan.chunks if plan else [None]:
+            members = self._get_groups_members_request(
+                url,
+                group_ids=chunk,
+                with_deleted=with_deleted,
+                page_consumer=page_consumer,
+            )
+            if members is None:
+                return None
+            result_list.extend(members)
+
+        if plan is None and not page_consumer:
+            self._record_groups_members_statistics(endpoint, result_list)
+        return self._filter_groups_members(result_list, **kwargs)
+
+    def _plan_groups_of_persons(
+        self, url: str, person_ids: list[int]
+    ) -> QueryPlan | None:
+        """Helper which plans requesting the members of the groups of persons.
+
+        Looking up the groups of each person is followed by requesting all
+        members of these groups. This only pays off for few persons in small
+        groups compared to downloading all members.
+
+        Arguments:
+            url: url of the groups members endpoint
+            person_ids: ids of the persons
+
+        Returns:
+            plan containing chunks of group ids - without chunks if the persons
+            are not member of any group. None if all members should be requested
+        """
+        endpoint = normalize_endpoint(url)
+        members_per_person = self.planner.items_per_id(
+            PERSON_GROUPS_ENDPOINT
+        ) * self.planner.items_per_id(endpoint)
+        lookup = self._plan_lookup(
+            url,
+            person_ids,
+            strategies=(PER_ID, FULL_SCAN),
+            items_per_id=members_per_person,
+        )
+        if lookup.strategy == FULL_SCAN:
+            return None
+
+        group_ids = self._get_group_ids_of_persons(person_ids)
+        if group_ids is None:
+            logger.info("falling back to requesting all group members")
+            return None
+        plan = self._plan_lookup(url, group_ids, strategies=(ID_FILTER, FULL_SCAN))
+        return None if plan.strategy == FULL_SCAN else plan
+
+    def _get_groups_members_request(
+        self,
+        url: str,
+        group_ids: tuple[int] | None,
+        *,
+        with_deleted: bool,
+        page_consumer: Callable | None,
+    ) -> list[dict] | None:
+        """Helper which requests all pages of group members.
+
+        Arguments:
+            url: url of the groups members endpoint
+            group_ids: ids of the groups to request. None requests all groups
+            with_deleted: If true return also deleted group members
+            page_consumer: receives the members of each page
+
+        Returns:
+            list of person to group assignments or None on failure
+        """
         headers = {"accept": "application/json"}
-        params = {"ids[]": group_ids, with_deleted: with_deleted}
+        params = {
+            "limit": self._get_page_size(url),
+            "ids[]": list(group_ids) if group_ids else None,
+            "with_deleted": "true" if with_deleted else "false",
+        }
 
         response = self.session.get(url=url, headers=headers, params=params)
 
-        if response.status_code == requests.codes.ok:
-            response_content = json.loads(response.content)
+        if response.status_code != requests.codes.ok:
+            logger.warning(
+                "%s Something went wrong fetching group members: %s",
+                response.status_code,
+                response.content,
+            )
+            return None
 
-            response_data = self.combine_paginated_response_data(
-                response_content,
-                url=url,
-                headers=headers,
-                params=params,
+        response_data = self.combine_paginated_response_data(
+            decode_json(response.content),
+            url=url,
+            page_consumer=page_consumer,
+            headers=headers,
+            params=params,
+        )
+        return [response_data] if isinstance(response_data, dict) else response_data
+
+    def _record_groups_members_statistics(
+        self, endpoint: str, members: list[dict]
+    ) -> None:
+        """Helper which passes statistics of all group members to the planner.
+
+        Arguments:
+            endpoint: endpoint template of the groups members
+            members: all person to group assignments
+        """
+        self.planner.record_size(endpoint, len(members))
+        if not members:
+            return
+        self.planner.record_items_per_id(
+            endpoint, len(members) / len({member["groupId"] for member in members})
+        )
+        self.planner.record_items_per_id(
+            PERSON_GROUPS_ENDPOINT,
+            len(members) / len({member["personId"] for member in members}),
+        )
+
+    def _get_group_ids_of_persons(self, person_ids: list[int]) -> list[int] | None:
+        """Helper which collects the ids of all current groups of persons.
+
+        Arguments:
+            person_ids: ids of the persons
+
+        Returns:
+            sorted group ids or None on failure
+        """
+        headers = {"accept": "application/json"}
+        group_ids = set()
+        for person_id in dict.fromkeys(person_ids):
+            url = self.domain + f"/api/persons/{person_id}/groups"
+            response = self.session.get(url=url, headers=headers)
+            if response.status_code == requests.codes.not_found:
+                continue
+            if response.status_code != requests.codes.ok:
+                logger.warning(
+                    "%s Something went wrong fetching groups of person %s: %s",
+                    response.status_code,
+                    person_id,
+                    response.content,
+                )
+                return None
+            memberships = self.combine_paginated_response_data(
+                decode_json(response.content), url=url, headers=headers
             )
-            result_list = (
-                [response_data] if isinstance(response_data, dict) else response_data
+            group_ids.update(
+                int(membership["group"]["domainIdentifier"])
+                for membership in memberships
             )
-            if grouptype_role_ids := kwargs.get("grouptype_role_ids"):
-                result_list = [
-                    group
-                    for group in result_list
-                    if group["groupTypeRoleId"] in grouptype_role_ids
-                ]
-            if person_ids := kwargs.get("person_ids"):
-                result_list = [
-                    group for group in result_list if group["personId"] in person_ids
-                ]
-
-            return result_list
-
-            return result_list
-        logger.warning(
-            "%s Something went wrong fetching group members: %s",
-            response.status_code,
-            response.content,
-        )
-        return None
+        return sorted(group_ids)
+
+    def _filter_groups_members(self, members: list[dict], **kwargs: dict) -> list[dict]:
+        """Helper which applies the local filters of get_groups_members.
+
+        Arguments:
+            members: person to group assignments
+            kwargs: grouptype_role_ids and person_ids as in get_groups_members
+
+        Returns:
+            matching person to group assignments
+        """
+        if grouptype_role_ids := kwargs.get("grouptype_role_ids"):
+            members = [
+                group
+                for group in members
+                if group["groupTypeRoleId"] in grouptype_role_ids
+            ]
+        if person_ids := kwargs.get("person_ids"):
+            members = [group for group in members if group["personId"] in person_ids]
+        return members
 
     def add_group_member(self, group_id: int, person_id: int, **kwargs: dict) -> dict:
         """Add a member to a group.
@@ -516,8 +684,8 @@ class ChurchToolsApiGroups(ChurchToolsApiAbstract):
         response = self.session.put(url=url, json=data, headers=headers)
 
         if response.status_code == requests.codes.ok:
-            response_content = json.loads(response.content)
-            return response_content["data"].copy()
+            response_content = decode_json(response.content)
+            return response_content["data"]
 
         logger.warning(
             "%s Something went wrong adding group member: %s",
@@ -563,7 +731,7 @@ class ChurchToolsApiGroups(ChurchToolsApiAbstract):
         response = self.session.get(url=url, headers=headers)
 
         if response.status_code == requests.codes.ok:
-            response_content = json.loads(response.content)
+            response_content = decode_json(response.content)
 
             response_data = self.combine_paginated_response_data(
                 response_content,
@@ -641,7 +809,7 @@ class ChurchToolsApiGroups(ChurchToolsApiAbstract):
         response = self.session.get(url=url, headers=headers)
 
         if response.status_code == requests.codes.ok:
-            response_content = json.loads(response.content)
+            response_content = decode_json(response.content)
 
             response_data = self.combine_paginated_response_data(
                 response_content,
@@ -670,7 +838,7 @@ class ChurchToolsApiGroups(ChurchToolsApiAbstract):
         response = self.session.get(url=url, headers=headers)
 
         if response.status_code == requests.codes.ok:
-            response_content = json.loads(response.content)
+            response_content = decode_json(response.content)
 
             response_data = self.combine_paginated_response_data(
                 response_content,
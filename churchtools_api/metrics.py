@@ -0,0 +1,407 @@
+"""module containing request metrics collected by the rate limited session.
+
+Metrics are keyed by HTTP method and a normalized endpoint template
+e.g. GET /api/persons/{id} so that requests for different ids are combined.
+"""
+
+import json
+import logging
+import re
+import threading
+from abc import ABC, abstractmethod
+from urllib.parse import parse_qs, urlsplit
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+# values of the circuit breaker state gauge
+CIRCUIT_STATES = ("closed", "half_open", "open")
+
+_ID_SEGMENT = re.compile(r"^(\d+|[0-9a-fA-F-]{32,36})$")
+
+
+def normalize_endpoint(url: str) -> str:
+    """Converts a request url into an endpoint template.
+
+    Numeric ids and GUIDs are replaced by {id} and the domain is removed.
+    The q param of legacy AJAX requests is kept because it defines the endpoint.
+
+    Args:
+        url: full url used for the request
+
+    Returns:
+        endpoint template e.g. /api/persons/{id}
+    """
+    split_url = urlsplit(url)
+    path = "/".join(
+        "{id}" if _ID_SEGMENT.match(segment) else segment
+        for segment in split_url.path.split("/")
+    )
+    if query_q := parse_qs(split_url.query).get("q"):
+        path += f"?q={query_q[0]}"
+    return path or "/"
+
+
+def _body_size(body: bytes | str | None) -> int:
+    """Helper which returns the size of a prepared request body.
+
+    Args:
+        body: the body of a prepared request
+            streaming bodies are only considered if they know their length
+
+    Returns:
+        number of bytes
+    """
+    if body is None:
+        return 0
+    try:
+        return len(body)
+    except TypeError:
+        return 0
+
+
+class RequestMetrics:
+    """Thread safe collection of request counts, bytes and latencies."""
+
+    def __init__(self, buckets: tuple[float, ...] = LATENCY_BUCKETS) -> None:
+        """Prepares empty metrics.
+
+        Args:
+            buckets: upper bounds in seconds used for the latency histograms
+        """
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._endpoints = {}
+        self._circuit_breaker = None
+
+    def _get_entry(self, method: str, endpoint: str) -> dict:
+        """Helper which returns the entry of one endpoint - requires lock.
+
+        Args:
+            method: HTTP method e.g. GET
+            endpoint: normalized endpoint template
+
+        Returns:
+            mutable metrics entry
+        """
+        key = f"{method} {endpoint}"
+        if key not in self._endpoints:
+            self._endpoints[key] = {
+                "method": method,
+                "endpoint": endpoint,
+                "count": 0,
+                "status_counts": {},
+                "rate_limited": 0,
+                "bytes_sent": 0,
+                "bytes_received": 0,
+                "latency_sum": 0.0,
+                "latency_buckets": [0] * (len(self.buckets) + 1),
+                "backoff_seconds": 0.0,
+                "coalesced": 0,
+                "rejected": 0,
+                "retries": 0,
+                "queue_seconds": 0.0,
+                "reauthenticated": 0,
+            }
+        return self._endpoints[key]
+
+    def record_request(
+        self, method: str, url: str, response: requests.Response, latency: float
+    ) -> None:
+        """Adds one request to the metrics.
+
+        Response bodies which are streamed are not read
+        and only considered using their Content-Length header.
+
+        Args:
+            method: HTTP method e.g. GET
+            url: full url used for the request
+            response: the response received
+            latency: seconds until the response headers were received
+        """
+        if response.raw is not None and not response._content_consumed:  # noqa: SLF001
+            bytes_received = int(response.headers.get("Content-Length", 0))
+        else:
+            bytes_received = len(response.content or b"")
+        bytes_sent = _body_size(response.request.body if response.request else None)
+        bucket = next(
+            (index for index, bound in enumerate(self.buckets) if latency <= bound),
+            len(self.buckets),
+        )
+
+        with self._lock:
+            entry = self._get_entry(method.upper(), normalize_endpoint(url))
+            entry["count"] += 1
+            entry["status_counts"][response.status_code] = (
+                entry["status_counts"].get(response.status_code, 0) + 1
+            )
+            if response.status_code == requests.codes.too_many_requests:
+                entry["rate_limited"] += 1
+            entry["bytes_sent"] += bytes_sent
+            entry["bytes_received"] += bytes_received
+            entry["latency_sum"] += latency
+            entry["latency_buckets"][bucket] += 1
+
+    def record_backoff(self, method: str, url: str, seconds: float) -> None:
+        """Adds time spent waiting before a request is repeated.
+
+        Args:
+            method: HTTP method e.g. GET
+            url: full url used for the request
+            seconds: time spent sleeping
+        """
+        with self._lock:
+            entry = self._get_entry(method.upper(), normalize_endpoint(url))
+            entry["backoff_seconds"] += seconds
+
+    def record_retry(self, method: str, url: str, seconds: float) -> None:
+        """Adds a failed attempt which is repeated after waiting.
+
+        Args:
+            method: HTTP method e.g. GET
+            url: full url used for the request
+            seconds: time spent waiting before the retry
+        """
+        with self._lock:
+            entry = self._get_entry(method.upper(), normalize_endpoint(url))
+            entry["retries"] += 1
+            entry["backoff_seconds"] += seconds
+
+    def record_reauthentication(self, method: str, url: str) -> None:
+        """Adds a request which is repeated after renewing an expired login.
+
+        Args:
+            method: HTTP method e.g. GET
+            url: full url used for the request
+        """
+        with self._lock:
+            entry = self._get_entry(method.upper(), normalize_endpoint(url))
+            entry["reauthenticated"] += 1
+
+    def record_queue_wait(self, method: str, url: str, seconds: float) -> None:
+        """Adds time a request waited for its priority lane.
+
+        Args:
+            method: HTTP method e.g. GET
+            url: full url used for the request
+            seconds: time spent waiting
+        """
+        with self._lock:
+            entry = self._get_entry(method.upper(), normalize_endpoint(url))
+            entry["queue_seconds"] += seconds
+
+    def record_coalesced(self, method: str, url: str) -> None:
+        """Adds a request which was answered by an identical request in flight.
+
+        Args:
+            method: HTTP method e.g. GET
+            url: full url used for the request
+        """
+        with self._lock:
+            entry = self._get_entry(method.upper(), normalize_endpoint(url))
+            entry["coalesced"] += 1
+
+    def record_rejected(self, method: str, url: str) -> None:
+        """Adds a request which was not sent because the circuit breaker is open.
+
+        Args:
+            method: HTTP method e.g. GET
+            url: full url used for the request
+        """
+        with self._lock:
+            entry = self._get_entry(method.upper(), normalize_endpoint(url))
+            entry["rejected"] += 1
+
+    def record_circuit_state(self, state: str) -> None:
+        """Updates the state of the circuit breaker.
+
+        Args:
+            state: closed, open or half_open
+        """
+        with self._lock:
+            if self._circuit_breaker is None:
+                self._circuit_breaker = {"state": state, "opened": 0}
+            elif self._circuit_breaker["state"] == state:
+                return
+            if state == "open":
+                self._circuit_breaker["opened"] += 1
+            self._circuit_breaker["state"] = state
+
+    def reset(self) -> None:
+        """Removes all collected metrics - the circuit breaker state is kept."""
+        with self._lock:
+            self._endpoints = {}
+            if self._circuit_breaker:
+                self._circuit_breaker["opened"] = 0
+
+    def snapshot(self) -> dict:
+        """Consistent copy of all metrics collected so far.
+
+        Returns:
+            dict with "endpoints" keyed by "METHOD /endpoint/template"
+            latency_buckets are cumulative and keyed by upper bound including "+Inf"
+            and "circuit_breaker" with state and number of times opened
+            if a circuit breaker is used
+        """
+        with self._lock:
+            endpoints = {}
+            for key, entry in self._endpoints.items():
+                cumulative = 0
+                latency_buckets = {}
+                for bound, count in zip(
+                    [*self.buckets, "+Inf"], entry["latency_buckets"], strict=True
+                ):
+                    cumulative += count
+                    latency_buckets[bound] = cumulative
+                endpoints[key] = {
+                    **entry,
+                    "status_counts": entry["status_counts"].copy(),
+                    "latency_buckets": latency_buckets,
+                }
+            snapshot = {"endpoints": endpoints}
+            if self._circuit_breaker:
+                snapshot["circuit_breaker"] = self._circuit_breaker.copy()
+        return snapshot
+
+    def export(self, exporter: "MetricsExporter") -> str:
+        """Formats a snapshot of the metrics using an exporter.
+
+        Args:
+            exporter: e.g. PrometheusExporter() or JsonExporter()
+
+        Returns:
+            formatted metrics
+        """
+        return exporter.export(self.snapshot())
+
+
+class MetricsExporter(ABC):
+    """Base for formatting metrics snapshots."""
+
+    @abstractmethod
+    def export(self, snapshot: dict) -> str:
+        """Formats a snapshot.
+
+        Args:
+            snapshot: as returned by RequestMetrics.snapshot()
+
+        Returns:
+            formatted metrics
+        """
+
+
+class JsonExporter(MetricsExporter):
+    """Formats metrics as JSON document."""
+
+    def export(self, snapshot: dict) -> str:
+        """Formats a snapshot as JSON.
+
+        Args:
+            snapshot: as returned by RequestMetrics.snapshot()
+
+        Returns:
+            JSON string
+        """
+        return json.dumps(snapshot, indent=2, default=str)
+
+
+class PrometheusExporter(MetricsExporter):
+    """Formats metrics using the Prometheus text exposition format."""
+
+    def __init__(self, prefix: str = "churchtools_api") -> None:
+        """Prepares the exporter.
+
+        Args:
+            prefix: name prefix of all metrics
+        """
+        self.prefix = prefix
+
+    def export(self, snapshot: dict) -> str:
+        """Formats a snapshot as Prometheus text.
+
+        Args:
+            snapshot: as returned by RequestMetrics.snapshot()
+
+        Returns:
+            Prometheus text exposition
+        """
+        counters = {
+            "requests_total": ("count", "Number of HTTP requests sent"),
+            "rate_limited_total": ("rate_limited", "Number of 429 responses"),
+            "request_bytes_total": ("bytes_sent", "Bytes of request bodies"),
+            "response_bytes_total": ("bytes_received", "Bytes of response bodies"),
+            "backoff_seconds_total": (
+                "backoff_seconds",
+                "Seconds spent waiting before repeating requests",
+            ),
+            "coalesced_total": (
+                "coalesced",
+                "Number of requests answered by an identical request in flight",
+            ),
+            "queue_seconds_total": (
+                "queue_seconds",
+                "Seconds requests waited for their priority lane",
+            ),
+            "retries_total": (
+                "retries",
+                "Number of failed attempts repeated by the retry policy",
+            ),
+            "reauthenticated_total": (
+                "reauthenticated",
+                "Number of requests repeated after renewing an expired login",
+            ),
+            "rejected_total": (
+                "rejected",
+                "Number of requests not sent because the circuit breaker was open",
+            ),
+        }
+        lines = []
+        for name, (field, description) in counters.items():
+            lines.append(f"# HELP {self.prefix}_{name} {description}")
+            lines.append(f"# TYPE {self.prefix}_{name} counter")
+            lines.extend(
+                f"{self.prefix}_{name}{{{self._labels(entry)}}} {entry[field]}"
+                for entry in snapshot["endpoints"].values()
+            )
+
+        name = f"{self.prefix}_request_duration_seconds"
+        lines.append(f"# HELP {name} Latency of HTTP requests")
+        lines.append(f"# TYPE {name} histogram")
+        for entry in snapshot["endpoints"].values():
+            labels = self._labels(entry)
+            lines.extend(
+                f'{name}_bucket{{{labels},le="{bound}"}} {count}'
+                for bound, count in entry["latency_buckets"].items()
+            )
+            lines.append(f"{name}_sum{{{labels}}} {entry['latency_sum']}")
+            lines.append(f"{name}_count{{{labels}}} {entry['count']}")
+
+        if circuit_breaker := snapshot.get("circuit_breaker"):
+            name = f"{self.prefix}_circuit_breaker_state"
+            lines.append(f"# HELP {name} Circuit breaker 0=closed 1=half_open 2=open")
+            lines.append(f"# TYPE {name} gauge")
+            lines.append(f"{name} {CIRCUIT_STATES.index(circuit_breaker['state'])}")
+            name = f"{self.prefix}_circuit_breaker_opened_total"
+            lines.append(f"# HELP {name} Number of times the circuit breaker opened")
+            lines.append(f"# TYPE {name} counter")
+            lines.append(f"{name} {circuit_breaker['opened']}")
+        return "\n".join(lines) + "\n"
+
+    def _labels(self, entry: dict) -> str:
+        """Helper which formats the labels of one endpoint.
+
+        Args:
+            entry: one endpoint of a snapshot
+
+        Returns:
+            method="GET",endpoint="/api/persons/{id}"
+        """
+        endpoint = (
+            entry["endpoint"]
+            .replace("\\", "\\\\")
+            .replace('"', '\\"')
+            .replace("\n", "\\n")
+        )
+        return f'method="{entry["method"]}",endpoint="{endpoint}"'
@@ -0,0 +1,699 @@
+"""module containing an incremental local mirror of a tenant in SQLite.
+
+Persons, groups, group members, songs, calendars, events and bookings are
+copied into indexed tables. Each row keeps the full decoded item as JSON
+which allows answering reads with the same result as the api.
+
+ChurchTools does not offer "modified since" filters for these endpoints.
+Entities exposing meta.modifiedDate are therefore compared with the mirror
+and only changed rows are written. Events and bookings are synced for a date
+window rolling with today - rows which no longer exist or are outside of the
+window are removed.
+
+The query methods use the signatures of the get_* methods of ChurchToolsApi
+so read paths can switch e.g. reader = mirror if offline else api
+"""
+
+import json
+import logging
+import sqlite3
+import threading
+from collections.abc import Callable, Iterable
+from datetime import UTC, date, datetime, timedelta
+from pathlib import Path
+from types import TracebackType
+from typing import TYPE_CHECKING
+
+from churchtools_api.churchtools_api_abstract import decode_json, select_fields
+from churchtools_api.scheduler import BULK, priority
+
+if TYPE_CHECKING:
+    from churchtools_api.churchtools_api import ChurchToolsApi
+
+logger = logging.getLogger(__name__)
+
+# events and bookings are synced from today - PAST until today + FUTURE by default
+DEFAULT_WINDOW_PAST_DAYS = 30
+DEFAULT_WINDOW_FUTURE_DAYS = 365
+
+# key columns and indexed columns of each table by the field of the item
+ENTITIES: dict[str, dict] = {
+    "persons": {
+        "key": ["id"],
+        "columns": {
+            "id": "id",
+            "last_name": "lastName",
+            "email": "email",
+            "modified": "meta.modifiedDate",
+        },
+        "indexes": ["last_name", "email"],
+    },
+    "groups": {
+        "key": ["id"],
+        "columns": {
+            "id": "id",
+            "name": "name",
+            "group_type_id": "information.groupTypeId",
+            "modified": "meta.modifiedDate",
+        },
+        "indexes": ["name", "group_type_id"],
+    },
+    "group_members": {
+        "key": ["group_id", "person_id"],
+        "columns": {
+            "group_id": "groupId",
+            "person_id": "personId",
+            "group_type_role_id": "groupTypeRoleId",
+            "deleted": "deleted",
+        },
+        "indexes": ["person_id"],
+    },
+    "songs": {
+        "key": ["id"],
+        "columns": {
+            "id": "id",
+            "name": "name",
+            "category_id": "category.id",
+            "modified": "meta.modifiedDate",
+        },
+        "indexes": ["name"],
+    },
+    "calendars": {
+        "key": ["id"],
+        "columns": {"id": "id", "name": "name"},
+        "indexes": [],
+    },
+    "events": {
+        "key": ["id"],
+        "columns": {
+            "id": "id",
+            "start_date": "startDate",
+            "calendar_id": "calendar.domainIdentifier",
+            "appointment_id": "appointmentId",
+            "is_canceled": "isCanceled",
+        },
+        "indexes": ["start_date", "appointment_id"],
+    },
+    "bookings": {
+        # occurrences of a repeated booking share the id
+        "key": ["id", "start_date"],
+        "columns": {
+            "id": "base.id",
+            "resource_id": "base.resource.id",
+            "appointment_id": "base.appointmentId",
+            "status_id": "base.statusId",
+            "start_date": "calculated.startDate",
+        },
+        "indexes": ["resource_id, start_date", "appointment_id"],
+    },
+}
+WINDOWED_ENTITIES = ("events", "bookings")
+# increased whenever ENTITIES change - older mirrors are synced again completely
+SCHEMA_VERSION = 2
+
+
+def _lookup(item: dict, field: str) -> object:
+    """Helper which returns a nested value of an item.
+
+    Args:
+        item: decoded item
+        field: name of the field - nested fields are separated by dots
+
+    Returns:
+        value or None if missing
+    """
+    value = item
+    for key in field.split("."):
+        value = value.get(key) if isinstance(value, dict) else None
+    return value
+
+
+def _today() -> date:
+    """Helper which returns the current day in UTC.
+
+    Returns:
+        today
+    """
+    return datetime.now(UTC).date()
+
+
+def _date_string(value: date | str) -> str:
+    """Helper which converts a date into YYYY-MM-DD.
+
+    Args:
+        value: date, datetime or string starting with YYYY-MM-DD
+
+    Returns:
+        date as YYYY-MM-DD
+    """
+    if isinstance(value, date):
+        return value.strftime("%Y-%m-%d")
+    return value[:10]
+
+
+class TenantMirror:
+    """Local SQLite copy of a tenant which can be synced incrementally.
+
+    The connection can be shared by multiple threads - access is serialized.
+    Reads are only blocked while the result of a sync is written, not while
+    it is downloaded.
+    """
+
+    def __init__(
+        self, api: "ChurchToolsApi | None" = None, path: Path | str = ":memory:"
+    ) -> None:
+        """Opens or creates the mirror database.
+
+        Args:
+            api: logged in api used for syncing.
+                Defaults to None which allows reading an existing mirror only
+            path: SQLite database file. Defaults to an in memory database
+        """
+        self.api = api
+        self._lock = threading.Lock()
+        # serializes syncs which are downloading without holding _lock
+        self._sync_lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._connection:
+            version = self._connection.execute("PRAGMA user_version").fetchone()[0]
+            self._connection.executescript(
+                self._schema(upgrade=version < SCHEMA_VERSION)
+            )
+
+    @staticmethod
+    def _schema(*, upgrade: bool = False) -> str:
+        """Helper which creates the SQL statements of all tables and indexes.
+
+        Args:
+            upgrade: drop all tables of an older mirror which are synced again
+
+        Returns:
+            SQL script
+        """
+        statements = []
+        if upgrade:
+            statements.extend(
+                f"DROP TABLE IF EXISTS {table}" for table in ["sync_state", *ENTITIES]
+            )
+            statements.append(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        statements.append(
+            "CREATE TABLE IF NOT EXISTS sync_state (entity TEXT PRIMARY KEY,"
+            " synced_at TEXT, window_from TEXT, window_to TEXT, rows INTEGER)"
+        )
+        for entity, definition in ENTITIES.items():
+            columns = ", ".join(definition["columns"])
+            key = ", ".join(definition["key"])
+            statements.append(
+                f"CREATE TABLE IF NOT EXISTS {entity}"
+                f" ({columns}, data TEXT NOT NULL, PRIMARY KEY ({key}))"
+            )
+            statements.extend(
+                f"CREATE INDEX IF NOT EXISTS {entity}_{index.replace(', ', '_')}"
+                f" ON {entity} ({index})"
+                for index in definition["indexes"]
+            )
+        return ";\n".join(statements) + ";"
+
+    def close(self) -> None:
+        """Closes the database connection."""
+        with self._lock:
+            self._connection.close()
+
+    def __enter__(self) -> "TenantMirror":
+        """Context manager which closes the connection on exit.
+
+        Returns:
+            the mirror itself
+        """
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        """Closes the database connection."""
+        self.close()
+
+    def sync(
+        self,
+        entities: Iterable[str] | None = None,
+        *,
+        from_: date | None = None,
+        to_: date | None = None,
+        resource_ids: list[int] | None = None,
+    ) -> dict[str, dict]:
+        """Refreshes the mirror using the api.
+
+        Requests are sent in the bulk lane if the session uses a scheduler.
+
+        Args:
+            entities: names of ENTITIES to sync. Defaults to all
+            from_: first day of the window of events and bookings.
+                Defaults to today - DEFAULT_WINDOW_PAST_DAYS
+            to_: day after the window of events and bookings.
+                Defaults to today + DEFAULT_WINDOW_FUTURE_DAYS
+            resource_ids: resources of which bookings are synced.
+                Defaults to all resources of get_resource_masterdata
+
+        Returns:
+            dict by entity with number of rows, changed and deleted rows.
+                Entities which could not be loaded are None and remain unchanged
+        """
+        if self.api is None:
+            logger.error("mirror can not be synced without api")
+            return None
+
+        loaders = {
+            "persons": lambda consumer: self.api.get_persons(page_consumer=consumer),
+            "groups": lambda consumer: self._consume(self.api.get_groups(), consumer),
+            "group_members": lambda consumer: self.api.get_groups_members(
+                with_deleted=True, page_consumer=consumer
+            ),
+            "songs": lambda consumer: self._consume(self.api.get_songs(), consumer),
+            "calendars": lambda consumer: self._consume(
+                self.api.get_calendars(), consumer
+            ),
+        }
+        result = {}
+        with priority(BULK):
+            for entity in entities or ENTITIES:
+                if entity in WINDOWED_ENTITIES:
+                    window = self._window(from_=from_, to_=to_)
+                    result[entity] = self._sync_entity(
+                        entity,
+                        lambda consumer,
+                        entity=entity,
+                        window=window: self._load_window(
+                            entity, consumer, window, resource_ids
+                        ),
+                        window=window,
+                    )
+                else:
+                    result[entity] = self._sync_entity(entity, loaders[entity])
+        return result
+
+    @staticmethod
+    def _consume(items: list[dict] | None, consumer: Callable) -> list | None:
+        """Helper which passes a complete result to a page consumer.
+
+        Args:
+            items: result of a getter without page_consumer support
+            consumer: page consumer
+
+        Returns:
+            empty list like getters using a page_consumer or None on failure
+        """
+        if items is None:
+            return None
+        consumer(items)
+        return []
+
+    @staticmethod
+    def _window(from_: date | None, to_: date | None) -> tuple[str, str]:
+        """Helper which determines the window of events and bookings.
+
+        The default window moves with today so repeated syncs pick up new items.
+
+        Args:
+            from_: requested first day
+            to_: requested day after the window
+
+        Returns:
+            first day and day after the window as YYYY-MM-DD
+        """
+        today = _today()
+        return (
+            _date_string(from_ or today - timedelta(days=DEFAULT_WINDOW_PAST_DAYS)),
+            _date_string(to_ or today + timedelta(days=DEFAULT_WINDOW_FUTURE_DAYS)),
+        )
+
+    def _load_window(
+        self,
+        entity: str,
+        consumer: Callable,
+        window: tuple[str, str],
+        resource_ids: list[int] | None,
+    ) -> list | None:
+        """Helper which loads events or bookings of a window.
+
+        Args:
+            entity: events or bookings
+            consumer: page consumer
+            window: first day and day after the window as YYYY-MM-DD
+            resource_ids: resources of which bookings are loaded
+
+        Returns:
+            empty list or None on failure
+        """
+        if entity == "events":
+            return self.api.get_events(
+                from_=window[0], to_=window[1], page_consumer=consumer
+            )
+        if resource_ids is None:
+            resources = self.api.get_resource_masterdata(resultClass="resources")
+            if resources is None:
+                return None
+            resource_ids = [resource["id"] for resource in resources]
+        return self.api.get_bookings(
+            resource_ids=resource_ids,
+            from_=datetime.fromisoformat(window[0]),
+            to_=datetime.fromisoformat(window[1]),
+            page_consumer=consumer,
+        )
+
+    def _sync_entity(
+        self,
+        entity: str,
+        load: Callable[[Callable], list | None],
+        window: tuple[str, str] | None = None,
+    ) -> dict | None:
+        """Helper which writes changed rows of one entity in a single transaction.
+
+        Pages are downloaded without holding the lock of the connection
+        so reads of the mirror are answered meanwhile.
+
+        Args:
+            entity: name of the table
+            load: calls a getter passing each page to the given consumer
+            window: synced window which is stored in sync_state -
+                all rows which were not loaded are removed including those
+                outside of the window
+
+        Returns:
+            number of rows, changed and deleted rows or None on failure
+        """
+        definition = ENTITIES[entity]
+        key_columns = definition["key"]
+        columns = list(definition["columns"])
+        placeholders = ", ".join("?" for _ in range(len(columns) + 1))
+        updates = ", ".join(f"{column} = excluded.{column}" for column in columns)
+        upsert = (
+            f"INSERT INTO {entity} ({', '.join(columns)}, data)"  # noqa: S608
+            f" VALUES ({placeholders})"
+            f" ON CONFLICT ({', '.join(key_columns)}) DO UPDATE SET {updates},"
+            " data = excluded.data WHERE data IS NOT excluded.data"
+        )
+        has_modified = "modified" in definition["columns"]
+
+        with self._sync_lock:
+            with self._lock:
+                existing = {
+                    tuple(row[:-1]): row[-1]
+                    for row in self._connection.execute(
+                        f"SELECT {', '.join(key_columns)},"  # noqa: S608
+                        f" {'modified' if has_modified else 'NULL'}"
+                        f" FROM {entity}"
+                    )
+                }
+            seen = set()
+            rows = []
+            counts = {"rows": 0, "changed": 0, "deleted": 0}
+
+            def consumer(items: list[dict]) -> None:
+                for item in items:
+                    values = [
+                        _lookup(item, field) for field in definition["columns"].values()
+                    ]
+                    key = tuple(values[columns.index(column)] for column in key_columns)
+                    seen.add(key)
+                    modified = has_modified and values[columns.index("modified")]
+                    if modified and existing.get(key) == modified:
+                        continue
+                    rows.append((*values, json.dumps(item)))
+                counts["rows"] += len(items)
+
+            if load(consumer) is None:
+                logger.warning("%s could not be loaded - mirror not updated", entity)
+                return None
+
+            deleted = [key for key in existing if key not in seen]
+            key_filter = " AND ".join(f"{column} = ?" for column in key_columns)
+            with self._lock, self._connection:
+                if rows:
+                    counts["changed"] = self._connection.executemany(
+                        upsert, rows
+                    ).rowcount
+                self._connection.executemany(
+                    f"DELETE FROM {entity} WHERE {key_filter}",  # noqa: S608
+                    deleted,
+                )
+                counts["deleted"] = len(deleted)
+                self._connection.execute(
+                    "INSERT OR REPLACE INTO sync_state VALUES (?, ?, ?, ?, ?)",
+                    (
+                        entity,
+                        datetime.now(UTC).isoformat(),
+                        *(window or (None, None)),
+                        counts["rows"],
+                    ),
+                )
+        logger.info("mirror synced %s %s", entity, counts)
+        return counts
+
+    def sync_state(self) -> dict[str, dict]:
+        """Time and window of the last successful sync of each entity.
+
+        Returns:
+            dict by entity with synced_at, window_from, window_to and rows
+        """
+        rows = self._query("SELECT * FROM sync_state", ())
+        return {
+            entity: {
+                "synced_at": synced_at,
+                "window_from": window_from,
+                "window_to": window_to,
+                "rows": count,
+            }
+            for entity, synced_at, window_from, window_to, count in rows
+        }
+
+    def _query(self, sql: str, params: Iterable) -> list[tuple]:
+        """Helper which executes a read query.
+
+        Args:
+            sql: SELECT statement
+            params: values of the placeholders
+
+        Returns:
+            all rows
+        """
+        with self._lock:
+            return self._connection.execute(sql, list(params)).fetchall()
+
+    def _select(
+        self,
+        entity: str,
+        conditions: dict[str, object],
+        order: str | None = None,
+    ) -> list[dict]:
+        """Helper which returns the decoded items matching all conditions.
+
+        Args:
+            entity: name of the table
+            conditions: value by SQL condition using one placeholder
+                lists are expanded into IN conditions e.g. {"id IN": [1, 2]}
+                conditions without placeholder use None as value
+            order: optional ORDER BY clause
+
+        Returns:
+            decoded items
+        """
+        clauses = []
+        params = []
+        for condition, value in conditions.items():
+            if value is None:
+                clauses.append(condition)
+            elif isinstance(value, list | tuple | set):
+                value = list(value)  # noqa: PLW2901
+                clauses.append(f"{condition} ({', '.join('?' * len(value))})")
+                params.extend(value)
+            else:
+                clauses.append(f"{condition} ?")
+                params.append(value)
+        sql = f"SELECT data FROM {entity}"  # noqa: S608
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += f" ORDER BY {order or ', '.join(ENTITIES[entity]['key'])}"
+        return [decode_json(row[0]) for row in self._query(sql, params)]
+
+    def get_persons(self, **kwargs: dict) -> list[dict] | dict:
+        """Persons of the mirror like ChurchToolsApi.get_persons.
+
+        Arguments:
+            kwargs: optional keywords as listed
+
+        Kwargs:
+            ids: list: of a ids filter
+            returnAsDict: bool: true if should return a dict instead of list
+            fields: list[str]: only keep these fields of each person
+
+        Returns:
+            list of user dicts
+        """
+        conditions = {"id IN": kwargs["ids"]} if "ids" in kwargs else {}
+        fields = kwargs.get("fields")
+        if fields and kwargs.get("returnAsDict") and "id" not in fields:
+            fields = [*fields, "id"]
+        response_data = select_fields(self._select("persons", conditions), fields)
+        if kwargs.get("returnAsDict"):
+            return {item["id"]: item for item in response_data}
+        return response_data
+
+    def get_groups(self, **kwargs: dict) -> list[dict]:
+        """Groups of the mirror like ChurchToolsApi.get_groups.
+
+        Keywords:
+            group_id: int: optional filter by group id
+            query: str: optional part of the group name
+            fields: list[str]: only keep these fields of each group
+
+        Returns:
+            list of groups - None if group_id is unknown
+        """
+        conditions = {}
+        if "group_id" in kwargs:
+            conditions["id ="] = kwargs["group_id"]
+        if "query" in kwargs:
+            conditions["name LIKE"] = f"%{kwargs['query']}%"
+        response_data = self._select("groups", conditions)
+        if "group_id" in kwargs and not response_data:
+            return None
+        return select_fields(response_data, kwargs.get("fields"))
+
+    def get_groups_members(
+        self,
+        group_ids: list[int] | None = None,
+        *,
+        with_deleted: bool = False,
+        **kwargs: dict,
+    ) -> list[dict]:
+        """Group memberships of the mirror like ChurchToolsApi.get_groups_members.
+
+        Args:
+            group_ids: list of group ids to look for. Defaults to Any
+            with_deleted: If true return also deleted group members
+            kwargs: see below
+
+        Keywords:
+            grouptype_role_ids: list[int] of grouptype_role_ids to consider
+            person_ids: list[int]: person to consider for result
+
+        Returns:
+            list of person to group assignments
+        """
+        conditions = {}
+        if group_ids:
+            conditions["group_id IN"] = group_ids
+        if not with_deleted:
+            conditions["NOT COALESCE(deleted, 0)"] = None
+        if grouptype_role_ids := kwargs.get("grouptype_role_ids"):
+            conditions["group_type_role_id IN"] = grouptype_role_ids
+        if person_ids := kwargs.get("person_ids"):
+            conditions["person_id IN"] = person_ids
+        return self._select("group_members", conditions, order="person_id, group_id")
+
+    def get_songs(self, **kwargs: dict) -> list[dict]:
+        """Songs of the mirror like ChurchToolsApi.get_songs.
+
+        Kwargs:
+            song_id: int: optional filter by song id
+            fields: list[str]: only keep these fields of each song
+
+        Returns:
+            list of songs - None if song_id is unknown
+        """
+        conditions = {"id =": kwargs["song_id"]} if "song_id" in kwargs else {}
+        response_data = self._select("songs", conditions)
+        if "song_id" in kwargs and not response_data:
+            return None
+        return select_fields(response_data, kwargs.get("fields"))
+
+    def get_calendars(self) -> list[dict]:
+        """Calendars of the mirror like ChurchToolsApi.get_calendars.
+
+        Returns:
+            list of calendars
+        """
+        return self._select("calendars", {})
+
+    def get_events(self, **kwargs: dict) -> list[dict]:
+        """Events of the mirror like ChurchToolsApi.get_events.
+
+        Only events within the synced window are available.
+
+        Arguments:
+            kwargs: optional params to modify the search criteria
+
+        Keyword Arguments:
+            eventId (int): number of event for single event lookup
+            from_ (str|datetime): used as >= with starting date in format YYYY-MM-DD
+                defaults to today
+            to_ (str|datetime): used as < end date in format YYYY-MM-DD ONLY allowed
+                with from_
+            canceled (bool): If true, include also canceled events
+            fields (list[str]): only keep these fields of each event
+
+        Returns:
+            list of events - None if eventId is unknown
+        """
+        if "eventId" in kwargs:
+            response_data = self._select("events", {"id =": kwargs["eventId"]})
+            if not response_data:
+                return None
+            return select_fields(response_data, kwargs.get("fields"))
+
+        conditions = {
+            "start_date >=": _date_string(
+                kwargs.get("from_") or datetime.now(UTC).date()
+            )
+        }
+        if "to_" in kwargs and "from_" in kwargs:
+            conditions["start_date <"] = _date_string(kwargs["to_"])
+        elif "to_" in kwargs:
+            logger.warning("Use of to_ is only allowed together with from_")
+        if not kwargs.get("canceled"):
+            conditions["NOT COALESCE(is_canceled, 0)"] = None
+        response_data = self._select("events", conditions, order="start_date, id")
+        return select_fields(response_data, kwargs.get("fields"))
+
+    def get_bookings(self, **kwargs: dict) -> list[dict]:
+        """Resource bookings of the mirror like ChurchToolsApi.get_bookings.
+
+        Only bookings within the synced window are available.
+
+        Keywords:
+            booking_id: int: only one booking by id (use standalone only)
+            resource_ids:list[int]: required if not booking_id
+            status_ids: list[int]: filter by list of stats ids
+            from_: datetime: first day of the date range
+            to_: datetime: day after the date range
+            appointment_id: int: get resources for one specific calendar_appointment
+            fields: list[str]: only keep these fields of each booking
+
+        Returns:
+            list of bookings matching the criteria
+        """
+        if not any(kwarg in kwargs for kwarg in ["booking_id", "resource_ids"]):
+            logger.error(
+                "invalid argument combination in get_bookings"
+                " - please check docstring for requirements",
+            )
+            return None
+
+        conditions = {}
+        if "booking_id" in kwargs:
+            conditions["id ="] = kwargs["booking_id"]
+        else:
+            conditions["resource_id IN"] = kwargs["resource_ids"]
+            if status_ids := kwargs.get("status_ids"):
+                conditions["status_id IN"] = status_ids
+            if from_ := kwargs.get("from_"):
+                conditions["start_date >="] = _date_string(from_)
+            if to_ := kwargs.get("to_"):
+                conditions["start_date <"] = _date_string(to_)
+            if appointment_id := kwargs.get("appointment_id"):
+                conditions["appointment_id ="] = appointment_id
+        response_data = self._select("bookings", conditions, order="start_date, id")
+        return select_fields(response_data, kwargs.get("fields"))
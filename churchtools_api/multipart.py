@@ -0,0 +1,139 @@
+"""module containing a streaming multipart/form-data encoder used for uploads.
+
+requests reads files passed with files= completely into memory before sending.
+The encoder in this module is passed as data= instead which makes requests
+stream the body chunk by chunk with a known Content-Length.
+"""
+
+import logging
+import mimetypes
+import mmap
+import secrets
+from collections.abc import Callable, Iterator
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+MMAP_THRESHOLD = 64 * 1024 * 1024
+
+
+class StreamingMultipartEncoder:
+    """Multipart/form-data body which reads files only while it is sent.
+
+    The body can be iterated multiple times
+    which allows repeating a request e.g. after a rate limit response.
+    """
+
+    def __init__(
+        self,
+        files: list[tuple[str, str, Path]],
+        *,
+        chunk_size: int = UPLOAD_CHUNK_SIZE,
+        use_mmap: bool | None = None,
+        progress: Callable[[int, int], None] | None = None,
+    ) -> None:
+        """Prepares the encoder without reading any file content.
+
+        Args:
+            files: list of (field name, file name, source path)
+                e.g. [("files[]", "pinguin.png", Path("samples/pinguin.png"))]
+            chunk_size: number of bytes read and sent at once
+            use_mmap: map files into memory instead of reading chunks.
+                Defaults to files larger than MMAP_THRESHOLD
+            progress: optional callback called with (bytes_sent, total_bytes)
+        """
+        self.boundary = secrets.token_hex(16)
+        self.content_type = f"multipart/form-data; boundary={self.boundary}"
+        self.chunk_size = chunk_size
+        self.use_mmap = use_mmap
+        self.progress = progress
+
+        self._parts = []
+        for field_name, file_name, source in files:
+            source_filepath = Path(source)
+            mime_type = mimetypes.guess_type(file_name)[0] or "application/octet-stream"
+            header = (
+                f"--{self.boundary}\r\n"
+                "Content-Disposition: form-data; "
+                f"{_format_header_param('name', field_name)}; "
+                f"{_format_header_param('filename', file_name)}\r\n"
+                f"Content-Type: {mime_type}\r\n\r\n"
+            ).encode()
+            self._parts.append(
+                (header, source_filepath, source_filepath.stat().st_size)
+            )
+        self._footer = f"--{self.boundary}--\r\n".encode()
+
+    def __len__(self) -> int:
+        """Total size of the body - used by requests for the Content-Length.
+
+        Returns:
+            number of bytes
+        """
+        return sum(
+            len(header) + size + len(b"\r\n") for header, _, size in self._parts
+        ) + len(self._footer)
+
+    def __iter__(self) -> Iterator[bytes | memoryview]:
+        """Generates the body - a new iteration starts from the beginning.
+
+        Yields:
+            chunks of the multipart body
+        """
+        total = len(self)
+        sent = 0
+        for header, source_filepath, size in self._parts:
+            yield header
+            sent += len(header)
+            for chunk in self._iter_file(source_filepath, size):
+                yield chunk
+                sent += len(chunk)
+                if self.progress:
+                    self.progress(sent, total)
+            yield b"\r\n"
+            sent += len(b"\r\n")
+        yield self._footer
+        sent += len(self._footer)
+        if self.progress:
+            self.progress(sent, total)
+
+    def _iter_file(self, source_filepath: Path, size: int) -> Iterator[bytes]:
+        """Helper which reads one file either in chunks or using mmap.
+
+        Args:
+            source_filepath: file to read
+            size: expected size of the file
+
+        Yields:
+            chunks of file content
+        """
+        use_mmap = size >= MMAP_THRESHOLD if self.use_mmap is None else self.use_mmap
+        with source_filepath.open("rb") as source_file:
+            if use_mmap and size > 0:
+                with (
+                    mmap.mmap(
+                        source_file.fileno(), 0, access=mmap.ACCESS_READ
+                    ) as mapped,
+                    memoryview(mapped) as view,
+                ):
+                    for offset in range(0, size, self.chunk_size):
+                        with view[offset : offset + self.chunk_size] as chunk:
+                            yield chunk
+                return
+            while chunk := source_file.read(self.chunk_size):
+                yield chunk
+
+
+def _format_header_param(name: str, value: str) -> str:
+    """Helper which quotes a multipart header param like browsers do.
+
+    Args:
+        name: the name of the param e.g. filename
+        value: the value to quote
+
+    Returns:
+        name="value" with line breaks and quotes percent encoded
+    """
+    value = value.translate({10: "%0A", 13: "%0D", 34: "%22"})
+    return f'{name}="{value}"'
@@ -0,0 +1,179 @@
+"""module containing the page size configuration of paginated requests.
+
+Page sizes can be configured per endpoint e.g. /api/persons.
+With auto tuning enabled each candidate page size is measured using full pages
+and the one with the most records per second is used afterwards.
+Candidates larger than the whole collection are not measured.
+"""
+
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+PAGE_SIZE_CANDIDATES = (50, 100, 200, 500)
+AUTO_TUNE_SAMPLES = 3
+
+
+class PageSizeTuner:
+    """Thread safe page size configuration per endpoint with optional auto tuning.
+
+    The page size used for one paginated request never changes between its pages
+    because ChurchTools counts pages using the limit param.
+    """
+
+    def __init__(  # noqa: PLR0913
+        self,
+        *,
+        default: int = DEFAULT_PAGE_SIZE,
+        page_sizes: dict[str, int] | None = None,
+        auto_tune: bool = False,
+        candidates: tuple[int, ...] = PAGE_SIZE_CANDIDATES,
+        max_page_size: int = MAX_PAGE_SIZE,
+        samples: int = AUTO_TUNE_SAMPLES,
+    ) -> None:
+        """Prepares the configuration.
+
+        Args:
+            default: page size of endpoints which are not configured
+            page_sizes: fixed page size by endpoint e.g. {"/api/persons": 200}
+                these are never auto tuned
+            auto_tune: measure candidates for endpoints which are not configured
+            candidates: page sizes compared by auto tuning
+            max_page_size: upper limit for all endpoints - ChurchTools might use
+                a lower maximum for some endpoints which is detected automatically
+            samples: number of full pages measured for each candidate
+        """
+        self.default = default
+        self.page_sizes = dict(page_sizes or {})
+        self.auto_tune = auto_tune
+        self.candidates = candidates
+        self.max_page_size = max_page_size
+        self.samples = samples
+        self._lock = threading.Lock()
+        self._server_limits = {}
+        self._totals = {}
+        self._statistics = {}
+
+    def get(self, endpoint: str) -> int:
+        """Page size to use for the next request of an endpoint.
+
+        Args:
+            endpoint: endpoint template e.g. /api/persons
+
+        Returns:
+            value for the limit param
+        """
+        with self._lock:
+            max_page_size = self._server_limits.get(endpoint, self.max_page_size)
+            if endpoint in self.page_sizes:
+                return min(self.page_sizes[endpoint], max_page_size)
+            if not self.auto_tune:
+                return min(self.default, max_page_size)
+
+            candidates = sorted(
+                {min(candidate, max_page_size) for candidate in self.candidates}
+            )
+            total = self._totals.get(endpoint)
+            # larger candidates than one covering the collection request the same page
+            if covering := next(
+                (
+                    candidate
+                    for candidate in candidates
+                    if total is not None and candidate >= total
+                ),
+                None,
+            ):
+                candidates = [
+                    candidate for candidate in candidates if candidate <= covering
+                ]
+            statistics = self._statistics.get(endpoint, {})
+            for candidate in candidates:
+                if statistics.get(candidate, {}).get("pages", 0) < self.samples:
+                    return candidate
+            return max(
+                candidates,
+                key=lambda candidate: statistics[candidate]["records"]
+                / statistics[candidate]["latency"],
+            )
+
+    def set(self, endpoint: str, page_size: int) -> None:
+        """Configures a fixed page size for one endpoint.
+
+        Args:
+            endpoint: endpoint template e.g. /api/persons
+            page_size: value for the limit param
+        """
+        with self._lock:
+            self.page_sizes[endpoint] = page_size
+
+    def record_page(  # noqa: PLR0913
+        self,
+        endpoint: str,
+        *,
+        limit: int,
+        records: int,
+        size_bytes: int,
+        latency: float,
+        server_limit: int | None = None,
+        total: int | None = None,
+    ) -> None:
+        """Adds the measurement of one page.
+
+        Only full pages are used for tuning because the last page
+        is usually shorter and would distort the records per second.
+        A single page containing the whole collection counts as full page.
+
+        Args:
+            endpoint: endpoint template e.g. /api/persons
+            limit: the limit param requested
+            records: number of records received
+            size_bytes: size of the response body
+            latency: seconds until the response was received
+            server_limit: limit reported in meta/pagination by ChurchTools
+            total: number of records of the whole collection
+                reported in meta/pagination by ChurchTools
+        """
+        with self._lock:
+            if server_limit and server_limit < limit:
+                logger.info(
+                    "%s limits page size to %s instead of %s",
+                    endpoint,
+                    server_limit,
+                    limit,
+                )
+                self._server_limits[endpoint] = server_limit
+                return
+            if total is not None:
+                self._totals[endpoint] = total
+            complete = total is not None and records == total
+            if (records < limit and not complete) or latency <= 0:
+                return
+            entry = self._statistics.setdefault(endpoint, {}).setdefault(
+                limit, {"pages": 0, "records": 0, "bytes": 0, "latency": 0.0}
+            )
+            entry["pages"] += 1
+            entry["records"] += records
+            entry["bytes"] += size_bytes
+            entry["latency"] += latency
+
+    def statistics(self) -> dict[str, dict[int, dict]]:
+        """Measurements used for auto tuning.
+
+        Returns:
+            dict by endpoint and page size with pages, records, bytes,
+            latency (seconds) and records_per_second
+        """
+        with self._lock:
+            return {
+                endpoint: {
+                    limit: {
+                        **entry,
+                        "records_per_second": entry["records"] / entry["latency"],
+                    }
+                    for limit, entry in by_limit.items()
+                }
+                for endpoint, by_limit in self._statistics.items()
+            }
@@ -2,10 +2,18 @@
 
 import json
 import logging
+from collections.abc import Callable
 
 import requests
 
-from churchtools_api.churchtools_api_abstract import ChurchToolsApiAbstract
+from churchtools_api.churchtools_api_abstract import (
+    ChurchToolsApiAbstract,
+    cached_reference_data,
+    decode_json,
+    select_fields,
+)
+from churchtools_api.metrics import normalize_endpoint
+from churchtools_api.planner import FULL_SCAN, ID_FILTER, PER_ID
 
 logger = logging.getLogger(__name__)
 
@@ -19,7 +27,7 @@ class ChurchToolsApiPersons(ChurchToolsApiAbstract):
 
     def __init__(self) -> None:
         """Inherited initialization."""
-        super()
+        super().__init__()
 
     def get_persons(self, **kwargs: dict) -> list[dict]:
         """Function to get list of all or a person from CT.
@@ -28,8 +36,14 @@ class ChurchToolsApiPersons(ChurchToolsApiAbstract):
             kwargs: optional keywords as listed
 
         Kwargs:
-            ids: list: of a ids filter
+            ids: list: of a ids filter - depending on the number of ids and
+                the known number of persons these are requested in chunks,
+                one by one or filtered locally (see planner)
             returnAsDict: bool: true if should return a dict instead of list
+            fields: list[str]: only keep these fields of each person
+                e.g. ["id", "firstName", "lastName"] - id is kept for returnAsDict
+            page_consumer: callable: receives the persons of each page
+                instead of returning them - see churchtools_api.export
 
         Permissions:
             some fields e.g. sexId require "security level person" with at least
@@ -39,16 +53,59 @@ class ChurchToolsApiPersons(ChurchToolsApiAbstract):
             list of user dicts
         """
         url = self.domain + "/api/persons"
-        params = {"limit": 50}  # increases default pagination size
+
+        fields = kwargs.get("fields")
+        if fields and kwargs.get("returnAsDict") and "id" not in fields:
+            fields = [*fields, "id"]
+        page_consumer = kwargs.get("page_consumer")
+
         if "ids" in kwargs:
-            params["ids[]"] = kwargs["ids"]
+            response_data = self._get_persons_by_ids(
+                url, kwargs["ids"], fields=fields, page_consumer=page_consumer
+            )
+        else:
+            response_data = self._get_persons_request(
+                url, params={}, fields=fields, page_consumer=page_consumer
+            )
+            if response_data is not None and not page_consumer:
+                self.planner.record_size(normalize_endpoint(url), len(response_data))
+        if response_data is None:
+            return None
+
+        if kwargs.get("returnAsDict") and "serviceId" not in kwargs:
+            result = {}
+            for item in response_data:
+                result[item["id"]] = item
+            response_data = result
+
+        logger.debug("Persons load successful len=%s", len(response_data))
+        return response_data
+
+    def _get_persons_request(
+        self,
+        url: str,
+        params: dict,
+        fields: list[str] | None,
+        page_consumer: Callable | None,
+    ) -> list[dict] | None:
+        """Helper which requests all pages of persons.
 
+        Arguments:
+            url: url of the persons endpoint
+            params: additional params e.g. ids filter
+            fields: only keep these fields of each person
+            page_consumer: receives the persons of each page
+
+        Returns:
+            list of user dicts or None on failure
+        """
+        params = {"limit": self._get_page_size(url), **params}  # see self.page_sizes
         headers = {"accept": "application/json"}
         response = self.session.get(url=url, headers=headers, params=params)
 
         if response.status_code == requests.codes.ok:
-            response_content = json.loads(response.content)
-            response_data = response_content["data"].copy()
+            response_content = decode_json(response.content)
+            response_data = response_content["data"]
 
             logger.debug(
                 "len of first response of GET Persons successful len=%s",
@@ -65,24 +122,105 @@ class ChurchToolsApiPersons(ChurchToolsApiAbstract):
             response_data = self.combine_paginated_response_data(
                 response_content,
                 url=url,
+                fields=fields,
+                page_consumer=page_consumer,
                 headers=headers,
                 params=params,
             )
-            response_data = (
-                [response_data] if isinstance(response_data, dict) else response_data
-            )
+            return [response_data] if isinstance(response_data, dict) else response_data
+        logger.info("Persons requested failed: %s", response.status_code)
+        return None
+
+    def _get_persons_by_ids(
+        self,
+        url: str,
+        ids: list[int],
+        fields: list[str] | None,
+        page_consumer: Callable | None,
+    ) -> list[dict] | None:
+        """Helper which looks up persons by id using the cheapest plan.
 
-            if kwargs.get("returnAsDict") and "serviceId" not in kwargs:
-                result = {}
-                for item in response_data:
-                    result[item["id"]] = item
-                response_data = result
+        Arguments:
+            url: url of the persons endpoint
+            ids: requested person ids
+            fields: only keep these fields of each person
+            page_consumer: receives the persons of each request
 
-            logger.debug("Persons load successful len=%s", len(response_data))
+        Returns:
+            list of user dicts or None on failure
+        """
+        plan = self._plan_lookup(url, ids, strategies=(PER_ID, ID_FILTER, FULL_SCAN))
+
+        if plan.strategy == FULL_SCAN:
+            wanted = set(ids)
+            response_data = []
+            size = 0
+            scan_fields = [*fields, "id"] if fields and "id" not in fields else fields
+
+            def filter_page(persons: list[dict]) -> None:
+                nonlocal size
+                size += len(persons)
+                matching = select_fields(
+                    [person for person in persons if person["id"] in wanted], fields
+                )
+                if page_consumer:
+                    page_consumer(matching)
+                else:
+                    response_data.extend(matching)
+
+            if (
+                self._get_persons_request(
+                    url, params={}, fields=scan_fields, page_consumer=filter_page
+                )
+                is None
+            ):
+                return None
+            self.planner.record_size(normalize_endpoint(url), size)
             return response_data
-        logger.info("Persons requested failed: %s", response.status_code)
+
+        response_data = []
+        for chunk in plan.chunks:
+            if plan.strategy == PER_ID:
+                persons = self._get_person(url, chunk[0], fields)
+                if persons and page_consumer:
+                    page_consumer(persons)
+                    persons = []
+            else:
+                persons = self._get_persons_request(
+                    url,
+                    params={"ids[]": list(chunk)},
+                    fields=fields,
+                    page_consumer=page_consumer,
+                )
+            if persons is None:
+                return None
+            response_data.extend(persons)
+        return response_data
+
+    def _get_person(
+        self, url: str, person_id: int, fields: list[str] | None
+    ) -> list[dict] | None:
+        """Helper which requests a single person.
+
+        Arguments:
+            url: url of the persons endpoint
+            person_id: id of the person
+            fields: only keep these fields of the person
+
+        Returns:
+            list with the person - empty if not found - or None on failure
+        """
+        response = self.session.get(
+            url=f"{url}/{person_id}", headers={"accept": "application/json"}
+        )
+        if response.status_code == requests.codes.ok:
+            return [select_fields(decode_json(response.content)["data"], fields)]
+        if response.status_code == requests.codes.not_found:
+            return []
+        logger.info("Person %s requested failed: %s", person_id, response.status_code)
         return None
 
+    @cached_reference_data
     def get_persons_masterdata(
         self,
         *,
@@ -108,8 +246,8 @@ class ChurchToolsApiPersons(ChurchToolsApiAbstract):
         response = self.session.get(url=url, headers=headers)
 
         if response.status_code == requests.codes.ok:
-            response_content = json.loads(response.content)
-            response_data = response_content["data"].copy()
+            response_content = decode_json(response.content)
+            response_data = response_content["data"]
 
             if resultClass:
                 response_data = response_data[resultClass]
@@ -191,8 +329,8 @@ class ChurchToolsApiPersons(ChurchToolsApiAbstract):
         # use reposonse
 
         if response.status_code == requests.codes.created:
-            response_content = json.loads(response.content)
-            response_data = response_content["data"].copy()
+            response_content = decode_json(response.content)
+            response_data = response_content["data"]
 
             logger.debug("Person creation successful id=%s", response_data.get("id"))
             return response_data
@@ -0,0 +1,180 @@
+"""module containing the query planner of id filtered lookups.
+
+Looking up items by id can be done in three ways:
+    per_id - one request for each id e.g. /api/persons/{id}
+    id_filter - chunks of ids as filter param e.g. /api/persons?ids[]=1&ids[]=2
+    full_scan - downloading the whole collection and filtering locally
+
+The planner estimates the cost of each strategy supported by an endpoint
+using the number of requested ids and the known size of the collection
+and picks the cheapest. One round trip costs 1 and each transferred item
+item_cost. Collection sizes are learned from full scans - until then
+unknown_size is assumed. Ids matching several items e.g. the members of a
+group are weighted by the learned number of items per id.
+"""
+
+import logging
+import math
+import threading
+from collections.abc import Iterable
+from dataclasses import dataclass
+
+logger = logging.getLogger(__name__)
+
+PER_ID = "per_id"
+ID_FILTER = "id_filter"
+FULL_SCAN = "full_scan"
+
+# ids per request keep the url short enough for proxies and web servers
+MAX_IDS_PER_REQUEST = 100
+ITEM_COST = 0.01
+UNKNOWN_SIZE = 1000
+
+
+@dataclass(frozen=True)
+class QueryPlan:
+    """Strategy chosen for one lookup and the ids of each request."""
+
+    strategy: str
+    chunks: tuple[tuple, ...]
+    cost: float
+
+
+class QueryPlanner:
+    """Thread safe planner which remembers statistics of collections by endpoint."""
+
+    def __init__(
+        self,
+        *,
+        max_ids_per_request: int = MAX_IDS_PER_REQUEST,
+        item_cost: float = ITEM_COST,
+        unknown_size: int = UNKNOWN_SIZE,
+    ) -> None:
+        """Prepares the planner.
+
+        Args:
+            max_ids_per_request: max number of ids used as filter of one request
+            item_cost: cost of transferring one item relative to one round trip
+            unknown_size: assumed collection size until a full scan was done
+        """
+        self.max_ids_per_request = max_ids_per_request
+        self.item_cost = item_cost
+        self.unknown_size = unknown_size
+        self._lock = threading.Lock()
+        self._sizes: dict[str, int] = {}
+        self._items_per_id: dict[str, float] = {}
+
+    def record_size(self, endpoint: str, size: int) -> None:
+        """Remembers the size of a collection after downloading all of it.
+
+        Args:
+            endpoint: endpoint template e.g. /api/persons
+            size: number of items
+        """
+        with self._lock:
+            self._sizes[endpoint] = size
+
+    def size(self, endpoint: str) -> int | None:
+        """Known size of a collection.
+
+        Args:
+            endpoint: endpoint template e.g. /api/persons
+
+        Returns:
+            number of items or None if unknown
+        """
+        with self._lock:
+            return self._sizes.get(endpoint)
+
+    def record_items_per_id(self, endpoint: str, items_per_id: float) -> None:
+        """Remembers the average number of items matching one id.
+
+        Args:
+            endpoint: endpoint template e.g. /api/groups/members
+            items_per_id: e.g. the average number of members of a group
+        """
+        with self._lock:
+            self._items_per_id[endpoint] = items_per_id
+
+    def items_per_id(self, endpoint: str) -> float:
+        """Known average number of items matching one id.
+
+        Args:
+            endpoint: endpoint template e.g. /api/groups/members
+
+        Returns:
+            number of items - 1 if unknown
+        """
+        with self._lock:
+            return self._items_per_id.get(endpoint, 1.0)
+
+    def plan(  # noqa: PLR0913
+        self,
+        endpoint: str,
+        ids: Iterable,
+        *,
+        page_size: int,
+        strategies: Iterable[str] = (PER_ID, ID_FILTER, FULL_SCAN),
+        max_ids_per_request: int | None = None,
+        items_per_id: float | None = None,
+    ) -> QueryPlan:
+        """Chooses the cheapest strategy to look up items by id.
+
+        Args:
+            endpoint: endpoint template of the collection e.g. /api/persons
+            ids: requested ids - duplicates are removed
+            page_size: limit param used for paginated requests
+            strategies: strategies supported by the endpoint
+            max_ids_per_request: overrides max_ids_per_request of the planner
+            items_per_id: expected number of items matching one id.
+                Defaults to the value learned for the endpoint
+
+        Raises:
+            ValueError: for unknown strategies
+
+        Returns:
+            the plan - chunks contain one id each for per_id, up to
+                max_ids_per_request ids for id_filter and none for full_scan
+        """
+        ids = tuple(dict.fromkeys(ids))
+        chunk_size = max_ids_per_request or self.max_ids_per_request
+        size = self.size(endpoint)
+        size = self.unknown_size if size is None else size
+        if items_per_id is None:
+            items_per_id = self.items_per_id(endpoint)
+        # requested ids exceeding the collection can not be found anyway
+        found = min(len(ids) * items_per_id, size)
+
+        plans = []
+        for strategy in strategies:
+            if strategy == PER_ID:
+                chunks = tuple((item_id,) for item_id in ids)
+                requests = len(ids) * max(1, math.ceil(items_per_id / page_size))
+                cost = requests + found * self.item_cost
+            elif strategy == ID_FILTER:
+                chunks = tuple(
+                    ids[index : index + chunk_size]
+                    for index in range(0, len(ids), chunk_size)
+                )
+                pages = sum(
+                    max(1, math.ceil(min(len(chunk) * items_per_id, size) / page_size))
+                    for chunk in chunks
+                )
+                cost = pages + found * self.item_cost
+            elif strategy == FULL_SCAN:
+                chunks = ()
+                cost = max(1, math.ceil(size / page_size)) + size * self.item_cost
+            else:
+                msg = f"unknown strategy {strategy}"
+                raise ValueError(msg)
+            plans.append(QueryPlan(strategy=strategy, chunks=chunks, cost=cost))
+
+        plan = min(plans, key=lambda plan: plan.cost)
+        logger.debug(
+            "%s ids of %s using %s (cost %.2f)",
+            len(ids),
+            endpoint,
+            plan.strategy,
+            plan.cost,
+        )
+        return plan
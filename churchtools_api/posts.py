@@ -1,6 +1,5 @@
 """module containing parts used for posts handling."""
 
-import json
 import logging
 from datetime import datetime
 from enum import Enum
@@ -8,7 +7,10 @@ from enum import Enum
 import requests
 from tzlocal import get_localzone
 
-from churchtools_api.churchtools_api_abstract import ChurchToolsApiAbstract
+from churchtools_api.churchtools_api_abstract import (
+    ChurchToolsApiAbstract,
+    decode_json,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -40,7 +42,7 @@ class ChurchToolsApiPosts(ChurchToolsApiAbstract):
 
     def __init__(self) -> None:
         """Inherited initialization."""
-        super()
+        super().__init__()
 
     def get_posts(  # noqa: C901, PLR0912, PLR0913
         self,
@@ -122,8 +124,8 @@ class ChurchToolsApiPosts(ChurchToolsApiAbstract):
         response = self.session.get(url=url, headers=headers, params=params)
 
         if response.status_code == requests.codes.ok:
-            response_content = json.loads(response.content)
-            response_data = response_content["data"].copy()
+            response_content = decode_json(response.content)
+            response_data = response_content["data"]
 
             logger.debug(
                 "len of first response of GET posts successful len=%s",
@@ -198,8 +200,8 @@ class ChurchToolsApiPosts(ChurchToolsApiAbstract):
         response = self.session.get(url=url, headers=headers, params=params)
 
         if response.status_code == requests.codes.ok:
-            response_content = json.loads(response.content)
-            response_data = response_content["data"].copy()
+            response_content = decode_json(response.content)
+            response_data = response_content["data"]
 
             logger.debug(
                 "len of first response of GET Persons successful len=%s",
@@ -2,15 +2,82 @@
 
 ChurchTools API usually responds code 429 on excessive use
  - repeating request after timeout will suceed
+Concurrent identical GET requests can share one response (single flight)
+Each attempt uses a timeout and all attempts are limited by the time budget
+An optional circuit breaker fails requests immediately while the server is unhealthy
+Transient failures of idempotent requests are repeated (see retry.RetryPolicy)
+An optional scheduler sends requests of higher priority lanes first
+Sessions can be shared by threads - use pool_maxsize to match the number of threads
+Requests failing because of an expired login or CSRF token are repeated once
+after the login was renewed by the reauthenticate callback
 """
+import copy
 import logging
-from time import sleep
+import threading
+from collections.abc import Callable, Iterator
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from contextlib import contextmanager
+from contextvars import ContextVar
+from time import perf_counter, sleep
 from typing import override
 
 import requests
+from requests.adapters import HTTPAdapter
+
+from churchtools_api.circuitbreaker import OPEN, CircuitBreaker, CircuitOpenError
+from churchtools_api.deadlines import (
+    Deadline,
+    DeadlineExceededError,
+    current_deadline,
+    time_budget,
+)
+from churchtools_api.metrics import RequestMetrics, normalize_endpoint
+from churchtools_api.retry import RetryPolicy
+from churchtools_api.scheduler import PriorityScheduler, current_lane
+from churchtools_api.tracing import Tracer
 
 logger = logging.getLogger(__name__)
 
+RATE_LIMIT_WAIT_SECONDS = 15.0
+# total seconds one request waits for rate limits before returning the 429 response
+MAX_RATE_LIMIT_WAIT_SECONDS = 300.0
+# seconds for connecting and for receiving data of each attempt
+DEFAULT_TIMEOUT = (10.0, 60.0)
+DEFAULT_RETRY_POLICY = RetryPolicy()
+
+_reauthentication_disabled: ContextVar[bool] = ContextVar(
+    "reauthentication_disabled", default=False
+)
+_last_request_latency: ContextVar[float | None] = ContextVar(
+    "last_request_latency", default=None
+)
+
+
+def last_request_latency() -> float | None:
+    """Seconds the last request of the current context took including retries.
+
+    Used to measure the first page of paginated requests which is sent by
+    each getter itself.
+
+    Returns:
+        seconds or None if no request was sent
+    """
+    return _last_request_latency.get()
+
+
+@contextmanager
+def without_reauthentication() -> Iterator[None]:
+    """Context manager for requests which must not trigger a re-authentication.
+
+    Used by login requests - a failed login is returned to the caller instead.
+    """
+    token = _reauthentication_disabled.set(True)
+    try:
+        yield
+    finally:
+        _reauthentication_disabled.reset(token)
+
 
 class RateLimitedSession(requests.Session):
     """This class wraps request.Sessions most important methods.
@@ -18,26 +85,486 @@ class RateLimitedSession(requests.Session):
     with rate limits and retry
     """
 
-    def __init__(self) -> None:
-        """Inits session with additional params."""
+    def __init__(  # noqa: PLR0913
+        self,
+        metrics: RequestMetrics | None = None,
+        tracer: Tracer | None = None,
+        *,
+        coalesce_requests: bool = False,
+        timeout: float | tuple[float, float] | None = DEFAULT_TIMEOUT,
+        time_budget: float | None = None,
+        circuit_breaker: CircuitBreaker | None = None,
+        retry_policy: RetryPolicy | None = DEFAULT_RETRY_POLICY,
+        scheduler: PriorityScheduler | None = None,
+        pool_maxsize: int | None = None,
+        max_rate_limit_wait: float | None = MAX_RATE_LIMIT_WAIT_SECONDS,
+    ) -> None:
+        """Inits session with additional params.
+
+        Args:
+            metrics: collection used to record each request.
+                Defaults to a new empty collection
+            tracer: used to record a span for each request.
+                Defaults to a new disabled tracer
+            coalesce_requests: concurrent GET requests with the same url, params
+                and headers (incl. auth and cookies) share the response
+                of the request which was sent first. Defaults to False
+                because a request waiting for a response sent earlier
+                might not see changes made by the waiting thread itself
+            timeout: used for each attempt if a request does not pass a timeout
+                seconds or (connect, read) like requests. Defaults to DEFAULT_TIMEOUT
+            time_budget: default seconds for each public api method call
+                including all requests, retries and waiting for rate limits.
+                Defaults to None which does not limit the total time
+            circuit_breaker: fails requests immediately while the server
+                is unhealthy - can be shared by sessions of the same server.
+                Defaults to None which always sends requests
+            retry_policy: repeats transient failures of idempotent requests.
+                POST requests are only repeated if passing retry_safe=True.
+                Defaults to DEFAULT_RETRY_POLICY - None disables retries
+            scheduler: shares a request budget between priority lanes
+                (see scheduler.priority) - can be shared by sessions of a tenant.
+                Defaults to None which sends requests immediately
+            pool_maxsize: number of connections kept open for each host
+                - should match the number of threads sharing the session.
+                Defaults to None using the requests default of 10
+            max_rate_limit_wait: total seconds each request waits for repeated
+                429 responses before the last one is returned to the caller.
+                Defaults to MAX_RATE_LIMIT_WAIT_SECONDS - None waits without limit
+                which should be combined with a time_budget
+        """
         logger.debug("init rate limited session")
         super().__init__()
+        self.metrics = metrics if metrics is not None else RequestMetrics()
+        self.tracer = tracer if tracer is not None else Tracer()
+        self.coalesce_requests = coalesce_requests
+        self.timeout = timeout
+        self.time_budget = time_budget
+        self.circuit_breaker = circuit_breaker
+        self.retry_policy = retry_policy
+        self.scheduler = scheduler
+        self.pool_maxsize = pool_maxsize
+        self.max_rate_limit_wait = max_rate_limit_wait
+        if pool_maxsize:
+            adapter = HTTPAdapter(pool_maxsize=pool_maxsize)
+            self.mount("https://", adapter)
+            self.mount("http://", adapter)
+        self._headers_lock = threading.Lock()
+        # renews an expired login keeping this session - set by a successful login
+        self.reauthenticate: Callable[[], bool] | None = None
+        self._auth_lock = threading.Lock()
+        self._auth_generation = 0
+        self._in_flight: dict[tuple, Future] = {}
+        self._in_flight_lock = threading.Lock()
+
+    def settings(self) -> dict:
+        """Configuration which can be used to create a similar session.
+
+        Returns:
+            keyword arguments of RateLimitedSession including metrics and tracer
+        """
+        return {
+            "metrics": self.metrics,
+            "tracer": self.tracer,
+            "coalesce_requests": self.coalesce_requests,
+            "timeout": self.timeout,
+            "time_budget": self.time_budget,
+            "circuit_breaker": self.circuit_breaker,
+            "retry_policy": self.retry_policy,
+            "scheduler": self.scheduler,
+            "pool_maxsize": self.pool_maxsize,
+            "max_rate_limit_wait": self.max_rate_limit_wait,
+        }
+
+    def set_header(self, name: str, value: str | None) -> None:
+        """Changes a default header of all following requests - thread safe.
+
+        The headers are replaced by a modified copy because requests
+        of other threads might be iterating the current headers.
+
+        Args:
+            name: header e.g. CSRF-Token
+            value: new value - None removes the header
+        """
+        with self._headers_lock:
+            headers = self.headers.copy()
+            if value is None:
+                headers.pop(name, None)
+            else:
+                headers[name] = value
+            self.headers = headers
+
+    @staticmethod
+    def _attempt_timeout(
+        timeout: float | tuple[float, float] | None,
+        deadline: Deadline | None,
+        detail: str,
+    ) -> float | tuple[float, float] | None:
+        """Helper which limits the timeout of one attempt to the remaining budget.
+
+        Args:
+            timeout: timeout of the request or session
+            deadline: current deadline - None if unlimited
+            detail: description used in the error message
+
+        Raises:
+            DeadlineExceededError: if the budget is used up already
+
+        Returns:
+            timeout which can be passed to requests
+        """
+        if deadline is None:
+            return timeout
+        remaining = deadline.remaining()
+        if remaining <= 0:
+            raise DeadlineExceededError(deadline, detail)
+        if timeout is None:
+            return remaining
+        if isinstance(timeout, tuple):
+            return tuple(
+                remaining if part is None else min(part, remaining) for part in timeout
+            )
+        return min(timeout, remaining)
+
+    def _rate_limited_request(
+        self, method: str, url: str, *, retry_safe: bool = False, **kwargs: dict
+    ) -> requests.Response:
+        """Rate limiting execution of original request method.
+
+        Transient failures are repeated according to the retry_policy.
+        All attempts are limited by the time budget of the api call
+        or the time_budget of the session if called directly.
+        Waiting for rate limits is limited by max_rate_limit_wait.
+        """
+        endpoint = f"{method.upper()} {normalize_endpoint(url)}"
+        budget = None if current_deadline() else self.time_budget
+        with time_budget(budget, operation=endpoint) as deadline:
+            timeout = kwargs.pop("timeout", self.timeout)
+            attempt = 0
+            retries = 0
+            reauthenticated = False
+            rate_limit_wait = 0.0
+            while True:
+                attempt += 1
+                auth_generation = self._auth_generation
+                try:
+                    result = self._send_attempt(
+                        method, url, attempt=attempt, timeout=timeout, **kwargs
+                    )
+                except requests.RequestException as exception:
+                    if not self._retry(
+                        method,
+                        url,
+                        retries=retries,
+                        safe=retry_safe,
+                        exception=exception,
+                    ):
+                        raise
+                    retries += 1
+                    continue
+                if self._retry(
+                    method, url, retries=retries, safe=retry_safe, response=result
+                ):
+                    retries += 1
+                    continue
+                if (
+                    not reauthenticated
+                    and self._is_auth_failure(result)
+                    and self._reauthenticate(auth_generation)
+                ):
+                    reauthenticated = True
+                    self.metrics.record_reauthentication(method=method, url=url)
+                    continue
+                if result.status_code != requests.codes.too_many_requests:
+                    return result
+
+                if deadline and deadline.remaining() < RATE_LIMIT_WAIT_SECONDS:
+                    raise DeadlineExceededError(deadline, f"rate limited by {endpoint}")
+                if self.circuit_breaker and self.circuit_breaker.state == OPEN:
+                    msg = f"circuit breaker open - not repeating {endpoint}"
+                    raise CircuitOpenError(msg)
+                if (
+                    self.max_rate_limit_wait is not None
+                    and rate_limit_wait + RATE_LIMIT_WAIT_SECONDS
+                    > self.max_rate_limit_wait
+                ):
+                    logger.warning(
+                        "%s still rate limited after waiting %s sec - giving up",
+                        endpoint,
+                        rate_limit_wait,
+                    )
+                    return result
+                logger.info(
+                    "rate limit reached - waiting 15 sec before repeating request"
+                )
+                sleep(RATE_LIMIT_WAIT_SECONDS)
+                rate_limit_wait += RATE_LIMIT_WAIT_SECONDS
+                self.metrics.record_backoff(
+                    method=method, url=url, seconds=RATE_LIMIT_WAIT_SECONDS
+                )
 
-    def _rate_limited_request(self, method, url, **kwargs) -> requests.Response:  # noqa: ANN001, ANN003
-        """Rate limiting execution of original request method."""
-        result = super().request(method, url, **kwargs)
+    @staticmethod
+    def _is_auth_failure(response: requests.Response) -> bool:
+        """Helper which checks if a response was rejected because of the login.
 
-        while result.status_code == requests.codes.too_many_requests:
-            logger.info("rate limit reached - waiting 15 sec before repeating request")
-            sleep(15.0)
-            result = self._rate_limited_request(method=method, url=url, **kwargs)
+        Args:
+            response: response of an attempt
+
+        Returns:
+            True for 401 responses and 403 responses mentioning the CSRF token
+        """
+        if response.status_code == requests.codes.unauthorized:
+            return True
+        return (
+            response.status_code == requests.codes.forbidden
+            and b"csrf" in response.content.lower()
+        )
+
+    def _reauthenticate(self, auth_generation: int) -> bool:
+        """Helper which renews the login once for all concurrent failed requests.
+
+        Requests failing at the same time wait for the first one renewing the login
+        and are repeated afterwards without logging in again.
+
+        Args:
+            auth_generation: number of renewals when the failed attempt was sent
+
+        Returns:
+            True if the failed request should be repeated
+        """
+        if self.reauthenticate is None or _reauthentication_disabled.get():
+            return False
+        with self._auth_lock:
+            if self._auth_generation != auth_generation:
+                return True
+            logger.info("login expired - renewing login")
+            with without_reauthentication():
+                renewed = self.reauthenticate()
+            # requests failed meanwhile are repeated once even if renewing failed
+            self._auth_generation += 1
+            return renewed
+
+    def _retry(  # noqa: PLR0913
+        self,
+        method: str,
+        url: str,
+        *,
+        retries: int,
+        safe: bool,
+        response: requests.Response | None = None,
+        exception: Exception | None = None,
+    ) -> bool:
+        """Helper which waits before repeating a failed attempt if allowed.
+
+        Attempts are not repeated if the back-off exceeds the time budget.
+
+        Args:
+            method: HTTP method
+            url: url of the request
+            retries: number of retries already used for this request
+            safe: caller marked the request as safe to repeat
+            response: response of the attempt if one was received
+            exception: exception raised by the attempt if no response was received
+
+        Returns:
+            True if the attempt should be repeated now
+        """
+        if self.retry_policy is None or not self.retry_policy.should_retry(
+            method, retries=retries, safe=safe, response=response, exception=exception
+        ):
+            return False
+        seconds = self.retry_policy.backoff(retries + 1)
+        deadline = current_deadline()
+        if deadline and deadline.remaining() < seconds:
+            return False
+        logger.info(
+            "retrying %s %s in %.2f seconds after %s",
+            method.upper(),
+            url,
+            seconds,
+            response.status_code if response is not None else repr(exception),
+        )
+        sleep(seconds)
+        self.metrics.record_retry(method=method, url=url, seconds=seconds)
+        return True
+
+    def _send_attempt(
+        self,
+        method: str,
+        url: str,
+        *,
+        attempt: int,
+        timeout: float | tuple[float, float] | None,
+        **kwargs: dict,
+    ) -> requests.Response:
+        """Helper which sends one attempt of a request.
+
+        Records metrics, the tracing span and the result for the circuit breaker.
+        Repeated 429 responses count as failure of the server.
+
+        Args:
+            method: HTTP method
+            url: url of the request
+            attempt: number of the attempt starting with 1
+            timeout: timeout of the request or session
+            kwargs: passthrough to requests.Session.request
+
+        Returns:
+            the response
+
+        Raises:
+            CircuitOpenError: instead of sending while the circuit breaker is open
+            DeadlineExceededError: if the time budget is used up
+                e.g. while queued in its priority lane
+        """
+        endpoint = f"{method.upper()} {normalize_endpoint(url)}"
+        deadline = current_deadline()
+        if self.scheduler:
+            waited = self.scheduler.acquire(current_lane(), deadline)
+            self.metrics.record_queue_wait(method=method, url=url, seconds=waited)
+        attempt_timeout = self._attempt_timeout(
+            timeout, deadline, f"sending {endpoint}"
+        )
+
+        breaker = self.circuit_breaker
+        permit = None
+        if breaker:
+            permit = breaker.allow_request()
+            self.metrics.record_circuit_state(breaker.state)
+            if permit is None:
+                self.metrics.record_rejected(method=method, url=url)
+                msg = f"circuit breaker open - {endpoint} not sent"
+                raise CircuitOpenError(msg)
+
+        try:
+            with self.tracer.span(endpoint, kind="CLIENT", attempt=attempt) as span:
+                start = perf_counter()
+                try:
+                    result = super().request(
+                        method, url, timeout=attempt_timeout, **kwargs
+                    )
+                except requests.RequestException as exception:
+                    if breaker:
+                        breaker.record(
+                            permit,
+                            failed=isinstance(
+                                exception, requests.Timeout | requests.ConnectionError
+                            ),
+                        )
+                        self.metrics.record_circuit_state(breaker.state)
+                    if (
+                        isinstance(exception, requests.Timeout)
+                        and deadline
+                        and deadline.remaining() <= 0
+                    ):
+                        raise DeadlineExceededError(
+                            deadline, f"waiting for {endpoint}"
+                        ) from exception
+                    raise
+                self.metrics.record_request(
+                    method=method,
+                    url=url,
+                    response=result,
+                    latency=perf_counter() - start,
+                )
+                if span:
+                    span.tags["http.status_code"] = str(result.status_code)
+
+            if breaker:
+                breaker.record(
+                    permit,
+                    failed=result.status_code >= requests.codes.internal_server_error
+                    or (
+                        result.status_code == requests.codes.too_many_requests
+                        and attempt > 1
+                    ),
+                )
+                self.metrics.record_circuit_state(breaker.state)
+        finally:
+            # e.g. unexpected exceptions would keep a probe slot taken forever
+            if breaker:
+                breaker.release(permit)
+        return result
+
+    def _coalescing_key(self, url: str, **kwargs: dict) -> tuple:
+        """Helper which identifies requests with the same result.
+
+        Args:
+            url: url of the request
+            kwargs: params and headers of the request
+
+        Returns:
+            prepared url and all headers including auth and cookies
+        """
+        prepared = self.prepare_request(
+            requests.Request(
+                "GET", url, params=kwargs.get("params"), headers=kwargs.get("headers")
+            )
+        )
+        return prepared.url, tuple(sorted(prepared.headers.items()))
+
+    def _single_flight_request(self, url, **kwargs) -> requests.Response:  # noqa: ANN001, ANN003
+        """GET request which shares the response with identical concurrent requests.
+
+        Waiting requests receive a shallow copy of the response
+        or the exception raised by the request which was sent.
+        If that request exceeded a time budget other than the one of the waiting
+        request, the waiting request is sent again.
+        """
+        key = self._coalescing_key(url, **kwargs)
+        deadline = current_deadline()
+        while True:
+            with self._in_flight_lock:
+                in_flight = self._in_flight.get(key)
+                if in_flight is None:
+                    future = self._in_flight[key] = Future()
+            if in_flight is None:
+                break
+            logger.debug("waiting for identical request in flight %s", url)
+            self.metrics.record_coalesced(method="GET", url=url)
+            try:
+                return copy.copy(
+                    in_flight.result(timeout=deadline.remaining() if deadline else None)
+                )
+            # before FutureTimeoutError which is a base class since Python 3.11
+            except DeadlineExceededError as exception:
+                if exception.deadline is deadline or (
+                    deadline and deadline.remaining() <= 0
+                ):
+                    raise
+                logger.debug("identical request ran out of budget - sending %s", url)
+            except FutureTimeoutError as exception:
+                raise DeadlineExceededError(
+                    deadline, f"waiting for identical request {url}"
+                ) from exception
 
+        try:
+            result = self._rate_limited_request("GET", url, **kwargs)
+        except BaseException as exception:
+            future.set_exception(exception)
+            raise
+        finally:
+            # requests started afterwards are sent again
+            with self._in_flight_lock:
+                del self._in_flight[key]
+        future.set_result(result)
         return result
 
     @override
     def request(self, method, url, **kwargs) -> requests.Response:  # noqa: ANN001, ANN003
         """See sessions.requests for more details.
 
-        Only adds rate_limit
+        Only adds rate_limit, retries, metrics, tracing and optional single flight GET
+        The additional keyword retry_safe=True allows repeating POST requests.
         """
-        return self._rate_limited_request(method, url, **kwargs)
+        start = perf_counter()
+        if (
+            self.coalesce_requests
+            and method.upper() == "GET"
+            and not kwargs.get("stream")
+        ):
+            response = self._single_flight_request(url, **kwargs)
+        else:
+            response = self._rate_limited_request(method, url, **kwargs)
+        _last_request_latency.set(perf_counter() - start)
+        return response
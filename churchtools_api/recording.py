@@ -0,0 +1,200 @@
+"""module containing transport adapters to record and replay HTTP traffic.
+
+A RecordingAdapter is mounted on a session and saves all request/response pairs
+to a gzip compressed JSON lines file. A ReplayAdapter answers requests
+from such a file without network access - either with the original or
+compressed timing. This allows deterministic offline profiling
+with production shaped payloads.
+
+Request headers are never saved because they contain the login token.
+Response bodies are saved as they are - recordings of production instances
+can contain personal data and must be handled like a database export.
+"""
+
+import base64
+import gzip
+import json
+import logging
+import threading
+import time
+from collections import defaultdict, deque
+from io import BytesIO
+from pathlib import Path
+from typing import override
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.response import HTTPResponse
+
+logger = logging.getLogger(__name__)
+
+RECORDING_VERSION = 1
+
+# headers which do not apply to the decoded body stored in a recording
+IGNORED_RESPONSE_HEADERS = {
+    "content-encoding",
+    "content-length",
+    "set-cookie",
+    "transfer-encoding",
+}
+
+
+def _request_key(method: str, url: str) -> str:
+    """Helper which identifies a request independent of the domain.
+
+    Args:
+        method: HTTP method
+        url: full url including query
+
+    Returns:
+        e.g. "GET /api/persons?limit=50&page=2"
+    """
+    split_url = urlsplit(url)
+    query = f"?{split_url.query}" if split_url.query else ""
+    return f"{method.upper()} {split_url.path}{query}"
+
+
+class RecordingAdapter(HTTPAdapter):
+    """HTTPAdapter which keeps a copy of each request/response pair.
+
+    Response bodies are read completely even for streamed requests.
+    """
+
+    def __init__(self, **kwargs: dict) -> None:
+        """Prepares an empty recording.
+
+        Args:
+            kwargs: passthrough to HTTPAdapter e.g. pool_maxsize
+        """
+        super().__init__(**kwargs)
+        self._lock = threading.Lock()
+        self.interactions = []
+
+    @override
+    def send(self, request, **kwargs) -> requests.Response:  # noqa: ANN001, ANN003
+        """Sends the request and records the response.
+
+        See HTTPAdapter.send for details.
+        """
+        start = time.perf_counter()
+        response = super().send(request, **kwargs)
+        content = response.content
+        elapsed = time.perf_counter() - start
+
+        interaction = {
+            "key": _request_key(request.method, request.url),
+            "status": response.status_code,
+            "headers": {
+                name: value
+                for name, value in response.headers.items()
+                if name.lower() not in IGNORED_RESPONSE_HEADERS
+            },
+            "elapsed": round(elapsed, 6),
+        }
+        try:
+            interaction["body"] = content.decode()
+        except UnicodeDecodeError:
+            interaction["body_base64"] = base64.b64encode(content).decode()
+        with self._lock:
+            self.interactions.append(interaction)
+        return response
+
+    def save(self, path: Path | str) -> int:
+        """Writes all recorded interactions to a compressed file.
+
+        Args:
+            path: target file e.g. recording.jsonl.gz
+
+        Returns:
+            number of interactions saved
+        """
+        with self._lock:
+            interactions = list(self.interactions)
+        with gzip.open(path, "wt", encoding="utf-8") as recording_file:
+            recording_file.write(json.dumps({"version": RECORDING_VERSION}) + "\n")
+            for interaction in interactions:
+                recording_file.write(json.dumps(interaction) + "\n")
+        logger.info("saved %s interactions to %s", len(interactions), path)
+        return len(interactions)
+
+
+class UnmatchedRequestError(requests.ConnectionError):
+    """Raised by ReplayAdapter for requests which were not recorded."""
+
+    # repeating the request would not find a recording either
+    retryable = False
+
+
+class ReplayAdapter(HTTPAdapter):
+    """HTTPAdapter which answers requests from a recording without network access.
+
+    Requests are matched by method, path and query - the domain is ignored.
+    Multiple responses for the same request are returned in recorded order,
+    the last one is repeated once all were used.
+    """
+
+    def __init__(
+        self, path: Path | str, *, timing_scale: float = 0.0, **kwargs: dict
+    ) -> None:
+        """Loads a recording.
+
+        Args:
+            path: file saved by RecordingAdapter.save
+            timing_scale: factor applied to the recorded duration of each response
+                1.0 replays the original timing, 0.1 is 10 times faster.
+                Defaults to 0.0 which responds without delay
+            kwargs: passthrough to HTTPAdapter
+
+        Raises:
+            ValueError: if the file is not a supported recording
+        """
+        super().__init__(**kwargs)
+        self.timing_scale = timing_scale
+        self._lock = threading.Lock()
+        self._responses = defaultdict(deque)
+        self.replayed = 0
+        self.unmatched = []
+
+        with gzip.open(path, "rt", encoding="utf-8") as recording_file:
+            header = json.loads(recording_file.readline())
+            if header.get("version") != RECORDING_VERSION:
+                msg = f"{path} is not a recording of version {RECORDING_VERSION}"
+                raise ValueError(msg)
+            for line in recording_file:
+                interaction = json.loads(line)
+                self._responses[interaction["key"]].append(interaction)
+
+    @override
+    def send(self, request, **kwargs) -> requests.Response:  # noqa: ANN001, ANN003
+        """Returns the recorded response of a request.
+
+        See HTTPAdapter.send for details.
+
+        Raises:
+            UnmatchedRequestError: if the request was not recorded
+        """
+        key = _request_key(request.method, request.url)
+        with self._lock:
+            recorded = self._responses.get(key)
+            if not recorded:
+                self.unmatched.append(key)
+                msg = f"no recorded response for {key}"
+                raise UnmatchedRequestError(msg, request=request)
+            interaction = recorded.popleft() if len(recorded) > 1 else recorded[0]
+            self.replayed += 1
+
+        if self.timing_scale:
+            time.sleep(interaction["elapsed"] * self.timing_scale)
+
+        if "body_base64" in interaction:
+            content = base64.b64decode(interaction["body_base64"])
+        else:
+            content = interaction["body"].encode()
+        raw = HTTPResponse(
+            body=BytesIO(content),
+            headers={**interaction["headers"], "Content-Length": str(len(content))},
+            status=interaction["status"],
+            preload_content=False,
+        )
+        return self.build_response(request, raw)
@@ -0,0 +1,300 @@
+"""module containing local expansion of calendar appointment series.
+
+ChurchTools stores a series appointment once and describes repetitions with
+repeatId, repeatFrequency, repeatUntil, repeatOption, exceptions and additions.
+The functions in this module expand such a definition into concrete occurrences
+for any date window without sending additional requests.
+"""
+
+import calendar
+import logging
+from datetime import UTC, date, datetime, timedelta, tzinfo
+
+from tzlocal import get_localzone
+
+logger = logging.getLogger(__name__)
+
+REPEAT_NONE = 0
+REPEAT_DAILY = 1
+REPEAT_WEEKLY = 7
+REPEAT_MONTHLY_BY_DATE = 31
+REPEAT_MONTHLY_BY_WEEKDAY = 32
+REPEAT_YEARLY = 365
+REPEAT_MANUAL = 999
+
+REPEAT_OPTION_LAST_WEEKDAY = 6
+
+LENGTH_OF_DATE_WITH_HYPHEN = 10
+DAYS_PER_WEEK = 7
+MONTHS_PER_YEAR = 12
+
+
+def parse_ct_date(value: str | date | datetime, timezone: tzinfo) -> datetime:
+    """Converts a ChurchTools date representation into an aware datetime.
+
+    Args:
+        value: either "2023-11-26T08:00:00Z", "2023-11-26", date or datetime
+        timezone: timezone used for date only values and naive datetimes
+
+    Returns:
+        timezone aware datetime in the requested timezone
+    """
+    if isinstance(value, datetime):
+        if value.tzinfo is None:
+            return value.replace(tzinfo=timezone)
+        return value.astimezone(timezone)
+    if isinstance(value, date):
+        return datetime(value.year, value.month, value.day, tzinfo=timezone)
+    if len(value) == LENGTH_OF_DATE_WITH_HYPHEN:
+        return datetime.strptime(value, "%Y-%m-%d").replace(tzinfo=timezone)
+    return datetime.fromisoformat(value.replace("Z", "+00:00")).astimezone(timezone)
+
+
+def format_ct_date(value: datetime, *, all_day: bool = False) -> str:
+    """Converts an aware datetime into the representation used by ChurchTools.
+
+    Args:
+        value: timezone aware datetime
+        all_day: if only the date part should be returned
+
+    Returns:
+        "2023-11-26" for all day appointments otherwise "2023-11-26T08:00:00Z"
+    """
+    if all_day:
+        return value.strftime("%Y-%m-%d")
+    return value.astimezone(UTC).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def _add_months(value: datetime, months: int) -> datetime | None:
+    """Helper moving a datetime by full months keeping the day of month.
+
+    Args:
+        value: the reference datetime
+        months: number of months to move
+
+    Returns:
+        datetime or None if the day does not exist in the target month
+    """
+    month_index = value.month - 1 + months
+    year = value.year + month_index // MONTHS_PER_YEAR
+    month = month_index % MONTHS_PER_YEAR + 1
+    if value.day > calendar.monthrange(year, month)[1]:
+        return None
+    return value.replace(year=year, month=month)
+
+
+def _nth_weekday_of_month(
+    reference: datetime, year: int, month: int, repeat_option: int | None
+) -> datetime | None:
+    """Helper calculating e.g. the 2nd sunday of a month.
+
+    Args:
+        reference: datetime of the first occurrence - defines weekday and time
+        year: target year
+        month: target month
+        repeat_option: number of the week within the month
+            6 is used by ChurchTools for the last weekday of a month
+            defaults to the week of the reference if not set
+
+    Returns:
+        datetime or None if the month does not have such a weekday
+    """
+    if not repeat_option:
+        repeat_option = (reference.day - 1) // DAYS_PER_WEEK + 1
+    days_in_month = calendar.monthrange(year, month)[1]
+    first_weekday = date(year, month, 1).weekday()
+    first_day = 1 + (reference.weekday() - first_weekday) % DAYS_PER_WEEK
+    if repeat_option == REPEAT_OPTION_LAST_WEEKDAY:
+        day = first_day + (days_in_month - first_day) // DAYS_PER_WEEK * DAYS_PER_WEEK
+    else:
+        day = first_day + (repeat_option - 1) * DAYS_PER_WEEK
+    if day > days_in_month:
+        return None
+    return reference.replace(year=year, month=month, day=day)
+
+
+def _series_starts(
+    first_start: datetime,
+    repeat_id: int,
+    frequency: int,
+    repeat_option: int | None,
+    window: tuple[datetime, datetime],
+) -> list[datetime]:
+    """Generates all regular start datetimes of a series within a window.
+
+    Args:
+        first_start: start of the first occurrence in local time
+        repeat_id: ChurchTools repeat type
+        frequency: interval e.g. 2 for every second week
+        repeat_option: additional option for monthly by weekday
+        window: first and last datetime which should be considered
+            the first one is only used to skip ahead and might be undercut
+
+    Returns:
+        list of start datetimes in local time
+    """
+    since, until = window
+    starts = []
+    if repeat_id in (REPEAT_DAILY, REPEAT_WEEKLY):
+        step_days = repeat_id * frequency
+        # skip ahead - one additional step covers multi day appointments
+        count = max((since - first_start).days // step_days - 1, 0)
+        while (current := first_start + timedelta(days=step_days * count)) <= until:
+            starts.append(current)
+            count += 1
+    elif repeat_id in (
+        REPEAT_MONTHLY_BY_DATE,
+        REPEAT_MONTHLY_BY_WEEKDAY,
+        REPEAT_YEARLY,
+    ):
+        step_months = (
+            frequency * MONTHS_PER_YEAR if repeat_id == REPEAT_YEARLY else frequency
+        )
+        first_month = first_start.replace(day=1)
+        count = 0
+        while (month := _add_months(first_month, step_months * count)) <= until:
+            if repeat_id == REPEAT_MONTHLY_BY_WEEKDAY:
+                current = _nth_weekday_of_month(
+                    first_start, month.year, month.month, repeat_option
+                )
+            else:
+                current = _add_months(first_start, step_months * count)
+            if current is not None and first_start <= current <= until:
+                starts.append(current)
+            count += 1
+    else:
+        starts.append(first_start)
+    return starts
+
+
+def expand_appointment(
+    appointment: dict,
+    from_: str | date | datetime,
+    to_: str | date | datetime,
+    timezone: tzinfo | None = None,
+) -> list[dict]:
+    """Expands one appointment or series definition into concrete occurrences.
+
+    The result matches the simplified format of get_calendar_appointments
+    which means each occurrence is a copy of the appointment
+    with startDate and endDate overwritten by the actual date.
+
+    Arguments:
+        appointment: appointment dict as retrieved from ChurchTools
+            either the appointment itself or a dict with "base" or "appointment" key
+        from_: first day of the window (inclusive)
+        to_: last day of the window (inclusive)
+        timezone: zoneinfo timezone used for repetition - defaults to local timezone
+            series keep their local time across daylight saving time changes
+
+    Returns:
+        list of occurrences sorted by startDate
+    """
+    appointment = appointment.get("base", appointment.get("appointment", appointment))
+    if timezone is None:
+        timezone = get_localzone()
+
+    all_day = bool(appointment.get("allDay"))
+    window_start = parse_ct_date(from_, timezone).replace(
+        hour=0, minute=0, second=0, microsecond=0
+    )
+    window_end = parse_ct_date(to_, timezone).replace(
+        hour=23, minute=59, second=59, microsecond=0
+    )
+
+    first_start = parse_ct_date(appointment["startDate"], timezone)
+    first_end = parse_ct_date(appointment["endDate"], timezone)
+    duration = first_end - first_start
+
+    repeat_id = appointment.get("repeatId") or REPEAT_NONE
+    frequency = appointment.get("repeatFrequency") or 1
+    until = window_end
+    if repeat_until := appointment.get("repeatUntil"):
+        until = min(
+            until,
+            parse_ct_date(repeat_until[:LENGTH_OF_DATE_WITH_HYPHEN], timezone).replace(
+                hour=23, minute=59, second=59
+            ),
+        )
+
+    if repeat_id == REPEAT_MANUAL:
+        starts = [first_start]
+    else:
+        starts = _series_starts(
+            first_start=first_start,
+            repeat_id=repeat_id,
+            frequency=frequency,
+            repeat_option=appointment.get("repeatOption"),
+            window=(window_start - duration, until),
+        )
+
+    if repeat_id != REPEAT_NONE:
+        for addition in appointment.get("additions") or []:
+            addition_date = parse_ct_date(
+                addition["date"][:LENGTH_OF_DATE_WITH_HYPHEN], timezone
+            )
+            starts.append(
+                first_start.replace(
+                    year=addition_date.year,
+                    month=addition_date.month,
+                    day=addition_date.day,
+                )
+            )
+
+        exception_dates = {
+            exception["date"][:LENGTH_OF_DATE_WITH_HYPHEN]
+            for exception in appointment.get("exceptions") or []
+        }
+        starts = [
+            start
+            for start in starts
+            if start.strftime("%Y-%m-%d") not in exception_dates
+        ]
+
+    occurrences = []
+    for start in sorted(set(starts)):
+        end = start + duration
+        if start > window_end or end < window_start:
+            continue
+        occurrence = appointment.copy()
+        occurrence["startDate"] = format_ct_date(start, all_day=all_day)
+        occurrence["endDate"] = format_ct_date(end, all_day=all_day)
+        occurrences.append(occurrence)
+
+    logger.debug(
+        "expanded appointment %s into %s occurrences",
+        appointment.get("id"),
+        len(occurrences),
+    )
+    return occurrences
+
+
+def expand_appointments(
+    appointments: list[dict],
+    from_: str | date | datetime,
+    to_: str | date | datetime,
+    timezone: tzinfo | None = None,
+) -> list[dict]:
+    """Expands a list of appointments removing duplicate series definitions.
+
+    Arguments:
+        appointments: list of appointment dicts - series might be included
+            multiple times e.g. once per calculated date
+        from_: first day of the window (inclusive)
+        to_: last day of the window (inclusive)
+        timezone: timezone used for repetition - defaults to local timezone
+
+    Returns:
+        list of occurrences of all appointments sorted by startDate
+    """
+    definitions = {}
+    for appointment in appointments:
+        base = appointment.get("base", appointment.get("appointment", appointment))
+        definitions[base["id"]] = base
+
+    occurrences = []
+    for definition in definitions.values():
+        occurrences.extend(
+            expand_appointment(definition, from_=from_, to_=to_, timezone=timezone)
+        )
+    return sorted(occurrences, key=lambda item: (item["startDate"], item["id"]))
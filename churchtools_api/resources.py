@@ -1,11 +1,17 @@
 """module containing parts used for resource handling."""
 
-import json
 import logging
+from collections.abc import Callable
 
 import requests
 
-from churchtools_api.churchtools_api_abstract import ChurchToolsApiAbstract
+from churchtools_api.churchtools_api_abstract import (
+    ChurchToolsApiAbstract,
+    cached_reference_data,
+    decode_json,
+    select_fields,
+)
+from churchtools_api.planner import ID_FILTER
 
 logger = logging.getLogger(__name__)
 
@@ -19,8 +25,9 @@ class ChurchToolsApiResources(ChurchToolsApiAbstract):
 
     def __init__(self) -> None:
         """Inherited initialization."""
-        super()
+        super().__init__()
 
+    @cached_reference_data
     def get_resource_masterdata(
         self, *, resultClass: str | None = None, returnAsDict: bool = False
     ) -> dict:
@@ -46,7 +53,7 @@ class ChurchToolsApiResources(ChurchToolsApiAbstract):
         response = self.session.get(url=url, headers=headers)
 
         if response.status_code == requests.codes.ok:
-            response_content = json.loads(response.content)
+            response_content = decode_json(response.content)
 
             response_data = self.combine_paginated_response_data(
                 response_content,
@@ -72,7 +79,8 @@ class ChurchToolsApiResources(ChurchToolsApiAbstract):
 
         Keywords:
             booking_id: int: only one booking by id (use standalone only)
-            resource_ids:list[int]: required if not booking_id
+            resource_ids:list[int]: required if not booking_id - many ids are
+                requested in chunks (see planner)
             status_ids: list[int]: filter by list of stats ids
                 to consider (requires resource_ids)
             from_: datetime: date range to consider (use only with to_! -
@@ -81,13 +89,16 @@ class ChurchToolsApiResources(ChurchToolsApiAbstract):
                 might have a bug in API - Support Ticket 130123)
             appointment_id: int: get resources for one specific calendar_appointment
                 only (use together with to_ and from_ for performance reasons)
+            fields: list[str]: only keep these fields of each booking
+                nested fields are separated by dots e.g. "base.resource.id"
+            page_consumer: callable: receives the bookings of each page
+                instead of returning them - see churchtools_api.export
 
         Returns:
             list of bookings matching the criteria
         """
         url = self.domain + "/api/bookings"
-        headers = {"accept": "application/json"}
-        params = {"limit": 50}  # increases default pagination size
+        params = {"limit": self._get_page_size(url)}  # configured in self.page_sizes
 
         # at least one of the following arguments is required
         required_kwargs = ["booking_id", "resource_ids"]
@@ -98,21 +109,71 @@ class ChurchToolsApiResources(ChurchToolsApiAbstract):
             )
             return None
 
+        requests_params = [params]
         if booking_id := kwargs.get("booking_id"):
             url = url + f"/{booking_id}"
-        elif kwargs.get("resource_ids"):
+        elif resource_ids := kwargs.get("resource_ids"):
+            # many resources are requested in chunks keeping the url short
+            plan = self._plan_lookup(url, resource_ids, strategies=(ID_FILTER,))
             params = self._get_bookings_params(params=params, **kwargs)
+            requests_params = [
+                {**params, "resource_ids[]": list(chunk)} for chunk in plan.chunks
+            ]
+
+        result_list = []
+        for request_params in requests_params:
+            bookings = self._get_bookings_request(
+                url,
+                params=request_params,
+                appointment_id=kwargs.get("appointment_id"),
+                fields=kwargs.get("fields"),
+                page_consumer=kwargs.get("page_consumer"),
+            )
+            if bookings is None:
+                return None
+            result_list.extend(bookings)
+        return result_list
+
+    def _get_bookings_request(
+        self,
+        url: str,
+        params: dict,
+        appointment_id: int | None,
+        fields: list[str] | None,
+        page_consumer: Callable | None,
+    ) -> list[dict] | None:
+        """Helper which requests all pages of bookings.
 
+        Arguments:
+            url: url of the bookings endpoint or a single booking
+            params: params of the request
+            appointment_id: only keep bookings of this calendar appointment
+            fields: only keep these fields of each booking
+            page_consumer: receives the bookings of each page
+
+        Returns:
+            list of bookings or None on failure
+        """
+        headers = {"accept": "application/json"}
         response = self.session.get(url=url, headers=headers, params=params)
 
         if response.status_code != requests.codes.ok:
             logger.error(response.content)
             return None
-        response_content = json.loads(response.content)
+        response_content = decode_json(response.content)
+
+        if appointment_id and page_consumer:
+            consumer = page_consumer
+
+            def page_consumer(bookings: list[dict]) -> None:
+                consumer(self._filter_bookings(bookings, appointment_id, fields))
 
         response_data = self.combine_paginated_response_data(
             response_content,
             url=url,
+            # filtering by appointment requires the full items
+            fields=None if appointment_id else fields,
+            page_consumer=page_consumer,
             headers=headers,
             params=params,
         )
@@ -120,12 +181,28 @@ class ChurchToolsApiResources(ChurchToolsApiAbstract):
             [response_data] if isinstance(response_data, dict) else response_data
         )
 
-        if appointment_id := kwargs.get("appointment_id"):
-            return [
-                i for i in result_list if i["base"]["appointmentId"] == appointment_id
-            ]
+        if appointment_id:
+            return self._filter_bookings(result_list, appointment_id, fields)
         return result_list
 
+    def _filter_bookings(
+        self, bookings: list[dict], appointment_id: int, fields: list[str] | None
+    ) -> list[dict]:
+        """Helper which keeps bookings of one appointment only.
+
+        Arguments:
+            bookings: full bookings as returned by ChurchTools
+            appointment_id: id of the calendar appointment to keep
+            fields: optional projection applied after filtering
+
+        Returns:
+            matching bookings
+        """
+        return select_fields(
+            [i for i in bookings if i["base"]["appointmentId"] == appointment_id],
+            fields,
+        )
+
     def _get_bookings_params(self, params: dict, **kwargs: dict) -> dict:
         """Helper function for get bookings that prepares params.
 
@@ -0,0 +1,86 @@
+"""module containing the retry policy for transient failures.
+
+Connection errors, timeouts and 502/503/504 responses are usually transient.
+Idempotent requests are repeated after a jittered exponential back-off.
+POST requests are only repeated if the caller marks them as safe
+e.g. session.post(url, retry_safe=True) because they might have been processed.
+Rate limits (429) are handled separately by RateLimitedSession.
+Exceptions with the attribute retryable = False are never repeated.
+"""
+
+import logging
+import random
+from dataclasses import dataclass
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+RETRY_STATUSES = frozenset(
+    {
+        requests.codes.bad_gateway,
+        requests.codes.service_unavailable,
+        requests.codes.gateway_timeout,
+    }
+)
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """Decides which failed attempts are repeated and how long to wait before.
+
+    max_retries is the retry budget of each request - together with the time
+    budget of the api call it prevents retries from multiplying the load
+    on a server which is already struggling.
+    """
+
+    max_retries: int = 2
+    backoff_base: float = 0.5
+    backoff_max: float = 10.0
+    retry_statuses: frozenset[int] = RETRY_STATUSES
+    idempotent_methods: frozenset[str] = IDEMPOTENT_METHODS
+
+    def should_retry(
+        self,
+        method: str,
+        *,
+        retries: int,
+        safe: bool = False,
+        response: requests.Response | None = None,
+        exception: Exception | None = None,
+    ) -> bool:
+        """Checks if a failed attempt may be repeated.
+
+        Args:
+            method: HTTP method of the request
+            retries: number of retries already used for this request
+            safe: caller marked the request as safe to repeat
+            response: response of the attempt if one was received
+            exception: exception raised by the attempt if no response was received
+
+        Returns:
+            True if the attempt should be repeated
+        """
+        if retries >= self.max_retries:
+            return False
+        if not safe and method.upper() not in self.idempotent_methods:
+            return False
+        if response is not None:
+            return response.status_code in self.retry_statuses
+        return isinstance(
+            exception, requests.ConnectionError | requests.Timeout
+        ) and getattr(exception, "retryable", True)
+
+    def backoff(self, retry: int) -> float:
+        """Seconds to wait before a retry using exponential back-off with full jitter.
+
+        Args:
+            retry: number of the retry starting with 1
+
+        Returns:
+            random seconds between 0 and base * 2^(retry-1) limited by backoff_max
+        """
+        return random.uniform(  # noqa: S311
+            0, min(self.backoff_max, self.backoff_base * 2 ** (retry - 1))
+        )
@@ -0,0 +1,209 @@
+"""module containing priority lanes sharing the request budget of a tenant.
+
+The budget is a token bucket of requests per second. Requests waiting in a
+higher lane are always served first - interactive before normal before bulk.
+Lanes can be limited to a maximum share of the budget, e.g. keeping capacity
+for interactive lookups while a nightly sync is running.
+
+The lane is kept in a context variable:
+
+    with priority(BULK):
+        mirror.sync()
+"""
+
+import logging
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from churchtools_api.deadlines import Deadline, DeadlineExceededError
+
+logger = logging.getLogger(__name__)
+
+INTERACTIVE = "interactive"
+NORMAL = "normal"
+BULK = "bulk"
+# ordered by priority - highest first
+LANES = (INTERACTIVE, NORMAL, BULK)
+
+_current_lane: ContextVar[str] = ContextVar("current_lane", default=NORMAL)
+
+
+def current_lane() -> str:
+    """Lane used for requests of the current context.
+
+    Returns:
+        interactive, normal or bulk
+    """
+    return _current_lane.get()
+
+
+@contextmanager
+def priority(lane: str) -> Iterator[str]:
+    """Context manager which sends all requests within using a lane.
+
+    Args:
+        lane: interactive, normal or bulk
+
+    Raises:
+        ValueError: for unknown lanes
+
+    Yields:
+        the lane
+    """
+    if lane not in LANES:
+        msg = f"unknown lane {lane} - use one of {LANES}"
+        raise ValueError(msg)
+    token = _current_lane.set(lane)
+    try:
+        yield lane
+    finally:
+        _current_lane.reset(token)
+
+
+class _TokenBucket:
+    """Helper which refills tokens continuously - requires external locking."""
+
+    def __init__(self, rate: float, burst: float) -> None:
+        """Prepares a full bucket.
+
+        Args:
+            rate: tokens added per second
+            burst: maximum number of tokens
+        """
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self._updated = time.monotonic()
+
+    def refill(self, now: float) -> None:
+        """Adds the tokens accumulated since the last refill.
+
+        Args:
+            now: time.monotonic()
+        """
+        self.tokens = min(self.burst, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def seconds_until_token(self) -> float:
+        """Time until one token is available.
+
+        Returns:
+            seconds - 0 if available
+        """
+        return max(0.0, (1 - self.tokens) / self.rate)
+
+
+class PriorityScheduler:
+    """Thread safe scheduler of requests sharing one budget.
+
+    Can be shared by multiple sessions of the same tenant.
+    """
+
+    def __init__(
+        self,
+        requests_per_second: float = 10.0,
+        *,
+        burst: float | None = None,
+        max_share: dict[str, float] | None = None,
+    ) -> None:
+        """Prepares the budget.
+
+        Args:
+            requests_per_second: shared budget of all lanes
+            burst: number of requests which may be sent at once after idling.
+                Defaults to requests_per_second
+            max_share: maximum share of the budget by lane
+                e.g. {"bulk": 0.5} - lanes without share may use all of it
+        """
+        self.requests_per_second = requests_per_second
+        burst = burst if burst is not None else requests_per_second
+        self._budget = _TokenBucket(rate=requests_per_second, burst=burst)
+        self._lane_budgets = {
+            lane: _TokenBucket(
+                rate=requests_per_second * share, burst=max(1.0, burst * share)
+            )
+            for lane, share in (max_share or {}).items()
+        }
+        self._condition = threading.Condition()
+        self._waiting = dict.fromkeys(LANES, 0)
+        self._sent = dict.fromkeys(LANES, 0)
+
+    def acquire(self, lane: str, deadline: Deadline | None = None) -> float:
+        """Waits until a request of the lane may be sent.
+
+        Args:
+            lane: interactive, normal or bulk
+            deadline: optional deadline of the api call
+
+        Raises:
+            DeadlineExceededError: if the deadline expires while waiting
+
+        Returns:
+            seconds waited
+        """
+        start = time.monotonic()
+        higher_lanes = LANES[: LANES.index(lane)]
+        lane_budget = self._lane_budgets.get(lane)
+        with self._condition:
+            self._waiting[lane] += 1
+            try:
+                while True:
+                    now = time.monotonic()
+                    self._budget.refill(now)
+                    wait = self._budget.seconds_until_token()
+                    if lane_budget:
+                        lane_budget.refill(now)
+                        wait = max(wait, lane_budget.seconds_until_token())
+                    blocked = any(
+                        self._waiting[higher] and self._has_share(higher, now)
+                        for higher in higher_lanes
+                    )
+                    if not wait and not blocked:
+                        self._budget.tokens -= 1
+                        if lane_budget:
+                            lane_budget.tokens -= 1
+                        self._sent[lane] += 1
+                        return now - start
+                    if deadline:
+                        remaining = deadline.remaining()
+                        if remaining <= 0:
+                            raise DeadlineExceededError(
+                                deadline, f"queued in lane {lane}"
+                            )
+                        wait = min(wait or remaining, remaining)
+                    # higher lanes notify when they are served
+                    self._condition.wait(wait or None)
+            finally:
+                self._waiting[lane] -= 1
+                self._condition.notify_all()
+
+    def _has_share(self, lane: str, now: float) -> bool:
+        """Helper which checks if a lane is not limited by its share - requires lock.
+
+        Args:
+            lane: interactive, normal or bulk
+            now: time.monotonic()
+
+        Returns:
+            False if the lane has to wait for its share of the budget
+        """
+        lane_budget = self._lane_budgets.get(lane)
+        if lane_budget is None:
+            return True
+        lane_budget.refill(now)
+        return lane_budget.tokens >= 1
+
+    def statistics(self) -> dict[str, dict]:
+        """Number of waiting and sent requests by lane.
+
+        Returns:
+            dict by lane with waiting and sent
+        """
+        with self._condition:
+            return {
+                lane: {"waiting": self._waiting[lane], "sent": self._sent[lane]}
+                for lane in LANES
+            }
@@ -1,11 +1,11 @@
 """module containing parts used for song handling."""
 
-import json
 import logging
 
 import requests
 
 # from churchtools_api.churchtools_api_abstract import ChurchToolsApiAbstract  # noqa: ERA001 E501
+from churchtools_api.churchtools_api_abstract import decode_json
 from churchtools_api.tags import (
     ChurchToolsApiTags,  # which implements ChurchToolsApiAbstract
 )
@@ -22,13 +22,14 @@ class ChurchToolsApiSongs(ChurchToolsApiTags):
 
     def __init__(self) -> None:
         """Inherited initialization."""
-        super()
+        super().__init__()
 
     def get_songs(self, **kwargs: dict) -> list[dict]:
         """Gets list of all songs from the server.
 
         Kwargs:
             song_id: int: optional filter by song id
+            fields: list[str]: only keep these fields of each song e.g. ["id", "name"]
 
         Returns: list of songs
         """
@@ -42,14 +43,15 @@ class ChurchToolsApiSongs(ChurchToolsApiTags):
         if "song_id" in kwargs:
             url = url + "/{}".format(kwargs["song_id"])
         headers = {"accept": "application/json"}
-        params = {"limit": 50}  # increases default pagination size
+        params = {"limit": self._get_page_size(url)}  # configured in self.page_sizes
         response = self.session.get(url=url, headers=headers, params=params)
 
         if response.status_code == requests.codes.ok:
-            response_content = json.loads(response.content)
+            response_content = decode_json(response.content)
             response_data = self.combine_paginated_response_data(
                 response_content,
                 url=url,
+                fields=kwargs.get("fields"),
                 headers=headers,
                 params=params,
             )
@@ -78,7 +80,7 @@ class ChurchToolsApiSongs(ChurchToolsApiTags):
         url = self.domain + "/api/event/masterdata"
         headers = {"accept": "application/json"}
         response = self.session.get(url=url, headers=headers)
-        response_content = json.loads(response.content)
+        response_content = decode_json(response.content)
         song_categories = response_content["data"]["songCategories"]
         song_category_dict = {}
         for item in song_categories:
@@ -213,7 +215,7 @@ class ChurchToolsApiSongs(ChurchToolsApiTags):
             )
             return None
 
-        response_content = json.loads(response.content)
+        response_content = decode_json(response.content)
         new_id = int(response_content["data"]["id"])
         logger.debug("Song created successful with ID=%s", new_id)
         return new_id
@@ -279,7 +281,7 @@ class ChurchToolsApiSongs(ChurchToolsApiTags):
             )
             return None
 
-        return json.loads(response.content)["data"]
+        return decode_json(response.content)["data"]
 
     def delete_song(self, song_id: int) -> bool:
         """Method to DELETE a song using REST API.
@@ -397,7 +399,7 @@ class ChurchToolsApiSongs(ChurchToolsApiTags):
             )
             return None
 
-        return json.loads(response.content)["data"]["id"]
+        return decode_json(response.content)["data"]["id"]
 
     def edit_song_arrangement(
         self,
@@ -467,7 +469,7 @@ class ChurchToolsApiSongs(ChurchToolsApiTags):
         }
         response = self.session.put(url=url, json=data)
         if response.status_code != requests.codes.ok:
-            logger.error(json.loads(response.content)["errors"])
+            logger.error(decode_json(response.content)["errors"])
             return False
 
         return True
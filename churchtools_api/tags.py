@@ -1,11 +1,13 @@
 """module containing parts used for song handling."""
 
-import json
 import logging
 
 import requests
 
-from churchtools_api.churchtools_api_abstract import ChurchToolsApiAbstract
+from churchtools_api.churchtools_api_abstract import (
+    ChurchToolsApiAbstract,
+    decode_json,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -19,7 +21,7 @@ class ChurchToolsApiTags(ChurchToolsApiAbstract):
 
     def __init__(self) -> None:
         """Inherited initialization."""
-        super()
+        super().__init__()
 
     def get_tags(self, domain_type: str, *, rtype: str = "original") -> list[dict]:
         """Retrieve a list of all available tags.
@@ -38,7 +40,7 @@ class ChurchToolsApiTags(ChurchToolsApiAbstract):
         headers = {"accept": "application/json"}
         response = self.session.get(url=url, headers=headers)
 
-        response_content = json.loads(response.content)
+        response_content = decode_json(response.content)
 
         if response.status_code != requests.codes.ok:
             logger.warning(response.content)
@@ -79,7 +81,7 @@ class ChurchToolsApiTags(ChurchToolsApiAbstract):
 
         response = self.session.post(url=url, headers=headers, json=params)
 
-        response_content = json.loads(response.content)
+        response_content = decode_json(response.content)
         if response.status_code != requests.codes.created:
             logger.warning(response_content["translatedMessage"])
             return False
@@ -138,7 +140,7 @@ class ChurchToolsApiTags(ChurchToolsApiAbstract):
 
         response = self.session.get(url=url)
 
-        response_content = json.loads(response.content)
+        response_content = decode_json(response.content)
         if response.status_code != requests.codes.ok:
             logger.warning(response_content["translatedMessage"])
             return None
@@ -0,0 +1,300 @@
+"""module containing a pool of api clients for multiple ChurchTools domains.
+
+Each tenant keeps its own ChurchToolsApi with session, login, connection pool
+and an optional rate budget. Queries can be sent to all tenants concurrently:
+
+    pool = TenantPool()
+    pool.add("https://a.church.tools", ct_token="...")
+    pool.add("https://b.church.tools", ct_token="...")
+    events = pool.fan_out_items(lambda api: api.get_events(from_="2026-01-01"))
+
+Each item of the merged result is labeled with the domain of its tenant.
+"""
+
+import logging
+import threading
+from collections.abc import Callable, Iterable
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
+from types import TracebackType
+
+import requests
+
+from churchtools_api.churchtools_api import ChurchToolsApi
+from churchtools_api.ratelimitedsession import RateLimitedSession
+from churchtools_api.scheduler import PriorityScheduler
+
+logger = logging.getLogger(__name__)
+
+TENANT_LABEL = "tenant"
+
+
+class _Tenant:
+    """Helper which keeps the client and credentials of one domain."""
+
+    def __init__(self, api: ChurchToolsApi, credentials: dict) -> None:
+        """Prepares a tenant which is not logged in yet.
+
+        Args:
+            api: client of the domain
+            credentials: keywords of login_ct_rest_api
+        """
+        self.api = api
+        self.credentials = credentials
+        self.logged_in = False
+        self.lock = threading.Lock()
+
+
+class TenantPool:
+    """Thread safe pool of logged in clients keyed by domain."""
+
+    def __init__(
+        self,
+        *,
+        max_workers: int = 8,
+        requests_per_second: float | None = None,
+        connections_per_tenant: int | None = None,
+    ) -> None:
+        """Prepares an empty pool.
+
+        Args:
+            max_workers: max number of tenants queried concurrently
+            requests_per_second: default rate budget of each tenant.
+                Defaults to None which does not limit the requests
+            connections_per_tenant: size of the connection pool of each tenant.
+                Defaults to None using 10 connections
+        """
+        self.max_workers = max_workers
+        self.requests_per_second = requests_per_second
+        self.connections_per_tenant = connections_per_tenant
+        self._tenants: dict[str, _Tenant] = {}
+        self._lock = threading.Lock()
+
+    def add(
+        self,
+        domain: str,
+        *,
+        ct_token: str | None = None,
+        ct_user: str | None = None,
+        ct_password: str | None = None,
+        requests_per_second: float | None = None,
+    ) -> None:
+        """Registers a tenant - the login is executed on first use.
+
+        Args:
+            domain: including https:// ending on e.g. .de
+            ct_token: direct access using a user token
+            ct_user: indirect login using user and password combination
+            ct_password: indirect login using user and password combination
+            requests_per_second: rate budget of this tenant - 0 does not limit it.
+                Defaults to requests_per_second of the pool
+        """
+        rate = (
+            self.requests_per_second
+            if requests_per_second is None
+            else requests_per_second
+        )
+        api = ChurchToolsApi(domain=domain)
+        # the login keeps this session's settings - its requests use the budget too
+        api.session = RateLimitedSession(
+            scheduler=PriorityScheduler(requests_per_second=rate) if rate else None,
+            pool_maxsize=self.connections_per_tenant,
+        )
+        tenant = _Tenant(
+            api=api,
+            credentials={
+                "ct_token": ct_token,
+                "ct_user": ct_user,
+                "ct_password": ct_password,
+            },
+        )
+        with self._lock:
+            if domain in self._tenants:
+                logger.info("replacing tenant %s", domain)
+                self._close(self._tenants[domain])
+            self._tenants[domain] = tenant
+
+    def remove(self, domain: str) -> None:
+        """Removes a tenant and closes its connections.
+
+        Args:
+            domain: domain used when adding the tenant
+        """
+        with self._lock:
+            tenant = self._tenants.pop(domain, None)
+        if tenant:
+            self._close(tenant)
+
+    @property
+    def domains(self) -> list[str]:
+        """Domains of all tenants in the order they were added.
+
+        Returns:
+            list of domains
+        """
+        with self._lock:
+            return list(self._tenants)
+
+    def get(self, domain: str) -> ChurchToolsApi | None:
+        """Logged in client of a tenant - logs in on first use.
+
+        Args:
+            domain: domain used when adding the tenant
+
+        Returns:
+            the client or None if unknown or the login failed
+        """
+        with self._lock:
+            tenant = self._tenants.get(domain)
+        if tenant is None:
+            logger.warning("tenant %s is not part of the pool", domain)
+            return None
+        with tenant.lock:
+            if not tenant.logged_in:
+                tenant.logged_in = self._login(domain, tenant)
+        return tenant.api if tenant.logged_in else None
+
+    @staticmethod
+    def _login(domain: str, tenant: _Tenant) -> bool:
+        """Helper which logs in a tenant.
+
+        Args:
+            domain: domain of the tenant
+            tenant: the tenant to log in
+
+        Returns:
+            True if successful
+        """
+        try:
+            logged_in = tenant.api.login_ct_rest_api(**tenant.credentials)
+        except (requests.RequestException, TimeoutError) as exception:
+            logger.warning("login of tenant %s failed: %s", domain, exception)
+            return False
+        if not logged_in:
+            logger.warning("login of tenant %s failed", domain)
+            return False
+        return True
+
+    def login(self, domains: Iterable[str] | None = None) -> dict[str, bool]:
+        """Logs in tenants concurrently.
+
+        Args:
+            domains: tenants to log in. Defaults to all
+
+        Returns:
+            dict by domain - True if logged in
+        """
+        return {
+            domain: api is not None
+            for domain, api in self._map(self.get, domains).items()
+        }
+
+    def fan_out(
+        self,
+        function: Callable[[ChurchToolsApi], object],
+        domains: Iterable[str] | None = None,
+    ) -> dict[str, object]:
+        """Calls a function with the client of each tenant concurrently.
+
+        Args:
+            function: receives a logged in client e.g. lambda api: api.get_songs()
+                exceptions raised by the function are logged per tenant
+            domains: tenants to query. Defaults to all
+
+        Returns:
+            result by domain - None if the login or the function failed
+        """
+
+        def call(domain: str) -> object:
+            api = self.get(domain)
+            if api is None:
+                return None
+            try:
+                return function(api)
+            except Exception:
+                logger.exception("fan out to tenant %s failed", domain)
+                return None
+
+        return self._map(call, domains)
+
+    def fan_out_items(
+        self,
+        function: Callable[[ChurchToolsApi], list[dict] | None],
+        domains: Iterable[str] | None = None,
+        label: str = TENANT_LABEL,
+    ) -> list[dict]:
+        """Calls a function returning items for each tenant and merges the results.
+
+        Tenants which failed are skipped - see fan_out for results by domain.
+
+        Args:
+            function: receives a logged in client and returns a list of dicts
+            domains: tenants to query. Defaults to all
+            label: key added to each item containing the domain of the tenant
+
+        Returns:
+            items of all tenants in the order of the domains
+        """
+        return [
+            {**item, label: domain}
+            for domain, items in self.fan_out(function, domains).items()
+            for item in items or []
+        ]
+
+    def _map(
+        self, function: Callable[[str], object], domains: Iterable[str] | None
+    ) -> dict[str, object]:
+        """Helper which calls a function for each domain using a thread pool.
+
+        Args:
+            function: receives the domain
+            domains: domains to use. Defaults to all
+
+        Returns:
+            result by domain in the order of the domains
+        """
+        domains = list(domains) if domains is not None else self.domains
+        if not domains:
+            return {}
+        with ThreadPoolExecutor(
+            max_workers=min(self.max_workers, len(domains))
+        ) as executor:
+            futures = {
+                domain: executor.submit(copy_context().run, function, domain)
+                for domain in domains
+            }
+        return {domain: future.result() for domain, future in futures.items()}
+
+    @staticmethod
+    def _close(tenant: _Tenant) -> None:
+        """Helper which closes the connections of a tenant.
+
+        Args:
+            tenant: the tenant to close
+        """
+        if tenant.api.session:
+            tenant.api.session.close()
+
+    def close(self) -> None:
+        """Closes the connections of all tenants."""
+        with self._lock:
+            tenants = list(self._tenants.values())
+        for tenant in tenants:
+            self._close(tenant)
+
+    def __enter__(self) -> "TenantPool":
+        """Context manager which closes all connections on exit.
+
+        Returns:
+            the pool itself
+        """
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        """Closes the connections of all tenants."""
+        self.close()
@@ -0,0 +1,202 @@
+"""module containing a lightweight tracing facility.
+
+Public api methods open a span, each HTTP request and pagination page
+is recorded as child span. Spans can be exported as Zipkin v2 JSON which is
+accepted by Zipkin and the zipkin receiver of the OpenTelemetry collector.
+Tracing is disabled by default.
+"""
+
+import functools
+import inspect
+import json
+import logging
+import secrets
+import threading
+import time
+from collections import Counter, deque
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+
+logger = logging.getLogger(__name__)
+
+MAX_FINISHED_SPANS = 10000
+
+
+@dataclass
+class Span:
+    """One timed operation within a trace."""
+
+    name: str
+    trace_id: str
+    span_id: str
+    parent_id: str | None = None
+    kind: str | None = None
+    start: float = 0.0
+    duration: float = 0.0
+    tags: dict = field(default_factory=dict)
+
+
+_current_span: ContextVar[Span | None] = ContextVar("current_span", default=None)
+
+
+class Tracer:
+    """Creates spans and keeps the most recent finished spans."""
+
+    def __init__(
+        self, *, enabled: bool = False, max_spans: int = MAX_FINISHED_SPANS
+    ) -> None:
+        """Prepares the tracer.
+
+        Args:
+            enabled: spans are only recorded if enabled. Defaults to False
+            max_spans: number of finished spans kept - oldest are dropped first
+        """
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._finished = deque(maxlen=max_spans)
+
+    @contextmanager
+    def span(self, name: str, kind: str | None = None, **tags: dict) -> Iterator[Span]:
+        """Context manager which records a span as child of the current span.
+
+        Args:
+            name: name of the operation e.g. get_persons
+            kind: optional zipkin kind e.g. CLIENT for HTTP requests
+            tags: additional information attached to the span
+
+        Yields:
+            the span which can be used to add tags - None if disabled
+        """
+        if not self.enabled:
+            yield None
+            return
+
+        parent = _current_span.get()
+        span = Span(
+            name=name,
+            trace_id=parent.trace_id if parent else secrets.token_hex(16),
+            span_id=secrets.token_hex(8),
+            parent_id=parent.span_id if parent else None,
+            kind=kind,
+            start=time.time(),
+            tags={key: str(value) for key, value in tags.items()},
+        )
+        token = _current_span.set(span)
+        start = time.perf_counter()
+        try:
+            yield span
+        except Exception as exception:
+            span.tags["error"] = type(exception).__name__
+            raise
+        finally:
+            span.duration = time.perf_counter() - start
+            _current_span.reset(token)
+            with self._lock:
+                self._finished.append(span)
+
+    def finished_spans(self) -> list[Span]:
+        """Copy of all finished spans which were kept.
+
+        Returns:
+            list of spans ordered by end time
+        """
+        with self._lock:
+            return list(self._finished)
+
+    def clear(self) -> None:
+        """Removes all finished spans."""
+        with self._lock:
+            self._finished.clear()
+
+    def fan_out_summary(self) -> dict[str, int]:
+        """Counts HTTP requests by the outermost api method that caused them.
+
+        Returns:
+            dict of root span name and number of HTTP request spans
+            sorted descending by number of requests
+        """
+        spans = self.finished_spans()
+        by_id = {span.span_id: span for span in spans}
+        counter = Counter()
+        for span in spans:
+            if span.kind != "CLIENT":
+                continue
+            root = span
+            while root.parent_id in by_id:
+                root = by_id[root.parent_id]
+            counter[root.name] += 1
+        return dict(counter.most_common())
+
+    def export(self, service_name: str = "churchtools_api") -> str:
+        """Formats all finished spans as Zipkin v2 JSON.
+
+        The result can be sent as POST to a collector e.g. /api/v2/spans
+
+        Args:
+            service_name: name used as localEndpoint
+
+        Returns:
+            JSON list of spans
+        """
+        return json.dumps(
+            [
+                {
+                    "traceId": span.trace_id,
+                    "id": span.span_id,
+                    **({"parentId": span.parent_id} if span.parent_id else {}),
+                    **({"kind": span.kind} if span.kind else {}),
+                    "name": span.name,
+                    "timestamp": int(span.start * 1_000_000),
+                    "duration": max(int(span.duration * 1_000_000), 1),
+                    "localEndpoint": {"serviceName": service_name},
+                    "tags": span.tags,
+                }
+                for span in self.finished_spans()
+            ]
+        )
+
+
+def traced(function: Callable) -> Callable:
+    """Decorator which opens a span for each call of an api method.
+
+    The tracer is taken from the session of the api object.
+
+    Args:
+        function: method of a ChurchToolsApi part
+
+    Returns:
+        wrapped method
+    """
+
+    @functools.wraps(function)
+    def wrapper(self, *args: list, **kwargs: dict):  # noqa: ANN001, ANN202
+        tracer = getattr(getattr(self, "session", None), "tracer", None)
+        if tracer is None or not tracer.enabled:
+            return function(self, *args, **kwargs)
+        with tracer.span(function.__name__):
+            return function(self, *args, **kwargs)
+
+    wrapper.__traced__ = True
+    return wrapper
+
+
+def trace_public_methods(cls: type) -> None:
+    """Wraps all public methods defined on a class using traced.
+
+    Generator methods are not wrapped
+    because a span can not be kept open across yields.
+
+    Args:
+        cls: the class to modify
+    """
+    for name, attribute in list(cls.__dict__.items()):
+        if (
+            name.startswith("_")
+            or not inspect.isfunction(attribute)
+            or inspect.isgeneratorfunction(attribute)
+            or getattr(attribute, "__traced__", False)
+        ):
+            continue
+        setattr(cls, name, traced(attribute))
@@ -0,0 +1,73 @@
+"""module test offline benchmarks and the mock ChurchTools server."""
+
+import json
+import logging
+import logging.config
+from pathlib import Path
+
+import pytest
+
+from benchmarks import benchmark_json
+from benchmarks.benchmark_getters import GETTERS, format_results, run_benchmarks
+from benchmarks.mock_server import MockChurchToolsServer
+from churchtools_api.churchtools_api import ChurchToolsApi
+from churchtools_api.churchtools_api_abstract import decode_json
+
+logger = logging.getLogger(__name__)
+
+config_file = Path("logging_config.json")
+with config_file.open(encoding="utf-8") as f_in:
+    logging_config = json.load(f_in)
+    log_directory = Path(logging_config["handlers"]["file"]["filename"]).parent
+    if not log_directory.exists():
+        log_directory.mkdir(parents=True)
+    logging.config.dictConfig(config=logging_config)
+
+
+class TestsBenchmarks:
+    """Test for the benchmark suite without server access."""
+
+    def test_mock_server_pagination(self) -> None:
+        """Getters combine all pages served by the mock server."""
+        SAMPLE_SIZE = 120
+        with MockChurchToolsServer(size=SAMPLE_SIZE) as server:
+            api = ChurchToolsApi(domain=server.domain, ct_token="sample")  # noqa: S106
+            server.reset_request_count()
+            persons = api.get_persons()
+            EXPECTED_PAGES = 3
+            assert server.request_count == EXPECTED_PAGES
+            assert [person["id"] for person in persons] == list(
+                range(1, SAMPLE_SIZE + 1)
+            )
+
+            EXPECTED_IDS = [2, 3]
+            persons = api.get_persons(ids=EXPECTED_IDS)
+            assert [person["id"] for person in persons] == EXPECTED_IDS
+
+    def test_run_benchmarks(self) -> None:
+        """All getters return all items even if requests are rate limited."""
+        SAMPLE_SIZE = 60
+        results = run_benchmarks(
+            sizes=[SAMPLE_SIZE], rate_limit_every=5, rate_limit_wait=0, repeats=1
+        )
+
+        assert [result["getter"] for result in results] == list(GETTERS)
+        for result in results:
+            assert result["size"] == SAMPLE_SIZE
+            assert result["items"] == SAMPLE_SIZE
+            assert result["requests"] > 1
+            assert result["peak_memory"] > 0
+        assert any(result["rate_limited"] for result in results)
+        assert len(format_results(results).splitlines()) == len(results) + 1
+
+    def test_json_benchmark(self) -> None:
+        """Central decoding returns the same content as the standard library."""
+        bodies = benchmark_json.generate_pages(page_size=5, pages=2)
+        assert [decode_json(body) for body in bodies] == [
+            json.loads(body) for body in bodies
+        ]
+        with pytest.raises(json.JSONDecodeError):
+            decode_json(b"<html>maintenance</html>")
+
+        results = benchmark_json.run_benchmark(page_size=5, pages=2, repeats=1)
+        assert set(results) == {"json + copy", "json", "decode_json"}
@@ -156,6 +156,64 @@ class TestsChurchToolsApiCalendars(TestsChurchToolsApiAbstract):
         assert result[-1]["startDate"] == "2023-11-26T08:00:00Z"
         assert result[-1]["endDate"] == "2023-11-26T09:00:00Z"
 
+    def test_get_calendar_appointment_occurrences(self) -> None:
+        """Expands series locally and compares with server calculated dates.
+
+        IMPORTANT - This test method and the parameters used depend on target system!
+        Requires the connected test system to have a calendar mapped as ID 2
+        Calendar 2 should have appointment "Gottesdienst Friedrichstal"
+        with instances of the series on 19.11.2023 and 26.11.2023.
+        """
+        expected = self.api.get_calendar_appointments(
+            calendar_ids=[2], from_="2023-11-19", to_="2023-11-26"
+        )
+        result = self.api.get_calendar_appointment_occurrences(
+            calendar_ids=[2], from_="2023-11-19", to_="2023-11-26"
+        )
+        assert sorted(
+            (item["id"], item["startDate"], item["endDate"]) for item in expected
+        ) == sorted((item["id"], item["startDate"], item["endDate"]) for item in result)
+
+        result = [
+            appointment
+            for appointment in result
+            if appointment["caption"] == "Gottesdienst Friedrichstal"
+        ]
+        EXPECTED_NUMBER_OF_APPOINTMENTS = 2
+        assert len(result) == EXPECTED_NUMBER_OF_APPOINTMENTS
+        assert result[-1]["startDate"] == "2023-11-26T08:00:00Z"
+        assert result[-1]["endDate"] == "2023-11-26T09:00:00Z"
+
+    def test_iter_calendar_appointments(self) -> None:
+        """Chunked concurrent requests return the same as a single request.
+
+        IMPORTANT - This test method and the parameters used depend on target system!
+        Requires the connected test system to have a calendar mapped as ID 2 and 42
+        with appointments between 19.11.2023 and 26.11.2023
+        """
+        expected = self.api.get_calendar_appointments(
+            calendar_ids=[2, 42], from_="2023-11-19", to_="2023-11-26"
+        )
+        result = list(
+            self.api.iter_calendar_appointments(
+                calendar_ids=[2, 42], chunk_size=1, from_="2023-11-19", to_="2023-11-26"
+            )
+        )
+        assert len(result) >= 1
+        assert sorted((item["id"], item["startDate"]) for item in expected) == sorted(
+            (item["id"], item["startDate"]) for item in result
+        )
+
+        # without timeframe ChurchTools would not return calculated dates
+        with pytest.raises(TypeError, match="from_"):
+            self.api.iter_calendar_appointments(calendar_ids=[2, 42])
+        with pytest.raises(ValueError, match="YYYY-MM-DD"):
+            next(
+                self.api.iter_calendar_appointments(
+                    calendar_ids=[2], from_="2023-11-19", to_="2023-11-26 12:00"
+                )
+            )
+
     def test_get_calendar_appointments_none(self) -> None:
         """Check that there is no error if no item can be found.
 
@@ -280,3 +338,43 @@ class TestsChurchToolsApiCalendars(TestsChurchToolsApiAbstract):
             )
         EXPECTED_MESSAGES = [f"appointment [{appointment_id}] not found"]
         assert EXPECTED_MESSAGES[0] in caplog.messages[0]
+
+    def test_update_calendar_appointments_batch(self) -> None:
+        """Creates two appointments, updates both in one batch and deletes them.
+
+        IMPORTANT - This test method and the parameters used depend on target system!
+        the hard coded sample exists on ELKW1610.KRZ.TOOLS
+        """
+        SAMPLE_CALENDAR = 45
+        start_date = datetime.now().astimezone(pytz.timezone("Europe/Berlin"))
+        appointment_ids = [
+            self.api.create_calender_appointment(
+                calendar_id=SAMPLE_CALENDAR,
+                startDate=start_date + timedelta(hours=offset),
+                endDate=start_date + timedelta(hours=offset, minutes=10),
+                title=f"test_batch_{offset}",
+            )["id"]
+            for offset in range(2)
+        ]
+
+        new_end_date = start_date + timedelta(hours=3)
+        result = self.api.update_calender_appointments(
+            updates=[
+                (SAMPLE_CALENDAR, appointment_ids[0], {"subtitle": "batch"}),
+                (SAMPLE_CALENDAR, appointment_ids[1], {"endDate": new_end_date}),
+            ],
+            from_=start_date,
+            to_=start_date + timedelta(days=1),
+        )
+
+        assert result[0]["id"] == appointment_ids[0]
+        assert result[0]["subtitle"] == "batch"
+        assert result[0]["title"] == "test_batch_0"
+        assert result[1]["endDate"] == new_end_date.replace(second=0).strftime(
+            "%Y-%m-%dT%H:%M:%SZ"
+        )
+
+        for appointment_id in appointment_ids:
+            assert self.api.delete_calender_appointment(
+                calendar_id=SAMPLE_CALENDAR, appointment_id=appointment_id
+            )
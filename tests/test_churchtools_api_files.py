@@ -1,10 +1,14 @@
 """module test files."""
 
+import hashlib
 import json
 import logging
 import logging.config
 from pathlib import Path
 
+import pytest
+
+from churchtools_api.churchtools_api import ChurchToolsApi
 from tests.test_churchtools_api_abstract import TestsChurchToolsApiAbstract
 
 logger = logging.getLogger(__name__)
@@ -207,3 +211,176 @@ class TestChurchtoolsApiFiles(TestsChurchToolsApiAbstract):
 
         self.api.file_delete("song_arrangement", test_id, "test.txt")
         filePath.unlink()
+
+    def test_file_download_bulk(self) -> None:
+        """Test of file_download_bulk including verification and resume.
+
+        On ELKW1610.KRZ.TOOLS song ID 762 has arrangement 774 does exist.
+
+        Uploads a test file
+        downloads the file twice in one bulk request with size and hash checks
+        checks that a failed verification does not leave a file
+        deletes test file
+        """
+        test_id = 762
+        self.api.file_upload("samples/test.txt", "song_arrangement", test_id)
+        song_file = next(
+            file
+            for file in self.api.get_files("song_arrangement", test_id)
+            if file["name"] == "test.txt"
+        )
+        sample_content = Path("samples/test.txt").read_bytes()
+
+        file_paths = [
+            Path("downloads/bulk/test1.txt"),
+            Path("downloads/bulk/test2.txt"),
+        ]
+        for file_path in file_paths:
+            file_path.unlink(missing_ok=True)
+
+        result = self.api.file_download_bulk(
+            [
+                {
+                    "file_url": song_file["fileUrl"],
+                    "target_path": file_path,
+                    "expected_size": len(sample_content),
+                    "expected_sha256": hashlib.sha256(sample_content).hexdigest(),
+                }
+                for file_path in file_paths
+            ]
+        )
+        assert result == [True, True]
+        for file_path in file_paths:
+            assert file_path.read_bytes() == sample_content
+            file_path.unlink()
+
+        result = self.api.file_download_bulk(
+            [
+                {
+                    "file_url": song_file["fileUrl"],
+                    "target_path": file_paths[0],
+                    "expected_sha256": "0" * 64,
+                }
+            ]
+        )
+        assert result == [False]
+        assert not file_paths[0].exists()
+        assert not file_paths[0].with_name("test1.txt.part").exists()
+
+        self.api.file_delete("song_arrangement", test_id, "test.txt")
+
+    def test_file_upload_bulk(self, tmp_path: Path) -> None:
+        """Test of file_upload_bulk skipping unchanged and replacing changed files.
+
+        On ELKW1610.KRZ.TOOLS song ID 762 has arrangement 774 does exist.
+
+        1. Uploads two files with an empty manifest
+        2. Repeats the upload - nothing should change
+        3. Changes one file - only this file should be replaced
+        cleanup delete test files
+
+        Args:
+            tmp_path: pytest fixture with temporary directory
+        """
+        test_id = 762
+        manifest_path = tmp_path / "manifest.json"
+        changing_file = tmp_path / "bulk.txt"
+        changing_file.write_text("FIRST CONTENT")
+        uploads = [
+            {
+                "source_filepath": "samples/test.txt",
+                "domain_type": "song_arrangement",
+                "domain_identifier": test_id,
+                "custom_file_name": "bulk_test.txt",
+            },
+            {
+                "source_filepath": changing_file,
+                "domain_type": "song_arrangement",
+                "domain_identifier": test_id,
+            },
+        ]
+
+        # 1. Uploads two files with an empty manifest
+        assert self.api.file_upload_bulk(uploads, manifest_path) == [True, True]
+        manifest = json.loads(manifest_path.read_text())
+        EXPECTED_NUMBER_OF_FILES = 2
+        assert len(manifest) == EXPECTED_NUMBER_OF_FILES
+
+        # 2. Repeats the upload - nothing should change
+        assert self.api.file_upload_bulk(uploads, manifest_path) == [True, True]
+        assert json.loads(manifest_path.read_text()) == manifest
+
+        # 3. Changes one file - only this file should be replaced
+        changing_file.write_text("SECOND CONTENT")
+        assert self.api.file_upload_bulk(uploads, manifest_path) == [True, True]
+        new_manifest = json.loads(manifest_path.read_text())
+        key = f"song_arrangement/{test_id}/bulk.txt"
+        assert new_manifest[key]["file_id"] != manifest[key]["file_id"]
+
+        files = self.api.get_files("song_arrangement", test_id)
+        filenames = [file["name"] for file in files]
+        assert filenames.count("bulk_test.txt") == 1
+        assert filenames.count("bulk.txt") == 1
+
+        # cleanup delete test files
+        self.api.file_delete("song_arrangement", test_id, "bulk_test.txt")
+        self.api.file_delete("song_arrangement", test_id, "bulk.txt")
+
+    def test_file_upload_progress(self) -> None:
+        """Test that file_upload streams the file and reports progress.
+
+        On ELKW1610.KRZ.TOOLS song ID 762 has arrangement 774 does exist.
+        """
+        test_id = 762
+        progress = []
+        assert self.api.file_upload(
+            "samples/pinguin.png",
+            "song_arrangement",
+            test_id,
+            "pinguin_stream.png",
+            progress=lambda sent, total: progress.append((sent, total)),
+        )
+        assert len(progress) >= 1
+        assert progress[-1][0] == progress[-1][1]
+
+        files = self.api.get_files("song_arrangement", test_id)
+        assert "pinguin_stream.png" in [file["name"] for file in files]
+
+        self.api.file_delete("song_arrangement", test_id, "pinguin_stream.png")
+
+
+class TestChurchtoolsApiFilesOffline:
+    """Test for Files which do not require a server."""
+
+    def test_file_upload_bulk_failure(
+        self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """An upload raising an exception does not lose the other uploads."""
+        api = ChurchToolsApi(domain="https://example.church.tools")
+        uploads = []
+        for name in ["first.txt", "broken.txt", "last.txt"]:
+            source_filepath = tmp_path / name
+            source_filepath.write_text(name)
+            uploads.append(
+                {
+                    "source_filepath": source_filepath,
+                    "domain_type": "song_arrangement",
+                    "domain_identifier": 1,
+                }
+            )
+
+        def replace_file(file_name: str, **_kwargs: dict) -> dict:
+            if file_name == "broken.txt":
+                msg = "connection lost"
+                raise ConnectionError(msg)
+            return {"id": len(file_name)}
+
+        monkeypatch.setattr(api, "_get_existing_file_ids", lambda **_kwargs: {})
+        monkeypatch.setattr(api, "_replace_file", replace_file)
+        manifest_path = tmp_path / "manifest.json"
+        assert api.file_upload_bulk(uploads, manifest_path) == [True, False, True]
+        manifest = json.loads(manifest_path.read_text())
+        assert sorted(manifest) == [
+            "song_arrangement/1/first.txt",
+            "song_arrangement/1/last.txt",
+        ]
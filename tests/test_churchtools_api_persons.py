@@ -52,6 +52,20 @@ class TestChurchtoolsApiPersons(TestsChurchToolsApiAbstract):
         result4 = self.api.get_persons(returnAsDict=False)
         assert isinstance(result4, list)
 
+    def test_get_persons_fields(self) -> None:
+        """Only requested fields of persons are kept.
+
+        IMPORTANT - This test method and the parameters used depend on target system!
+        On any elkw.KRZ.TOOLS personId 1 'firstName' starts with 'Ben'
+        """
+        SAMPLE_FIELDS = ["firstName", "lastName"]
+        result = self.api.get_persons(ids=[1], fields=SAMPLE_FIELDS)
+        assert set(result[0]) == set(SAMPLE_FIELDS)
+        assert result[0]["firstName"].startswith("Ben")
+
+        result = self.api.get_persons(ids=[1], fields=SAMPLE_FIELDS, returnAsDict=True)
+        assert set(result[1]) == {"id", *SAMPLE_FIELDS}
+
     def test_get_persons_masterdata(self) -> None:
         """Tries to retrieve metadata for persons module.
 
@@ -0,0 +1,113 @@
+"""module test resumed file downloads using replayed responses."""
+
+import base64
+import gzip
+import json
+import logging
+import logging.config
+from pathlib import Path
+
+from churchtools_api.churchtools_api import ChurchToolsApi
+from churchtools_api.ratelimitedsession import RateLimitedSession
+from churchtools_api.recording import RECORDING_VERSION, ReplayAdapter
+
+logger = logging.getLogger(__name__)
+
+config_file = Path("logging_config.json")
+with config_file.open(encoding="utf-8") as f_in:
+    logging_config = json.load(f_in)
+    log_directory = Path(logging_config["handlers"]["file"]["filename"]).parent
+    if not log_directory.exists():
+        log_directory.mkdir(parents=True)
+    logging.config.dictConfig(config=logging_config)
+
+FILE_URL = "https://example.church.tools/?q=public/filedownload&id=1"
+CONTENT = b"0123456789abcdefghij"
+
+
+def replay_api(path: Path, responses: list[tuple[int, dict, bytes]]) -> ChurchToolsApi:
+    """Helper which creates an api answering FILE_URL with the responses in order.
+
+    Args:
+        path: recording file which is created
+        responses: status, headers and body of each response
+
+    Returns:
+        api without login using a ReplayAdapter
+    """
+    with gzip.open(path, "wt", encoding="utf-8") as recording_file:
+        recording_file.write(json.dumps({"version": RECORDING_VERSION}) + "\n")
+        for status, headers, body in responses:
+            interaction = {
+                "key": "GET /?q=public/filedownload&id=1",
+                "status": status,
+                "headers": headers,
+                "elapsed": 0,
+                "body_base64": base64.b64encode(body).decode(),
+            }
+            recording_file.write(json.dumps(interaction) + "\n")
+    api = ChurchToolsApi(domain="https://example.church.tools")
+    api.session = RateLimitedSession()
+    api.session.mount("https://", ReplayAdapter(path))
+    return api
+
+
+class TestsDownloads:
+    """Test for file_download_from_url resuming a .part file."""
+
+    def test_resume(self, tmp_path: Path) -> None:
+        """A matching range is appended to the .part file."""
+        target = tmp_path / "file.txt"
+        Path(f"{target}.part").write_bytes(CONTENT[:5])
+        api = replay_api(
+            tmp_path / "recording.jsonl.gz",
+            [(206, {"Content-Range": "bytes 5-19/20"}, CONTENT[5:])],
+        )
+        assert api.file_download_from_url(FILE_URL, target, resume=True)
+        assert target.read_bytes() == CONTENT
+
+    def test_range_not_satisfiable(self, tmp_path: Path) -> None:
+        """A stale .part file is only kept if confirmed as complete."""
+        target = tmp_path / "file.txt"
+        part = Path(f"{target}.part")
+        part.write_bytes(b"stale and much too long content")
+        api = replay_api(
+            tmp_path / "recording.jsonl.gz",
+            [(416, {"Content-Range": "bytes */20"}, b""), (200, {}, CONTENT)],
+        )
+        assert api.file_download_from_url(FILE_URL, target, resume=True)
+        assert target.read_bytes() == CONTENT
+        assert not part.exists()
+
+        # complete according to the size of the file on the server
+        part.write_bytes(CONTENT)
+        api = replay_api(
+            tmp_path / "complete.jsonl.gz",
+            [(416, {"Content-Range": "bytes */20"}, b""), (200, {}, b"unused")],
+        )
+        assert api.file_download_from_url(FILE_URL, target, resume=True)
+        assert target.read_bytes() == CONTENT
+
+        # complete according to the expected size without Content-Range
+        part.write_bytes(CONTENT)
+        api = replay_api(
+            tmp_path / "expected.jsonl.gz", [(416, {}, b""), (200, {}, b"unused")]
+        )
+        assert api.file_download_from_url(
+            FILE_URL, target, resume=True, expected_size=len(CONTENT)
+        )
+        assert target.read_bytes() == CONTENT
+
+    def test_unexpected_range(self, tmp_path: Path) -> None:
+        """A range starting elsewhere is not appended but downloaded again."""
+        target = tmp_path / "file.txt"
+        Path(f"{target}.part").write_bytes(CONTENT[:5])
+        api = replay_api(
+            tmp_path / "recording.jsonl.gz",
+            [
+                (206, {"Content-Range": "bytes 0-19/20"}, CONTENT),
+                (200, {}, CONTENT),
+            ],
+        )
+        assert api.file_download_from_url(FILE_URL, target, resume=True)
+        assert target.read_bytes() == CONTENT
@@ -0,0 +1,139 @@
+"""module test columnar exports."""
+
+import csv
+import json
+import logging
+import logging.config
+import tracemalloc
+from datetime import UTC, date, datetime
+from pathlib import Path
+
+import pytest
+
+from benchmarks.mock_server import MockChurchToolsServer
+from churchtools_api.churchtools_api import ChurchToolsApi
+from churchtools_api.export import (
+    ColumnarTable,
+    export_bookings,
+    export_events,
+    export_groups_members,
+    export_persons,
+)
+
+logger = logging.getLogger(__name__)
+
+config_file = Path("logging_config.json")
+with config_file.open(encoding="utf-8") as f_in:
+    logging_config = json.load(f_in)
+    log_directory = Path(logging_config["handlers"]["file"]["filename"]).parent
+    if not log_directory.exists():
+        log_directory.mkdir(parents=True)
+    logging.config.dictConfig(config=logging_config)
+
+
+class TestsExport:
+    """Test for columnar exports without server access."""
+
+    def test_typed_columns(self, tmp_path: Path) -> None:
+        """Values are parsed into their types and missing values are None."""
+        table = ColumnarTable(
+            {
+                "id": "int",
+                "name": "str",
+                "day": "date",
+                "start": "datetime",
+                "flag": "bool",
+                "value": "float",
+                "calendar.id": "str",
+            }
+        )
+        table.append(
+            [
+                {
+                    "id": 1,
+                    "name": "a",
+                    "day": "2026-01-02",
+                    "start": "2026-01-02T10:00:00Z",
+                    "flag": True,
+                    "value": 1.5,
+                    "calendar": {"id": 3},
+                },
+                {"id": None, "name": "a", "day": "", "start": "2026-01-03"},
+            ]
+        )
+
+        rows = list(table.rows())
+        assert rows[0] == {
+            "id": 1,
+            "name": "a",
+            "day": date(2026, 1, 2),
+            "start": datetime(2026, 1, 2, 10, tzinfo=UTC),
+            "flag": True,
+            "value": 1.5,
+            "calendar.id": "3",
+        }
+        assert rows[1] == {
+            "id": None,
+            "name": "a",
+            "day": None,
+            "start": datetime(2026, 1, 3, tzinfo=UTC),
+            "flag": None,
+            "value": None,
+            "calendar.id": None,
+        }
+        # repeated strings are stored once
+        assert table.columns["name"].dictionary == [None, "a"]
+
+        table.to_csv(tmp_path / "table.csv")
+        with (tmp_path / "table.csv").open(encoding="utf-8") as csv_file:
+            csv_rows = list(csv.DictReader(csv_file))
+        assert csv_rows[0]["start"] == "2026-01-02T10:00:00+00:00"
+        assert csv_rows[1]["day"] == ""
+
+    def test_export_entities(self) -> None:
+        """Exports stream all pages and need less memory than lists of dicts."""
+        SAMPLE_SIZE = 300
+        with MockChurchToolsServer(size=SAMPLE_SIZE) as server:
+            api = ChurchToolsApi(domain=server.domain, ct_token="sample")  # noqa: S106
+
+            tracemalloc.start()
+            persons = api.get_persons()
+            list_memory = tracemalloc.get_traced_memory()[0]
+            tracemalloc.stop()
+            del persons
+            table = export_persons(api)
+            assert len(table) == SAMPLE_SIZE
+            assert table.nbytes * 5 < list_memory
+            assert isinstance(next(table.rows())["birthday"], date)
+
+            events = export_events(api, from_="2026-01-01", to_="2027-01-01")
+            assert len(events) == SAMPLE_SIZE
+            assert events.columns["startDate"][0].tzinfo == UTC
+
+            bookings = export_bookings(api, resource_ids=[1, 2, 3, 4, 5])
+            assert len(bookings) == SAMPLE_SIZE
+            bookings = export_bookings(
+                api, resource_ids=[1, 2, 3, 4, 5], appointment_id=100002
+            )
+            assert bookings.columns["base.id"].values() == [2]
+
+            members = export_groups_members(api, group_ids=[1, 2], person_ids=[1])
+            assert len(members) <= 1
+
+            # failed requests do not return an empty or truncated table
+            api.domain = server.domain + "/unavailable"
+            assert export_persons(api) is None
+            assert export_groups_members(api, group_ids=[1, 2]) is None
+
+    def test_to_parquet(self, tmp_path: Path) -> None:
+        """Parquet files keep the column types."""
+        pq = pytest.importorskip("pyarrow.parquet")
+        table = ColumnarTable({"id": "int", "day": "date"})
+        table.append([{"id": 1, "day": "2026-01-02"}, {"id": None}])
+        table.to_parquet(tmp_path / "table.parquet")
+
+        result = pq.read_table(tmp_path / "table.parquet").to_pylist()
+        assert result == [
+            {"id": 1, "day": date(2026, 1, 2)},
+            {"id": None, "day": None},
+        ]
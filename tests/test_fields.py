@@ -0,0 +1,69 @@
+"""module test field projection of decoded items."""
+
+import json
+import logging
+import logging.config
+import tracemalloc
+from pathlib import Path
+
+from benchmarks.mock_server import MockChurchToolsServer
+from churchtools_api.churchtools_api import ChurchToolsApi
+from churchtools_api.churchtools_api_abstract import select_fields
+
+logger = logging.getLogger(__name__)
+
+config_file = Path("logging_config.json")
+with config_file.open(encoding="utf-8") as f_in:
+    logging_config = json.load(f_in)
+    log_directory = Path(logging_config["handlers"]["file"]["filename"]).parent
+    if not log_directory.exists():
+        log_directory.mkdir(parents=True)
+    logging.config.dictConfig(config=logging_config)
+
+
+class TestsFields:
+    """Test for field projection without server access."""
+
+    def test_select_fields(self) -> None:
+        """Nested fields keep their nesting and missing fields are skipped."""
+        item = {"id": 1, "calendar": {"domainIdentifier": "2", "title": "x"}}
+        assert select_fields(item, None) is item
+        assert select_fields(
+            [item], ["id", "calendar.domainIdentifier", "missing", "id.value"]
+        ) == [{"id": 1, "calendar": {"domainIdentifier": "2"}}]
+
+    def test_getters_with_fields(self) -> None:
+        """Getters return projected items of all pages using less memory."""
+        SAMPLE_SIZE = 500
+        with MockChurchToolsServer(size=SAMPLE_SIZE) as server:
+            api = ChurchToolsApi(domain=server.domain, ct_token="sample")  # noqa: S106
+
+            persons = api.get_persons(fields=["firstName"], returnAsDict=True)
+            assert len(persons) == SAMPLE_SIZE
+            assert set(persons[1]) == {"firstName", "id"}
+
+            events = api.get_events(
+                from_="2026-01-01", to_="2027-01-01", fields=["id", "calendar"]
+            )
+            assert len(events) == SAMPLE_SIZE
+            assert set(events[0]) == {"id", "calendar"}
+
+            bookings = api.get_bookings(
+                resource_ids=[1, 2, 3, 4, 5],
+                appointment_id=100001,
+                fields=["base.id"],
+            )
+            assert bookings == [{"base": {"id": 1}}]
+
+            tracemalloc.start()
+            full = api.get_songs()
+            full_memory = tracemalloc.get_traced_memory()[0]
+            del full
+            tracemalloc.reset_peak()
+            start_memory = tracemalloc.get_traced_memory()[0]
+            projected = api.get_songs(fields=["id", "name"])
+            projected_memory = tracemalloc.get_traced_memory()[0] - start_memory
+            tracemalloc.stop()
+
+            assert len(projected) == SAMPLE_SIZE
+            assert projected_memory * 3 < full_memory
@@ -0,0 +1,101 @@
+"""module test request metrics."""
+
+import json
+import logging
+import logging.config
+from pathlib import Path
+
+import requests
+
+from churchtools_api.metrics import (
+    JsonExporter,
+    PrometheusExporter,
+    RequestMetrics,
+    normalize_endpoint,
+)
+
+logger = logging.getLogger(__name__)
+
+config_file = Path("logging_config.json")
+with config_file.open(encoding="utf-8") as f_in:
+    logging_config = json.load(f_in)
+    log_directory = Path(logging_config["handlers"]["file"]["filename"]).parent
+    if not log_directory.exists():
+        log_directory.mkdir(parents=True)
+    logging.config.dictConfig(config=logging_config)
+
+
+def sample_response(
+    url: str, status_code: int = 200, content: bytes = b"{}"
+) -> requests.Response:
+    """Helper which creates a response without sending a request.
+
+    Args:
+        url: the url of the request
+        status_code: HTTP status of the response
+        content: body of the response
+
+    Returns:
+        response object
+    """
+    response = requests.Response()
+    response.status_code = status_code
+    response._content = content  # noqa: SLF001
+    response.request = requests.Request("GET", url).prepare()
+    return response
+
+
+class TestsRequestMetrics:
+    """Test for request metrics without server access."""
+
+    def test_normalize_endpoint(self) -> None:
+        """Ids are replaced and AJAX functions are kept."""
+        assert normalize_endpoint("https://x.church.tools/api/persons/123") == (
+            "/api/persons/{id}"
+        )
+        assert normalize_endpoint(
+            "https://x.church.tools/api/calendars/2/appointments/327032?from=2023-11-19"
+        ) == ("/api/calendars/{id}/appointments/{id}")
+        assert normalize_endpoint(
+            "https://x.church.tools/index.php?q=churchservice/ajax&func=getAllFacts"
+        ) == ("/index.php?q=churchservice/ajax")
+
+    def test_snapshot_and_exporters(self) -> None:
+        """Requests to different ids are combined into one endpoint."""
+        metrics = RequestMetrics(buckets=(0.1, 1.0))
+        for person_id, latency in [(1, 0.05), (2, 0.5), (3, 5.0)]:
+            url = f"https://x.church.tools/api/persons/{person_id}"
+            metrics.record_request(
+                "GET", url, sample_response(url, content=b"12345"), latency
+            )
+        url = "https://x.church.tools/api/persons/4"
+        metrics.record_request("GET", url, sample_response(url, 429), 0.01)
+        metrics.record_backoff("GET", url, 15.0)
+
+        snapshot = metrics.snapshot()
+        entry = snapshot["endpoints"]["GET /api/persons/{id}"]
+        EXPECTED_NUMBER_OF_REQUESTS = 4
+        assert entry["count"] == EXPECTED_NUMBER_OF_REQUESTS
+        assert entry["rate_limited"] == 1
+        assert entry["status_counts"] == {200: 3, 429: 1}
+        assert entry["bytes_received"] == 5 * 3 + 2
+        assert entry["latency_buckets"] == {0.1: 2, 1.0: 3, "+Inf": 4}
+        assert entry["backoff_seconds"] == 15.0  # noqa: PLR2004
+
+        prometheus = metrics.export(PrometheusExporter())
+        assert (
+            "churchtools_api_requests_total"
+            '{method="GET",endpoint="/api/persons/{id}"} 4' in prometheus
+        )
+        assert (
+            "churchtools_api_request_duration_seconds_bucket"
+            '{method="GET",endpoint="/api/persons/{id}",le="+Inf"} 4' in prometheus
+        )
+
+        exported = json.loads(metrics.export(JsonExporter()))
+        assert exported["endpoints"]["GET /api/persons/{id}"]["count"] == (
+            EXPECTED_NUMBER_OF_REQUESTS
+        )
+
+        metrics.reset()
+        assert metrics.snapshot() == {"endpoints": {}}
@@ -0,0 +1,225 @@
+"""module test local tenant mirror."""
+
+import copy
+import json
+import logging
+import logging.config
+import sqlite3
+import threading
+from datetime import date
+from pathlib import Path
+
+import pytest
+
+from benchmarks.mock_server import NUMBER_OF_RESOURCES, MockChurchToolsServer
+from churchtools_api import mirror as mirror_module
+from churchtools_api.churchtools_api import ChurchToolsApi
+from churchtools_api.mirror import SCHEMA_VERSION, TenantMirror
+
+logger = logging.getLogger(__name__)
+
+config_file = Path("logging_config.json")
+with config_file.open(encoding="utf-8") as f_in:
+    logging_config = json.load(f_in)
+    log_directory = Path(logging_config["handlers"]["file"]["filename"]).parent
+    if not log_directory.exists():
+        log_directory.mkdir(parents=True)
+    logging.config.dictConfig(config=logging_config)
+
+SAMPLE_SIZE = 60
+WINDOW = {"from_": date(2026, 1, 5), "to_": date(2026, 1, 10)}
+
+
+class TestsTenantMirror:
+    """Test for the SQLite mirror using the local mock server."""
+
+    def test_sync_and_query(self, tmp_path: Path) -> None:
+        """Reads from the mirror return the same results as the api."""
+        with MockChurchToolsServer(size=SAMPLE_SIZE) as server:
+            api = ChurchToolsApi(domain=server.domain, ct_token="sample")  # noqa: S106
+            with TenantMirror(api, tmp_path / "mirror.sqlite") as mirror:
+                result = mirror.sync(**WINDOW)
+                assert result["persons"] == {
+                    "rows": SAMPLE_SIZE,
+                    "changed": SAMPLE_SIZE,
+                    "deleted": 0,
+                }
+                assert all(counts is not None for counts in result.values())
+
+                resource_ids = list(range(1, NUMBER_OF_RESOURCES + 1))
+                assert mirror.get_persons() == api.get_persons()
+                assert mirror.get_persons(
+                    ids=[2, 3], fields=["lastName"], returnAsDict=True
+                ) == api.get_persons(ids=[2, 3], fields=["lastName"], returnAsDict=True)
+                assert mirror.get_groups() == api.get_groups()
+                assert mirror.get_groups(group_id=3)[0]["name"] == "Group 3"
+                assert mirror.get_songs(fields=["id", "name"]) == api.get_songs(
+                    fields=["id", "name"]
+                )
+                assert mirror.get_songs(song_id=SAMPLE_SIZE + 1) is None
+                assert mirror.get_calendars() == api.get_calendars()
+                assert mirror.get_groups_members(
+                    group_ids=[1, 2], person_ids=list(range(30))
+                ) == api.get_groups_members(
+                    group_ids=[1, 2], person_ids=list(range(30))
+                )
+                assert mirror.get_events(
+                    from_="2026-01-05", to_="2026-01-10"
+                ) == api.get_events(from_="2026-01-05", to_="2026-01-10")
+                assert mirror.get_bookings(
+                    resource_ids=[1, 2], from_=date(2026, 1, 6), to_=date(2026, 1, 8)
+                ) == api.get_bookings(
+                    resource_ids=[1, 2], from_=date(2026, 1, 6), to_=date(2026, 1, 8)
+                )
+                assert mirror.get_bookings(
+                    resource_ids=resource_ids, appointment_id=100025
+                ) == api.get_bookings(resource_ids=resource_ids, appointment_id=100025)
+
+            # reading an existing mirror does not require an api
+            with TenantMirror(path=tmp_path / "mirror.sqlite") as mirror:
+                assert len(mirror.get_persons()) == SAMPLE_SIZE
+                assert mirror.sync_state()["events"]["window_from"] == "2026-01-05"
+                assert mirror.sync() is None
+
+    def test_incremental_sync(self) -> None:
+        """Only changed rows are written and removed items are deleted."""
+        with MockChurchToolsServer(size=SAMPLE_SIZE) as server:
+            api = ChurchToolsApi(domain=server.domain, ct_token="sample")  # noqa: S106
+            mirror = TenantMirror(api)
+            mirror.sync(**WINDOW)
+            assert mirror.sync(["groups", "persons", "events"], **WINDOW) == {
+                "groups": {"rows": 20, "changed": 0, "deleted": 0},
+                "persons": {"rows": SAMPLE_SIZE, "changed": 0, "deleted": 0},
+                "events": {"rows": 15, "changed": 0, "deleted": 0},
+            }
+
+            group = server.data["groups"][0]
+            group["name"] = "Renamed"
+            group["meta"]["modifiedDate"] = "2026-02-01T00:00:00+00:00"
+            server.data["persons"].pop()
+            server.data["persons"][0]["email"] = "changed@example.com"
+            server.data["events"] = [
+                event
+                for event in server.data["events"]
+                if event["id"] != 20  # noqa: PLR2004
+            ]
+            result = mirror.sync(["groups", "persons", "events"], **WINDOW)
+            assert result["groups"]["changed"] == 1
+            assert result["persons"] == {
+                "rows": SAMPLE_SIZE - 1,
+                "changed": 1,
+                "deleted": 1,
+            }
+            assert result["events"]["deleted"] == 1
+            assert mirror.get_groups(query="Renamed")[0]["id"] == 1
+            assert mirror.get_persons(ids=[1])[0]["email"] == "changed@example.com"
+            assert mirror.get_events(eventId=20) is None
+
+            # events outside of a new window are removed
+            mirror.sync(["events"], from_=date(2026, 1, 10), to_=date(2026, 1, 12))
+            assert len(mirror.get_events(from_="2026-01-05", to_="2026-01-12")) == 6  # noqa: PLR2004
+
+            # failed requests keep the mirror unchanged
+            api.domain = server.domain + "/unavailable"
+            assert mirror.sync(["persons"]) == {"persons": None}
+            assert len(mirror.get_persons()) == SAMPLE_SIZE - 1
+
+    def test_rolling_window(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """The default window moves with today and drops items left behind."""
+        with MockChurchToolsServer(size=SAMPLE_SIZE) as server:
+            api = ChurchToolsApi(domain=server.domain, ct_token="sample")  # noqa: S106
+            mirror = TenantMirror(api)
+            monkeypatch.setattr(mirror_module, "_today", lambda: date(2026, 1, 20))
+            result = mirror.sync(["events"])
+            assert result["events"]["rows"] == SAMPLE_SIZE
+            assert mirror.sync_state()["events"]["window_from"] == "2025-12-21"
+
+            monkeypatch.setattr(mirror_module, "_today", lambda: date(2026, 2, 15))
+            expected = [
+                event
+                for event in server.data["events"]
+                if event["startDate"] >= "2026-01-16"
+            ]
+            result = mirror.sync(["events"])
+            assert result["events"] == {
+                "rows": len(expected),
+                "changed": 0,
+                "deleted": SAMPLE_SIZE - len(expected),
+            }
+            assert mirror.sync_state()["events"]["window_from"] == "2026-01-16"
+            assert mirror.get_events(from_="2025-01-01", canceled=True) == expected
+
+    def test_repeated_booking(self) -> None:
+        """All occurrences of a repeated booking are kept."""
+        with MockChurchToolsServer(size=SAMPLE_SIZE) as server:
+            api = ChurchToolsApi(domain=server.domain, ct_token="sample")  # noqa: S106
+            booking = next(
+                booking
+                for booking in server.data["bookings"]
+                if booking["calculated"]["startDate"] >= "2026-01-06"
+            )
+            occurrence = copy.deepcopy(booking)
+            occurrence["calculated"]["startDate"] = "2026-01-09T10:00:00Z"
+            server.data["bookings"].append(occurrence)
+            resource_ids = [booking["base"]["resource"]["id"]]
+
+            mirror = TenantMirror(api)
+            result = mirror.sync(["bookings"], **WINDOW)
+            assert result["bookings"]["changed"] == result["bookings"]["rows"]
+            occurrences = mirror.get_bookings(
+                resource_ids=resource_ids,
+                appointment_id=booking["base"]["appointmentId"],
+            )
+            assert occurrences == [booking, occurrence]
+            assert mirror.get_bookings(booking_id=booking["base"]["id"]) == occurrences
+
+            server.data["bookings"].remove(occurrence)
+            assert mirror.sync(["bookings"], **WINDOW)["bookings"]["deleted"] == 1
+            assert mirror.get_bookings(booking_id=booking["base"]["id"]) == [booking]
+
+    def test_upgrade_schema(self, tmp_path: Path) -> None:
+        """Mirrors of an older schema are recreated."""
+        path = tmp_path / "mirror.sqlite"
+        connection = sqlite3.connect(path)
+        with connection:
+            connection.execute(
+                "CREATE TABLE bookings (id, resource_id, appointment_id, status_id,"
+                " start_date, data TEXT NOT NULL, PRIMARY KEY (id))"
+            )
+        connection.close()
+
+        with TenantMirror(path=path) as mirror:
+            assert mirror.get_bookings(booking_id=1) == []
+
+        connection = sqlite3.connect(path)
+        with connection:
+            assert connection.execute("PRAGMA user_version").fetchone()[0] == (
+                SCHEMA_VERSION
+            )
+            connection.execute(
+                "INSERT INTO bookings VALUES (1, 1, 1, 1, '2026-01-01', '{}'),"
+                " (1, 1, 1, 1, '2026-01-08', '{}')"
+            )
+        connection.close()
+        with TenantMirror(path=path) as mirror:
+            assert len(mirror.get_bookings(booking_id=1)) == 2  # noqa: PLR2004
+
+    def test_read_during_sync(self) -> None:
+        """Reads are answered while a sync is downloading."""
+        with MockChurchToolsServer(size=SAMPLE_SIZE) as server:
+            api = ChurchToolsApi(domain=server.domain, ct_token="sample")  # noqa: S106
+            mirror = TenantMirror(api)
+            mirror.sync(["persons"])
+            persons = []
+
+            def load(consumer: callable) -> list:
+                reader = threading.Thread(
+                    target=lambda: persons.extend(mirror.get_persons())
+                )
+                reader.start()
+                reader.join(timeout=5)
+                consumer(api.get_persons())
+                return persons
+
+            mirror._sync_entity("persons", load)  # noqa: SLF001
+            assert len(persons) == SAMPLE_SIZE
@@ -0,0 +1,80 @@
+"""module test streaming multipart encoder."""
+
+import json
+import logging
+import logging.config
+from pathlib import Path
+
+import requests
+from urllib3.filepost import encode_multipart_formdata
+
+from churchtools_api.multipart import StreamingMultipartEncoder
+
+logger = logging.getLogger(__name__)
+
+config_file = Path("logging_config.json")
+with config_file.open(encoding="utf-8") as f_in:
+    logging_config = json.load(f_in)
+    log_directory = Path(logging_config["handlers"]["file"]["filename"]).parent
+    if not log_directory.exists():
+        log_directory.mkdir(parents=True)
+    logging.config.dictConfig(config=logging_config)
+
+SAMPLE_FILE = Path("samples/pinguin.png")
+
+
+class TestsStreamingMultipartEncoder:
+    """Test for the streaming multipart encoder without server access."""
+
+    def test_body_matches_urllib3(self) -> None:
+        """The streamed body is byte identical to the urllib3 encoding."""
+        encoder = StreamingMultipartEncoder(
+            [("files[]", 'pinguin "copy".png', SAMPLE_FILE)], chunk_size=1000
+        )
+        expected_body, expected_content_type = encode_multipart_formdata(
+            {"files[]": ('pinguin "copy".png', SAMPLE_FILE.read_bytes(), "image/png")},
+            boundary=encoder.boundary,
+        )
+        body = b"".join(encoder)
+
+        assert body == expected_body
+        assert len(encoder) == len(expected_body)
+        assert encoder.content_type == expected_content_type
+
+    def test_mmap_and_chunks_are_equal(self) -> None:
+        """Reading with mmap returns the same body and can be repeated."""
+        encoder = StreamingMultipartEncoder(
+            [("files[]", "pinguin.png", SAMPLE_FILE)], chunk_size=1000, use_mmap=False
+        )
+        mmap_encoder = StreamingMultipartEncoder(
+            [("files[]", "pinguin.png", SAMPLE_FILE)], chunk_size=1000, use_mmap=True
+        )
+        body = b"".join(encoder).replace(
+            encoder.boundary.encode(), mmap_encoder.boundary.encode()
+        )
+
+        assert b"".join(bytes(chunk) for chunk in mmap_encoder) == body
+        assert b"".join(bytes(chunk) for chunk in mmap_encoder) == body
+
+    def test_progress_and_request_preparation(self) -> None:
+        """Progress ends with the total and requests sends a Content-Length."""
+        progress = []
+        encoder = StreamingMultipartEncoder(
+            [("files[]", "pinguin.png", SAMPLE_FILE)],
+            chunk_size=1000,
+            progress=lambda sent, total: progress.append((sent, total)),
+        )
+        prepared = requests.Request(
+            "POST",
+            "https://example.com/api/files/avatar/1",
+            data=encoder,
+            headers={"Content-Type": encoder.content_type},
+        ).prepare()
+
+        assert prepared.headers["Content-Length"] == str(len(encoder))
+        assert prepared.body is encoder
+
+        b"".join(encoder)
+        assert progress[-1] == (len(encoder), len(encoder))
+        chunk_count = -(-SAMPLE_FILE.stat().st_size // 1000)
+        assert len(progress) == chunk_count + 1
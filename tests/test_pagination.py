@@ -0,0 +1,112 @@
+"""module test page size configuration and auto tuning."""
+
+import json
+import logging
+import logging.config
+from pathlib import Path
+
+from benchmarks.mock_server import MockChurchToolsServer
+from churchtools_api.churchtools_api import ChurchToolsApi
+from churchtools_api.pagination import PageSizeTuner
+
+logger = logging.getLogger(__name__)
+
+config_file = Path("logging_config.json")
+with config_file.open(encoding="utf-8") as f_in:
+    logging_config = json.load(f_in)
+    log_directory = Path(logging_config["handlers"]["file"]["filename"]).parent
+    if not log_directory.exists():
+        log_directory.mkdir(parents=True)
+    logging.config.dictConfig(config=logging_config)
+
+
+class TestsPagination:
+    """Test for page sizes without server access."""
+
+    def test_configured_page_sizes(self) -> None:
+        """Configured endpoints use their own size within the server limit."""
+        tuner = PageSizeTuner(default=50, page_sizes={"/api/persons": 200})
+        EXPECTED_DEFAULT = 50
+        EXPECTED_CONFIGURED = 200
+        assert tuner.get("/api/songs") == EXPECTED_DEFAULT
+        assert tuner.get("/api/persons") == EXPECTED_CONFIGURED
+
+        SERVER_LIMIT = 100
+        tuner.record_page(
+            "/api/persons",
+            limit=EXPECTED_CONFIGURED,
+            records=SERVER_LIMIT,
+            size_bytes=0,
+            latency=0,
+            server_limit=SERVER_LIMIT,
+        )
+        assert tuner.get("/api/persons") == SERVER_LIMIT
+
+    def test_auto_tune(self) -> None:
+        """Each candidate is measured before the fastest one is used."""
+        tuner = PageSizeTuner(auto_tune=True, candidates=(10, 20, 40), samples=2)
+        # latency per page grows faster than linear above 20 records
+        latencies = {10: 0.1, 20: 0.15, 40: 0.5}
+        used = []
+        for _ in range(8):
+            limit = tuner.get("/api/persons")
+            used.append(limit)
+            tuner.record_page(
+                "/api/persons",
+                limit=limit,
+                records=limit,
+                size_bytes=limit * 100,
+                latency=latencies[limit],
+            )
+        # partial pages are ignored
+        tuner.record_page(
+            "/api/persons", limit=10, records=3, size_bytes=300, latency=0.001
+        )
+
+        assert used == [10, 10, 20, 20, 40, 40, 20, 20]
+        statistics = tuner.statistics()["/api/persons"]
+        EXPECTED_PAGES = 4
+        assert statistics[20]["pages"] == EXPECTED_PAGES
+        EXPECTED_RATE = 100
+        assert round(statistics[10]["records_per_second"]) == EXPECTED_RATE
+
+    def test_page_sizes_used_by_getters(self) -> None:
+        """Getters request the configured page size and respect server limits."""
+        SAMPLE_SIZE = 450
+        with MockChurchToolsServer(size=SAMPLE_SIZE, max_page_limit=100) as server:
+            api = ChurchToolsApi(domain=server.domain, ct_token="sample")  # noqa: S106
+            api.page_sizes = PageSizeTuner(page_sizes={"/api/persons": 200})
+
+            server.reset_request_count()
+            assert len(api.get_persons()) == SAMPLE_SIZE
+            EXPECTED_REQUESTS = 5
+            assert server.request_count == EXPECTED_REQUESTS
+            EXPECTED_LIMIT = 100
+            assert api.page_sizes.get("/api/persons") == EXPECTED_LIMIT
+
+            api.page_sizes.set("/api/songs", 150)
+            server.reset_request_count()
+            assert len(api.get_songs()) == SAMPLE_SIZE
+            assert server.request_count == EXPECTED_REQUESTS
+
+    def test_auto_tune_small_collection(self) -> None:
+        """Auto tuning finishes if the collection is smaller than some candidates."""
+        with MockChurchToolsServer(size=120, latency=0.001) as server:
+            api = ChurchToolsApi(domain=server.domain, ct_token="sample")  # noqa: S106
+            api.page_sizes = PageSizeTuner(
+                auto_tune=True, candidates=(50, 100, 200, 500), samples=2
+            )
+            used = []
+            for _ in range(6):
+                used.append(api.page_sizes.get("/api/persons"))
+                assert len(api.get_persons()) == len(server.data["persons"])
+
+            # 500 would request the same single page as 200
+            assert used[:4] == [50, 100, 100, 200]
+            statistics = api.page_sizes.statistics()["/api/persons"]
+            assert set(statistics) == {50, 100, 200}
+            assert all(entry["pages"] >= 2 for entry in statistics.values())  # noqa: PLR2004
+            tuned = api.page_sizes.get("/api/persons")
+            assert tuned in statistics
+            api.get_persons()
+            assert api.page_sizes.get("/api/persons") == tuned
@@ -0,0 +1,181 @@
+"""module test the query planner of id filtered lookups."""
+
+import json
+import logging
+import logging.config
+from datetime import datetime
+from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+
+from benchmarks.mock_server import MockChurchToolsServer
+from churchtools_api.churchtools_api import ChurchToolsApi
+from churchtools_api.planner import FULL_SCAN, ID_FILTER, PER_ID, QueryPlanner
+
+logger = logging.getLogger(__name__)
+
+config_file = Path("logging_config.json")
+with config_file.open(encoding="utf-8") as f_in:
+    logging_config = json.load(f_in)
+    log_directory = Path(logging_config["handlers"]["file"]["filename"]).parent
+    if not log_directory.exists():
+        log_directory.mkdir(parents=True)
+    logging.config.dictConfig(config=logging_config)
+
+SAMPLE_SIZE = 120
+PAGE_SIZE = 50
+
+
+class TestsQueryPlanner:
+    """Test for QueryPlanner and the getters using it without server access."""
+
+    def test_plan(self) -> None:
+        """The cheapest strategy depends on the number of ids and known size."""
+        planner = QueryPlanner()
+        plan = planner.plan("/api/persons", [3, 1, 3], page_size=PAGE_SIZE)
+        assert plan.strategy == ID_FILTER
+        assert plan.chunks == ((3, 1),)
+
+        ids = list(range(500))
+        plan = planner.plan("/api/persons", ids, page_size=PAGE_SIZE)
+        assert plan.strategy == ID_FILTER
+        assert len(plan.chunks) == len(ids) / planner.max_ids_per_request
+        planner.record_size("/api/persons", 200)
+        assert planner.plan("/api/persons", ids, page_size=PAGE_SIZE).strategy == (
+            FULL_SCAN
+        )
+
+        strategies = (PER_ID, FULL_SCAN)
+        plan = planner.plan("/api/members", [1, 2], page_size=50, strategies=strategies)
+        assert plan.strategy == PER_ID
+        assert plan.chunks == ((1,), (2,))
+        plan = planner.plan("/api/members", ids, page_size=50, strategies=strategies)
+        assert plan.strategy == FULL_SCAN
+
+        # ids matching many items e.g. members of large groups
+        planner.record_size("/api/groups/members", 1000)
+        strategies = (ID_FILTER, FULL_SCAN)
+        kwargs = {"page_size": PAGE_SIZE, "max_ids_per_request": 2}
+        plan = planner.plan("/api/groups/members", range(10), **kwargs)
+        assert plan.strategy == ID_FILTER
+        planner.record_items_per_id("/api/groups/members", 200)
+        assert planner.items_per_id("/api/groups/members") == 200  # noqa: PLR2004
+        plan = planner.plan("/api/groups/members", range(10), **kwargs)
+        assert plan.strategy == FULL_SCAN
+
+        with pytest.raises(ValueError, match="unknown strategy"):
+            planner.plan("/api/persons", [1], page_size=PAGE_SIZE, strategies=["x"])
+
+    def test_get_persons(self) -> None:
+        """Persons are looked up using id filters or a full scan."""
+        with MockChurchToolsServer(size=SAMPLE_SIZE) as server:
+            api = ChurchToolsApi(domain=server.domain, ct_token="sample")  # noqa: S106
+            api.planner = QueryPlanner(max_ids_per_request=10)
+            api.page_sizes.default = PAGE_SIZE
+
+            server.reset_request_count()
+            persons = api.get_persons(ids=[3, 1, 2], fields=["id", "lastName"])
+            assert [person["id"] for person in persons] == [1, 2, 3]
+            assert server.request_count == 1
+            assert api.planner.size("/api/persons") is None
+
+            server.reset_request_count()
+            assert api.get_persons(ids=[]) == []
+            assert server.request_count == 0
+
+            assert len(api.get_persons()) == SAMPLE_SIZE
+            assert api.planner.size("/api/persons") == SAMPLE_SIZE
+
+            # 10 chunks of ids would need more requests than all 3 pages
+            server.reset_request_count()
+            ids = list(range(1, 101))
+            persons = api.get_persons(ids=ids, fields=["lastName"], returnAsDict=True)
+            assert server.request_count == 3  # noqa: PLR2004
+            assert list(persons) == ids
+            assert set(persons[1]) == {"id", "lastName"}
+
+            pages = []
+            api.get_persons(ids=ids, fields=["lastName"], page_consumer=pages.append)
+            assert sum(len(page) for page in pages) == len(ids)
+            assert set(pages[0][0]) == {"lastName"}
+
+    def test_get_groups_members(self) -> None:
+        """Few persons are looked up using their groups instead of all members."""
+        with MockChurchToolsServer(size=SAMPLE_SIZE) as server:
+            api = ChurchToolsApi(domain=server.domain, ct_token="sample")  # noqa: S106
+            api.page_sizes.default = PAGE_SIZE
+            person_ids = [5, 7]
+            expected = [
+                member
+                for member in server.data["group_members"]
+                if member["personId"] in person_ids
+            ]
+
+            server.reset_request_count()
+            members = api.get_groups_members(person_ids=person_ids)
+            assert sorted(members, key=lambda member: member["personId"]) == expected
+            # groups of each person and the members of these groups
+            assert server.request_count == 3  # noqa: PLR2004
+
+            assert len(api.get_groups_members()) == SAMPLE_SIZE
+            server.reset_request_count()
+            person_ids = list(range(1, 61))
+            members = api.get_groups_members(person_ids=person_ids)
+            assert len(members) == len(person_ids)
+            assert server.request_count == 3  # noqa: PLR2004
+
+            # group ids are requested in chunks
+            api.planner = QueryPlanner(max_ids_per_request=2)
+            server.reset_request_count()
+            members = api.get_groups_members(group_ids=[1, 2, 3, 4, 5])
+            assert server.request_count == 3  # noqa: PLR2004
+            assert sorted(members, key=lambda member: member["personId"]) == [
+                member
+                for member in server.data["group_members"]
+                if member["groupId"] in {1, 2, 3, 4, 5}
+            ]
+
+    def test_get_groups_members_query(self) -> None:
+        """Group ids and with_deleted are sent as query parameters."""
+        with MockChurchToolsServer(size=SAMPLE_SIZE) as server:
+            api = ChurchToolsApi(domain=server.domain, ct_token="sample")  # noqa: S106
+            for with_deleted in [False, True]:
+                server.reset_request_count()
+                api.get_groups_members(group_ids=[1, 2], with_deleted=with_deleted)
+                query = parse_qs(urlsplit(server.urls[0]).query)
+                assert query["ids[]"] == ["1", "2"]
+                assert query["with_deleted"] == [str(with_deleted).lower()]
+
+    def test_get_groups_members_of_large_group(self) -> None:
+        """Persons of large groups are found by downloading all members."""
+        with MockChurchToolsServer(size=SAMPLE_SIZE) as server:
+            api = ChurchToolsApi(domain=server.domain, ct_token="sample")  # noqa: S106
+            api.page_sizes.default = PAGE_SIZE
+            for member in server.data["group_members"]:
+                member["groupId"] = 1
+            assert len(api.get_groups_members()) == SAMPLE_SIZE
+            assert api.planner.items_per_id("/api/groups/members") == SAMPLE_SIZE
+
+            server.reset_request_count()
+            members = api.get_groups_members(person_ids=[5, 7])
+            assert [member["personId"] for member in members] == [5, 7]
+            # all 3 pages instead of the groups of each person and 3 pages
+            assert server.request_count == 3  # noqa: PLR2004
+
+    def test_get_bookings(self) -> None:
+        """Many resources are requested in chunks."""
+        with MockChurchToolsServer(size=SAMPLE_SIZE) as server:
+            api = ChurchToolsApi(domain=server.domain, ct_token="sample")  # noqa: S106
+            resource_ids = [1, 2, 3, 4, 5]
+            kwargs = {"from_": datetime(2026, 1, 1), "to_": datetime(2027, 1, 1)}  # noqa: DTZ001
+            expected = api.get_bookings(resource_ids=resource_ids, **kwargs)
+            assert expected
+
+            api.planner = QueryPlanner(max_ids_per_request=2)
+            server.reset_request_count()
+            bookings = api.get_bookings(resource_ids=resource_ids, **kwargs)
+            assert server.request_count >= 3  # noqa: PLR2004
+            assert sorted(bookings, key=lambda booking: booking["base"]["id"]) == (
+                sorted(expected, key=lambda booking: booking["base"]["id"])
+            )
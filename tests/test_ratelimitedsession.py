@@ -44,3 +44,33 @@ class TestsRateLimitedSession(TestsChurchToolsApiAbstract):
         ]
 
         assert all(message in EXPECTED_MESSAGES for message in caplog.messages)
+
+    def test_metrics_recorded(self) -> None:
+        """Requests sent by the api are recorded by endpoint template."""
+        self.api.session.metrics.reset()
+        self.api.get_calendars()
+        self.api.get_calendar_appointments(calendar_ids=[2], appointment_id=327032)
+
+        snapshot = self.api.session.metrics.snapshot()
+        assert snapshot["endpoints"]["GET /api/calendars"]["count"] == 1
+        entry = snapshot["endpoints"]["GET /api/calendars/{id}/appointments/{id}"]
+        assert entry["count"] == 1
+        assert entry["bytes_received"] > 0
+        assert entry["latency_sum"] > 0
+
+    def test_tracing_spans(self) -> None:
+        """Requests are recorded as child spans of the api method."""
+        self.api.session.tracer.enabled = True
+        self.api.session.tracer.clear()
+        try:
+            self.api.get_calendars()
+        finally:
+            self.api.session.tracer.enabled = False
+
+        request_span, method_span = self.api.session.tracer.finished_spans()
+        assert method_span.name == "get_calendars"
+        assert request_span.name == "GET /api/calendars"
+        assert request_span.kind == "CLIENT"
+        assert request_span.parent_id == method_span.span_id
+        assert request_span.tags["http.status_code"] == "200"
+        assert self.api.session.tracer.fan_out_summary() == {"get_calendars": 1}
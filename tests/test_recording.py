@@ -0,0 +1,56 @@
+"""module test record and replay of HTTP traffic."""
+
+import json
+import logging
+import logging.config
+import time
+from pathlib import Path
+
+import pytest
+import requests
+
+from benchmarks.mock_server import MockChurchToolsServer
+from benchmarks.profile_replay import REPLAY_DOMAIN, connect
+from churchtools_api.recording import RecordingAdapter, ReplayAdapter
+
+logger = logging.getLogger(__name__)
+
+config_file = Path("logging_config.json")
+with config_file.open(encoding="utf-8") as f_in:
+    logging_config = json.load(f_in)
+    log_directory = Path(logging_config["handlers"]["file"]["filename"]).parent
+    if not log_directory.exists():
+        log_directory.mkdir(parents=True)
+    logging.config.dictConfig(config=logging_config)
+
+
+class TestsRecording:
+    """Test for recording and replaying without server access."""
+
+    def test_record_and_replay(self, tmp_path: Path) -> None:
+        """Replayed responses equal the recorded ones without network access."""
+        recording_path = tmp_path / "recording.jsonl.gz"
+        SAMPLE_LATENCY = 0.02
+        with MockChurchToolsServer(size=60, latency=SAMPLE_LATENCY) as server:
+            recorder = RecordingAdapter()
+            api = connect(domain=server.domain, token="sample", adapter=recorder)  # noqa: S106
+            expected_persons = api.get_persons()
+            expected_posts = api.get_posts()
+            EXPECTED_INTERACTIONS = server.request_count
+            assert recorder.save(recording_path) == EXPECTED_INTERACTIONS
+
+            server.reset_request_count()
+            replay = ReplayAdapter(recording_path, timing_scale=1.0)
+            api = connect(domain=REPLAY_DOMAIN, token="replay", adapter=replay)  # noqa: S106
+            start = time.perf_counter()
+            assert api.get_persons() == expected_persons
+            assert api.get_posts() == expected_posts
+            elapsed = time.perf_counter() - start
+
+            assert server.request_count == 0
+        assert replay.replayed == EXPECTED_INTERACTIONS
+        assert elapsed >= SAMPLE_LATENCY * (EXPECTED_INTERACTIONS - 2)
+
+        with pytest.raises(requests.ConnectionError):
+            api.get_songs()
+        assert replay.unmatched == ["GET /api/songs?limit=50"]
@@ -0,0 +1,200 @@
+"""module test local expansion of calendar appointment series."""
+
+import json
+import logging
+import logging.config
+from pathlib import Path
+from zoneinfo import ZoneInfo
+
+from churchtools_api.recurrence import (
+    REPEAT_DAILY,
+    REPEAT_MANUAL,
+    REPEAT_MONTHLY_BY_DATE,
+    REPEAT_MONTHLY_BY_WEEKDAY,
+    REPEAT_WEEKLY,
+    REPEAT_YEARLY,
+    expand_appointment,
+    expand_appointments,
+)
+
+logger = logging.getLogger(__name__)
+
+config_file = Path("logging_config.json")
+with config_file.open(encoding="utf-8") as f_in:
+    logging_config = json.load(f_in)
+    log_directory = Path(logging_config["handlers"]["file"]["filename"]).parent
+    if not log_directory.exists():
+        log_directory.mkdir(parents=True)
+    logging.config.dictConfig(config=logging_config)
+
+BERLIN = ZoneInfo("Europe/Berlin")
+
+
+def sample_appointment(**kwargs: dict) -> dict:
+    """Helper which creates a minimal appointment similar to ChurchTools.
+
+    Args:
+        kwargs: fields which should be overwritten
+
+    Returns:
+        appointment dict
+    """
+    return {
+        "id": 1,
+        "caption": "Gottesdienst",
+        "startDate": "2023-01-08T09:00:00Z",
+        "endDate": "2023-01-08T10:00:00Z",
+        "allDay": False,
+        "repeatId": 0,
+        "repeatFrequency": None,
+        "repeatUntil": None,
+        "repeatOption": None,
+        "exceptions": [],
+        "additions": [],
+        **kwargs,
+    }
+
+
+class TestsRecurrence:
+    """Test for local expansion of appointment series without server access."""
+
+    def test_single_appointment(self) -> None:
+        """Single appointments are only returned if within the window."""
+        appointment = sample_appointment()
+        result = expand_appointment(
+            appointment, from_="2023-01-08", to_="2023-01-08", timezone=BERLIN
+        )
+        assert len(result) == 1
+        assert result[0]["startDate"] == "2023-01-08T09:00:00Z"
+
+        result = expand_appointment(
+            appointment, from_="2023-01-09", to_="2023-01-31", timezone=BERLIN
+        )
+        assert result == []
+
+    def test_weekly_keeps_local_time_across_dst(self) -> None:
+        """Weekly series keep 10:00 local time when daylight saving time starts."""
+        appointment = sample_appointment(repeatId=REPEAT_WEEKLY, repeatFrequency=1)
+        result = expand_appointment(
+            appointment, from_="2023-03-19", to_="2023-04-02", timezone=BERLIN
+        )
+        EXPECTED = [
+            "2023-03-19T09:00:00Z",
+            "2023-03-26T08:00:00Z",
+            "2023-04-02T08:00:00Z",
+        ]
+        assert [item["startDate"] for item in result] == EXPECTED
+        assert result[1]["endDate"] == "2023-03-26T09:00:00Z"
+
+    def test_daily_with_frequency_and_until(self) -> None:
+        """Every second day limited by repeatUntil."""
+        appointment = sample_appointment(
+            repeatId=REPEAT_DAILY, repeatFrequency=2, repeatUntil="2023-01-14"
+        )
+        result = expand_appointment(
+            appointment, from_="2023-01-01", to_="2023-01-31", timezone=BERLIN
+        )
+        EXPECTED = [
+            "2023-01-08T09:00:00Z",
+            "2023-01-10T09:00:00Z",
+            "2023-01-12T09:00:00Z",
+            "2023-01-14T09:00:00Z",
+        ]
+        assert [item["startDate"] for item in result] == EXPECTED
+
+    def test_exceptions_and_additions(self) -> None:
+        """Exceptions remove single dates while additions add extra dates."""
+        appointment = sample_appointment(
+            repeatId=REPEAT_WEEKLY,
+            repeatFrequency=1,
+            exceptions=[{"id": 10, "date": "2023-01-15"}],
+            additions=[{"id": 11, "date": "2023-01-18"}],
+        )
+        result = expand_appointment(
+            appointment, from_="2023-01-08", to_="2023-01-22", timezone=BERLIN
+        )
+        EXPECTED = [
+            "2023-01-08T09:00:00Z",
+            "2023-01-18T09:00:00Z",
+            "2023-01-22T09:00:00Z",
+        ]
+        assert [item["startDate"] for item in result] == EXPECTED
+
+    def test_manual_repetition(self) -> None:
+        """Manual series only consist of the first date and additions."""
+        appointment = sample_appointment(
+            repeatId=REPEAT_MANUAL,
+            additions=[{"id": 11, "date": "2023-02-01"}],
+        )
+        result = expand_appointment(
+            appointment, from_="2023-01-01", to_="2023-12-31", timezone=BERLIN
+        )
+        EXPECTED = ["2023-01-08T09:00:00Z", "2023-02-01T09:00:00Z"]
+        assert [item["startDate"] for item in result] == EXPECTED
+
+    def test_monthly_by_date_skips_missing_days(self) -> None:
+        """Monthly on the 31st skips months without such a day."""
+        appointment = sample_appointment(
+            startDate="2023-01-31T09:00:00Z",
+            endDate="2023-01-31T10:00:00Z",
+            repeatId=REPEAT_MONTHLY_BY_DATE,
+            repeatFrequency=1,
+        )
+        result = expand_appointment(
+            appointment, from_="2023-01-01", to_="2023-05-31", timezone=BERLIN
+        )
+        EXPECTED = ["2023-01-31", "2023-03-31", "2023-05-31"]
+        assert [item["startDate"][:10] for item in result] == EXPECTED
+
+    def test_monthly_by_weekday(self) -> None:
+        """Second sunday and last sunday of each month."""
+        appointment = sample_appointment(
+            repeatId=REPEAT_MONTHLY_BY_WEEKDAY, repeatFrequency=1, repeatOption=2
+        )
+        result = expand_appointment(
+            appointment, from_="2023-01-01", to_="2023-03-31", timezone=BERLIN
+        )
+        EXPECTED = ["2023-01-08", "2023-02-12", "2023-03-12"]
+        assert [item["startDate"][:10] for item in result] == EXPECTED
+
+        appointment = sample_appointment(
+            startDate="2023-01-29T09:00:00Z",
+            endDate="2023-01-29T10:00:00Z",
+            repeatId=REPEAT_MONTHLY_BY_WEEKDAY,
+            repeatFrequency=1,
+            repeatOption=6,
+        )
+        result = expand_appointment(
+            appointment, from_="2023-01-01", to_="2023-04-30", timezone=BERLIN
+        )
+        EXPECTED = ["2023-01-29", "2023-02-26", "2023-03-26", "2023-04-30"]
+        assert [item["startDate"][:10] for item in result] == EXPECTED
+
+    def test_yearly_all_day(self) -> None:
+        """All day appointments keep date only representation."""
+        appointment = sample_appointment(
+            startDate="2020-12-24",
+            endDate="2020-12-24",
+            allDay=True,
+            repeatId=REPEAT_YEARLY,
+            repeatFrequency=1,
+        )
+        result = expand_appointment(
+            appointment, from_="2022-01-01", to_="2023-12-31", timezone=BERLIN
+        )
+        EXPECTED = ["2022-12-24", "2023-12-24"]
+        assert [item["startDate"] for item in result] == EXPECTED
+        assert [item["endDate"] for item in result] == EXPECTED
+
+    def test_expand_appointments_deduplicates_series(self) -> None:
+        """Series returned once per calculated date are only expanded once."""
+        appointment = sample_appointment(repeatId=REPEAT_WEEKLY, repeatFrequency=1)
+        response_items = [
+            {"base": appointment, "calculated": {"startDate": "2023-01-08T09:00:00Z"}},
+            {"base": appointment, "calculated": {"startDate": "2023-01-15T09:00:00Z"}},
+        ]
+        result = expand_appointments(
+            response_items, from_="2023-01-08", to_="2023-01-15", timezone=BERLIN
+        )
+        EXPECTED_NUMBER_OF_OCCURRENCES = 2
+        assert len(result) == EXPECTED_NUMBER_OF_OCCURRENCES
@@ -0,0 +1,100 @@
+"""module test warm up of reference data without server access."""
+
+import json
+import logging
+import logging.config
+import time
+from pathlib import Path
+
+import pytest
+
+from benchmarks.mock_server import MockChurchToolsServer
+from churchtools_api.churchtools_api import REFERENCE_DATA, ChurchToolsApi
+
+logger = logging.getLogger(__name__)
+
+config_file = Path("logging_config.json")
+with config_file.open(encoding="utf-8") as f_in:
+    logging_config = json.load(f_in)
+    log_directory = Path(logging_config["handlers"]["file"]["filename"]).parent
+    if not log_directory.exists():
+        log_directory.mkdir(parents=True)
+    logging.config.dictConfig(config=logging_config)
+
+LATENCY = 0.1
+
+
+class TestsReferenceData:
+    """Test for warm_up_reference_data using the local mock server."""
+
+    def test_warm_up(self) -> None:
+        """Reference data is loaded concurrently and served from the cache."""
+        with MockChurchToolsServer(size=10, latency=LATENCY) as server:
+            api = ChurchToolsApi(
+                domain=server.domain,
+                ct_token="sample",  # noqa: S106
+                max_workers=len(REFERENCE_DATA),
+            )
+            server.reset_request_count()
+            start = time.perf_counter()
+            result = api.warm_up_reference_data()
+            duration = time.perf_counter() - start
+
+            assert result == dict.fromkeys(REFERENCE_DATA, True)
+            assert server.request_count == len(REFERENCE_DATA)
+            # concurrent requests instead of 8 x LATENCY
+            assert duration < 3 * LATENCY
+
+            server.reset_request_count()
+            options = api.get_options()
+            assert options["sex"]["options"][0]["name"] == "sex.male"
+            assert api.get_grouptypes() == {1: {"id": 1, "name": "Kleingruppe"}}
+            assert server.request_count == 0
+
+            # callers receive copies
+            options["sex"] = None
+            assert api.get_options()["sex"] is not None
+
+            # calls with arguments are sent to the server
+            assert api.get_persons_masterdata(resultClass="roles")
+            assert server.request_count == 1
+
+            # clearing the cache loads current data again
+            api.reference_cache.clear()
+            assert api.get_calendars()
+            assert server.request_count == 2  # noqa: PLR2004
+
+    def test_warm_up_at_login(self) -> None:
+        """Warm up can be requested when creating the api."""
+        with MockChurchToolsServer(size=10) as server:
+            api = ChurchToolsApi(
+                domain=server.domain,
+                ct_token="sample",  # noqa: S106
+                warm_up=["get_options", "get_calendars"],
+            )
+            assert set(api.reference_cache) == {"get_options", "get_calendars"}
+
+            server.error_status, server.error_count = 404, 1
+            assert api.warm_up_reference_data(["get_services"]) == {
+                "get_services": False
+            }
+            assert "get_services" not in api.reference_cache
+
+            with pytest.raises(ValueError, match="get_persons"):
+                api.warm_up_reference_data(["get_persons"])
+
+    def test_login_clears_cache(self) -> None:
+        """Another login does not reuse reference data of the previous login."""
+        with MockChurchToolsServer(size=10) as server:
+            api = ChurchToolsApi(
+                domain=server.domain,
+                ct_token="sample",  # noqa: S106
+                warm_up=["get_global_permissions"],
+            )
+            assert "get_global_permissions" in api.reference_cache
+
+            assert api.login_ct_rest_api(ct_token="other")  # noqa: S106
+            assert api.reference_cache == {}
+            server.reset_request_count()
+            assert api.get_global_permissions()
+            assert server.request_count == 1
@@ -0,0 +1,399 @@
+"""module test RateLimitedSession without server access."""
+
+import json
+import logging
+import logging.config
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+import requests
+
+from benchmarks.mock_server import MockChurchToolsServer
+from churchtools_api import ratelimitedsession
+from churchtools_api.churchtools_api import ChurchToolsApi
+from churchtools_api.circuitbreaker import CircuitBreaker, CircuitOpenError
+from churchtools_api.deadlines import DeadlineExceededError
+from churchtools_api.metrics import PrometheusExporter
+from churchtools_api.retry import RetryPolicy
+from churchtools_api.scheduler import BULK, INTERACTIVE, PriorityScheduler, priority
+
+logger = logging.getLogger(__name__)
+
+config_file = Path("logging_config.json")
+with config_file.open(encoding="utf-8") as f_in:
+    logging_config = json.load(f_in)
+    log_directory = Path(logging_config["handlers"]["file"]["filename"]).parent
+    if not log_directory.exists():
+        log_directory.mkdir(parents=True)
+    logging.config.dictConfig(config=logging_config)
+
+NUMBER_OF_THREADS = 8
+
+
+def run_concurrently(function: Callable, threads: int = NUMBER_OF_THREADS) -> list:
+    """Helper which starts a function in several threads at the same time.
+
+    Args:
+        function: callable receiving the number of the thread
+        threads: number of threads
+
+    Returns:
+        results of each thread
+    """
+    barrier = threading.Barrier(threads)
+
+    def start(number: int) -> object:
+        barrier.wait()
+        return function(number)
+
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        return list(executor.map(start, range(threads)))
+
+
+class TestsRateLimitedSessionOffline:
+    """Test for RateLimitedSession using the local mock server."""
+
+    def test_coalesce_requests(self) -> None:
+        """Concurrent identical GET requests share one response."""
+        with MockChurchToolsServer(size=10, latency=0.2) as server:
+            api = ChurchToolsApi(domain=server.domain, ct_token="sample")  # noqa: S106
+            api.session.coalesce_requests = True
+            api.login_ct_rest_api(ct_token="sample")  # noqa: S106
+            assert api.session.coalesce_requests
+
+            server.reset_request_count()
+            api.session.metrics.reset()
+            results = run_concurrently(lambda _number: api.get_songs())
+            assert server.request_count == 1
+            assert all(result == results[0] for result in results)
+            entry = api.session.metrics.snapshot()["endpoints"]["GET /api/songs"]
+            assert entry["count"] == 1
+            assert entry["coalesced"] == NUMBER_OF_THREADS - 1
+
+            # different params are not combined
+            server.reset_request_count()
+            run_concurrently(lambda number: api.get_persons(ids=[number % 2 + 1]))
+            EXPECTED_REQUESTS = 2
+            assert server.request_count == EXPECTED_REQUESTS
+
+            # finished requests are not reused
+            server.reset_request_count()
+            api.get_songs()
+            assert server.request_count == 1
+
+            api.session.coalesce_requests = False
+            server.reset_request_count()
+            run_concurrently(lambda _number: api.get_songs())
+            assert server.request_count == NUMBER_OF_THREADS
+
+    def test_coalesce_requests_with_time_budgets(self) -> None:
+        """Waiting requests are sent again if the first one ran out of its budget."""
+        with MockChurchToolsServer(size=10, latency=0.3) as server:
+            api = ChurchToolsApi(domain=server.domain, ct_token="sample")  # noqa: S106
+            api.session.coalesce_requests = True
+            api.login_ct_rest_api(ct_token="sample")  # noqa: S106
+
+            server.reset_request_count()
+            with ThreadPoolExecutor(max_workers=1) as executor:
+                short = executor.submit(api.get_songs, time_budget=0.15)
+                time.sleep(0.05)
+                songs = api.get_songs(time_budget=2)
+            with pytest.raises(DeadlineExceededError, match="0.1 s"):
+                short.result()
+            assert len(songs) == len(server.data["songs"])
+            EXPECTED_REQUESTS = 2
+            assert server.request_count == EXPECTED_REQUESTS
+
+    def test_time_budget(self) -> None:
+        """Calls exceeding their time budget fail with a clear error."""
+        with MockChurchToolsServer(size=10) as server:
+            api = ChurchToolsApi(domain=server.domain, ct_token="sample")  # noqa: S106
+            assert api.session.timeout == ratelimitedsession.DEFAULT_TIMEOUT
+            api.session.time_budget = 5
+
+            # pagination requests share the budget of the api call
+            server.latency = 0.15
+            api.page_sizes.default = 2
+            with pytest.raises(DeadlineExceededError) as exception:
+                api.get_songs(time_budget=0.5)
+            assert str(exception.value).startswith(
+                "get_songs exceeded its time budget of 0.5 s while"
+            )
+            EXPECTED_SONGS = 10
+            assert len(api.get_songs()) == EXPECTED_SONGS
+
+            # a stalled response is interrupted by the default of the session
+            server.latency = 2
+            api.session.time_budget = 0.3
+            start = time.monotonic()
+            with pytest.raises(DeadlineExceededError, match="waiting for GET"):
+                api.get_calendars()
+            assert time.monotonic() - start < 1
+
+            # waiting for a rate limit longer than the budget fails immediately
+            server.latency = 0
+            server.rate_limit_every = 1
+            with pytest.raises(DeadlineExceededError, match="rate limited by GET"):
+                api.session.get(server.domain + "/api/songs")
+
+    def test_max_rate_limit_wait(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Repeated 429 responses are returned after waiting max_rate_limit_wait."""
+        monkeypatch.setattr(ratelimitedsession, "RATE_LIMIT_WAIT_SECONDS", 0.01)
+        with MockChurchToolsServer(size=10) as server:
+            api = ChurchToolsApi(domain=server.domain, ct_token="sample")  # noqa: S106
+            assert api.session.time_budget is None
+            assert (
+                api.session.max_rate_limit_wait
+                == ratelimitedsession.MAX_RATE_LIMIT_WAIT_SECONDS
+            )
+            api.session.max_rate_limit_wait = 0.055
+            server.rate_limit_every = 1
+            server.reset_request_count()
+            response = api.session.get(server.domain + "/api/songs")
+            assert response.status_code == requests.codes.too_many_requests
+            # the first request and one repetition for each wait
+            assert server.request_count == 6  # noqa: PLR2004
+            assert api.get_songs() is None
+
+    def test_circuit_breaker(self) -> None:
+        """Requests fail fast while the server is unhealthy until a probe succeeds."""
+        with MockChurchToolsServer(size=10) as server:
+            api = ChurchToolsApi(domain=server.domain, ct_token="sample")  # noqa: S106
+            api.session.circuit_breaker = CircuitBreaker(
+                minimum_requests=4, open_seconds=0.2
+            )
+            api.session.retry_policy = None
+            api.login_ct_rest_api(ct_token="sample")  # noqa: S106
+            assert api.get_songs()
+
+            server.error_status = 503
+            for _ in range(3):
+                assert api.get_songs() is None
+            assert api.session.circuit_breaker.state == "open"
+
+            server.reset_request_count()
+            with pytest.raises(CircuitOpenError):
+                api.get_songs()
+            assert server.request_count == 0
+            snapshot = api.session.metrics.snapshot()
+            assert snapshot["circuit_breaker"] == {"state": "open", "opened": 1}
+            assert snapshot["endpoints"]["GET /api/songs"]["rejected"] == 1
+            assert (
+                "churchtools_api_circuit_breaker_state 2"
+                in api.session.metrics.export(PrometheusExporter())
+            )
+
+            # a failed probe opens the breaker again
+            time.sleep(0.2)
+            assert api.session.circuit_breaker.state == "half_open"
+            assert api.get_songs() is None
+            assert api.session.circuit_breaker.state == "open"
+
+            server.error_status = 0
+            time.sleep(0.2)
+            assert api.get_songs()
+            assert api.session.metrics.snapshot()["circuit_breaker"] == {
+                "state": "closed",
+                "opened": 2,
+            }
+
+    def test_circuit_breaker_probes(self) -> None:
+        """Only probes change the half open state and always free their slot."""
+        breaker = CircuitBreaker(minimum_requests=1, open_seconds=0.05)
+        admitted_while_closed = breaker.allow_request()
+        breaker.record(breaker.allow_request(), failed=True)
+        assert breaker.state == "open"
+        time.sleep(0.05)
+
+        probe = breaker.allow_request()
+        assert probe.probe
+        assert breaker.allow_request() is None
+        # a late success of a request sent before opening is ignored
+        breaker.record(admitted_while_closed, failed=False)
+        assert breaker.state == "half_open"
+
+        # unexpected exceptions release the slot of the probe
+        with MockChurchToolsServer(size=10) as server:
+            api = ChurchToolsApi(domain=server.domain, ct_token="sample")  # noqa: S106
+            api.session.circuit_breaker = breaker
+            breaker.release(probe)
+            with pytest.raises(TypeError):
+                api.session.get(server.domain + "/api/songs", unknown_keyword=True)
+            assert breaker.state == "half_open"
+            assert api.get_songs()
+            assert breaker.state == "closed"
+
+    def test_retry_policy(self) -> None:
+        """Transient failures of idempotent requests are repeated."""
+        with MockChurchToolsServer(size=10) as server:
+            api = ChurchToolsApi(domain=server.domain, ct_token="sample")  # noqa: S106
+            api.session.retry_policy = RetryPolicy(backoff_base=0.01)
+            api.page_sizes.default = 5
+
+            server.reset_request_count()
+            server.error_status, server.error_count = 503, 2
+            EXPECTED_SONGS = 10
+            assert len(api.get_songs()) == EXPECTED_SONGS
+            EXPECTED_REQUESTS = 4
+            assert server.request_count == EXPECTED_REQUESTS
+            entry = api.session.metrics.snapshot()["endpoints"]["GET /api/songs"]
+            assert entry["retries"] == 2  # noqa: PLR2004
+
+            # the retry budget of each request is limited
+            server.reset_request_count()
+            server.error_status, server.error_count = 502, 5
+            assert api.get_songs() is None
+            assert server.request_count == 3  # noqa: PLR2004
+
+            # POST is only repeated if marked as safe
+            server.reset_request_count()
+            server.error_status, server.error_count = 504, 5
+            url = server.domain + "/api/persons"
+            assert api.session.post(url, json={}).status_code == 504  # noqa: PLR2004
+            assert server.request_count == 1
+            assert api.session.post(url, json={}, retry_safe=True).status_code == 504  # noqa: PLR2004
+            assert server.request_count == 4  # noqa: PLR2004
+
+            # connection errors are repeated as well
+            api.session.metrics.reset()
+            with pytest.raises(requests.ConnectionError):
+                api.session.get("http://127.0.0.1:9/api/songs")
+            entry = api.session.metrics.snapshot()["endpoints"]["GET /api/songs"]
+            assert entry["retries"] == 2  # noqa: PLR2004
+
+    def test_priority_lanes(self) -> None:
+        """Interactive requests are not queued behind a bulk flood."""
+        scheduler = PriorityScheduler(requests_per_second=50, burst=1)
+
+        def flood(_: int) -> None:
+            for _ in range(10):
+                scheduler.acquire(BULK)
+
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            future = executor.submit(run_concurrently, flood)
+            time.sleep(0.2)
+            assert scheduler.statistics()[BULK]["waiting"] > 0
+            waited = scheduler.acquire(INTERACTIVE)
+            future.result()
+        # one token interval of 20ms plus scheduling overhead
+        assert waited < 0.1  # noqa: PLR2004
+        EXPECTED_BULK = 80
+        assert scheduler.statistics()[BULK]["sent"] == EXPECTED_BULK
+
+        # a lane limited to half of the budget takes twice as long
+        scheduler = PriorityScheduler(
+            requests_per_second=50, burst=1, max_share={BULK: 0.5}
+        )
+        start = time.monotonic()
+        for _ in range(10):
+            scheduler.acquire(BULK)
+        assert time.monotonic() - start > 0.3  # noqa: PLR2004
+
+        with pytest.raises(ValueError, match="unknown lane"), priority("urgent"):
+            pass
+
+    def test_priority_lanes_session(self) -> None:
+        """Requests of the session use the lane of the current context."""
+        with MockChurchToolsServer(size=10) as server:
+            api = ChurchToolsApi(domain=server.domain, ct_token="sample")  # noqa: S106
+            api.session.scheduler = PriorityScheduler(requests_per_second=100)
+            api.page_sizes.default = 5
+
+            with priority(INTERACTIVE):
+                assert api.get_songs()
+            assert api.get_songs()
+            statistics = api.session.scheduler.statistics()
+            assert statistics[INTERACTIVE]["sent"] == 2  # noqa: PLR2004
+            assert statistics["normal"]["sent"] == 2  # noqa: PLR2004
+            entry = api.session.metrics.snapshot()["endpoints"]["GET /api/songs"]
+            assert entry["queue_seconds"] >= 0
+
+    def test_thread_safe_api(self) -> None:
+        """One api object is shared by many threads including re-logins."""
+        workers = 16
+        with MockChurchToolsServer(size=30, latency=0.005) as server:
+            api = ChurchToolsApi(
+                domain=server.domain,
+                ct_token="sample",  # noqa: S106
+                max_workers=workers,
+            )
+            api.page_sizes.default = 10
+            expected_songs = [song["id"] for song in server.data["songs"]]
+            expected_persons = [person["id"] for person in server.data["persons"]]
+            session = api.session
+            server.reset_request_count()
+
+            def work(number: int) -> list:
+                results = []
+                for iteration in range(5):
+                    if number == 0 and iteration == 2:  # noqa: PLR2004
+                        results.append(api.login_ct_rest_api(ct_token="sample"))  # noqa: S106
+                    elif number == 1:
+                        results.append(api.refresh_csrf_token())
+                    results.append([song["id"] for song in api.get_songs()])
+                    results.append([person["id"] for person in api.get_persons()])
+                return results
+
+            results = run_concurrently(work, threads=workers)
+
+            for thread_results in results:
+                for result in thread_results:
+                    assert result in (
+                        expected_songs,
+                        expected_persons,
+                        "benchmark-csrf-token",
+                        1,
+                    )
+            assert api.session.headers["CSRF-Token"] == "benchmark-csrf-token"
+            # the re-login renews the login without replacing the session
+            assert api.session is session
+            assert len(server.sessions) == 2  # noqa: PLR2004
+            # connections are reused by all threads and survive the re-login
+            assert server.connection_count <= workers
+            adapter = api.session.get_adapter(server.domain)
+            assert adapter.poolmanager.connection_pool_kw["maxsize"] == workers
+
+    def test_reauthentication(self) -> None:
+        """Expired logins are renewed once for all concurrent failed requests."""
+        with MockChurchToolsServer(size=10) as server:
+            api = ChurchToolsApi(
+                domain=server.domain,
+                ct_token="sample",  # noqa: S106
+                max_workers=NUMBER_OF_THREADS,
+            )
+            session = api.session
+            adapter = session.get_adapter(server.domain)
+            server.login_expired = True
+            server.csrf_token = "renewed-csrf-token"  # noqa: S105
+
+            EXPECTED_SONGS = 10
+            results = run_concurrently(lambda _: api.get_songs())
+            assert all(len(result) == EXPECTED_SONGS for result in results)
+
+            # one login renewed session and pool - all failed requests repeated
+            snapshot = session.metrics.snapshot()["endpoints"]
+            assert snapshot["GET /api/whoami"]["count"] == 2  # noqa: PLR2004
+            assert snapshot["GET /api/csrftoken"]["count"] == 2  # noqa: PLR2004
+            assert snapshot["GET /api/songs"]["reauthenticated"] > 0
+            assert api.session is session
+            assert session.get_adapter(server.domain) is adapter
+            assert session.headers["CSRF-Token"] == "renewed-csrf-token"
+
+            # an outdated CSRF token is renewed as well
+            server.csrf_token = "rotated-csrf-token"  # noqa: S105
+            response = session.post(server.domain + "/api/persons", json={})
+            assert response.status_code == requests.codes.method_not_allowed
+            assert session.headers["CSRF-Token"] == "rotated-csrf-token"
+
+            # requests are not repeated if the login can not be renewed
+            api._credentials = {"ct_token": ""}  # noqa: SLF001
+            server.login_expired = True
+            session.metrics.reset()
+            assert api.get_songs() is None
+            snapshot = session.metrics.snapshot()["endpoints"]
+            assert snapshot["POST /api/login"]["count"] == 1
+            assert snapshot["GET /api/songs"]["status_counts"] == {401: 1}
@@ -0,0 +1,112 @@
+"""module test TenantPool without server access."""
+
+import json
+import logging
+import logging.config
+import time
+from contextlib import ExitStack
+from pathlib import Path
+
+from benchmarks.mock_server import MockChurchToolsServer
+from churchtools_api.churchtools_api import ChurchToolsApi
+from churchtools_api.tenants import TenantPool
+
+logger = logging.getLogger(__name__)
+
+config_file = Path("logging_config.json")
+with config_file.open(encoding="utf-8") as f_in:
+    logging_config = json.load(f_in)
+    log_directory = Path(logging_config["handlers"]["file"]["filename"]).parent
+    if not log_directory.exists():
+        log_directory.mkdir(parents=True)
+    logging.config.dictConfig(config=logging_config)
+
+LATENCY = 0.1
+NUMBER_OF_TENANTS = 3
+
+
+class TestsTenantPool:
+    """Test for TenantPool using several local mock servers."""
+
+    def test_fan_out(self) -> None:
+        """Queries are sent to all tenants concurrently and labeled by tenant."""
+        with ExitStack() as stack:
+            servers = [
+                stack.enter_context(
+                    MockChurchToolsServer(size=5 + number, latency=LATENCY, seed=number)
+                )
+                for number in range(NUMBER_OF_TENANTS)
+            ]
+            pool = stack.enter_context(TenantPool(requests_per_second=50))
+            for server in servers:
+                pool.add(server.domain, ct_token="sample")  # noqa: S106
+            assert pool.domains == [server.domain for server in servers]
+
+            assert pool.login() == dict.fromkeys(pool.domains, True)
+            # whoami and csrftoken of the login use the budget of the tenant
+            for domain in pool.domains:
+                scheduler = pool.get(domain).session.scheduler
+                assert scheduler.statistics()["normal"]["sent"] == 2  # noqa: PLR2004
+
+            start = time.perf_counter()
+            songs = pool.fan_out_items(lambda api: api.get_songs())
+            duration = time.perf_counter() - start
+            # one round trip instead of one per tenant
+            assert duration < 2 * LATENCY
+
+            EXPECTED_SONGS = sum(len(server.data["songs"]) for server in servers)
+            assert len(songs) == EXPECTED_SONGS
+            for server in servers:
+                tenant_songs = [
+                    song["id"] for song in songs if song["tenant"] == server.domain
+                ]
+                assert tenant_songs == [song["id"] for song in server.data["songs"]]
+
+            # each tenant keeps its own session and rate budget
+            sessions = {id(pool.get(domain).session) for domain in pool.domains}
+            assert len(sessions) == NUMBER_OF_TENANTS
+            for domain in pool.domains:
+                scheduler = pool.get(domain).session.scheduler
+                assert scheduler.statistics()["normal"]["sent"] >= 1
+
+    def test_failed_tenant(self) -> None:
+        """Tenants failing to log in are skipped without failing the others."""
+        with MockChurchToolsServer(size=5) as server, TenantPool() as pool:
+            pool.add(server.domain, ct_token="sample")  # noqa: S106
+            unavailable = server.domain + "/unavailable"
+            pool.add(unavailable, ct_token="sample")  # noqa: S106
+
+            results = pool.fan_out(lambda api: api.get_songs())
+            assert len(results[server.domain]) == len(server.data["songs"])
+            assert results[unavailable] is None
+            assert pool.get(unavailable) is None
+
+            assert len(pool.fan_out_items(lambda api: api.get_songs())) == len(
+                server.data["songs"]
+            )
+            pool.remove(unavailable)
+            assert pool.domains == [server.domain]
+            assert pool.get("https://unknown.church.tools") is None
+
+    def test_failed_function(self) -> None:
+        """Exceptions of the function only skip the tenant raising them."""
+        with ExitStack() as stack:
+            servers = [
+                stack.enter_context(MockChurchToolsServer(size=5, seed=number))
+                for number in range(2)
+            ]
+            pool = stack.enter_context(TenantPool(requests_per_second=50))
+            pool.add(servers[0].domain, ct_token="sample")  # noqa: S106
+            pool.add(servers[1].domain, ct_token="sample", requests_per_second=0)  # noqa: S106
+            assert pool.get(servers[0].domain).session.scheduler is not None
+            assert pool.get(servers[1].domain).session.scheduler is None
+
+            def get_songs(api: ChurchToolsApi) -> list[dict]:
+                if api.domain == servers[1].domain:
+                    msg = "unexpected song"
+                    raise KeyError(msg)
+                return api.get_songs()
+
+            results = pool.fan_out(get_songs)
+            assert len(results[servers[0].domain]) == len(servers[0].data["songs"])
+            assert results[servers[1].domain] is None
@@ -0,0 +1,161 @@
+"""module test tracing of api methods and requests."""
+
+import json
+import logging
+import logging.config
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
+from pathlib import Path
+
+import pytest
+
+from churchtools_api.churchtools_api import ChurchToolsApi
+from churchtools_api.tracing import Tracer, trace_public_methods
+
+logger = logging.getLogger(__name__)
+
+config_file = Path("logging_config.json")
+with config_file.open(encoding="utf-8") as f_in:
+    logging_config = json.load(f_in)
+    log_directory = Path(logging_config["handlers"]["file"]["filename"]).parent
+    if not log_directory.exists():
+        log_directory.mkdir(parents=True)
+    logging.config.dictConfig(config=logging_config)
+
+
+class SampleSession:
+    """Minimal object providing a tracer like RateLimitedSession."""
+
+    def __init__(self, tracer: Tracer) -> None:
+        """Keeps the tracer.
+
+        Args:
+            tracer: the tracer to use
+        """
+        self.tracer = tracer
+
+    def get(self, url: str) -> str:
+        """Records a fake request span.
+
+        Args:
+            url: name of the request
+
+        Returns:
+            the url
+        """
+        with self.tracer.span(f"GET {url}", kind="CLIENT"):
+            return url
+
+
+class SampleApi:
+    """Api part with public methods which are traced."""
+
+    def __init__(self, tracer: Tracer) -> None:
+        """Prepares session.
+
+        Args:
+            tracer: the tracer to use
+        """
+        self.session = SampleSession(tracer)
+
+    def get_items(self, count: int) -> list[str]:
+        """Fan out into many requests.
+
+        Args:
+            count: number of requests
+
+        Returns:
+            list of results
+        """
+        return [self.session.get(f"/api/items/{item}") for item in range(count)]
+
+    def get_items_parallel(self, count: int) -> list[str]:
+        """Fan out into many requests using threads.
+
+        Args:
+            count: number of requests
+
+        Returns:
+            list of results
+        """
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            futures = [
+                executor.submit(copy_context().run, self.session.get, f"/{item}")
+                for item in range(count)
+            ]
+            return [future.result() for future in futures]
+
+    def get_summary(self) -> list[str]:
+        """Nested public method call.
+
+        Returns:
+            list of results
+        """
+        return self.get_items(2)
+
+    def fail(self) -> None:
+        """Raises an error.
+
+        Raises:
+            ValueError: always
+        """
+        raise ValueError
+
+
+trace_public_methods(SampleApi)
+
+
+class TestsTracing:
+    """Test for tracing without server access."""
+
+    def test_disabled_by_default(self) -> None:
+        """No spans are recorded unless the tracer is enabled."""
+        tracer = Tracer()
+        SampleApi(tracer).get_items(3)
+        assert tracer.finished_spans() == []
+
+    def test_nested_spans_and_fan_out(self) -> None:
+        """Requests are children of the outermost api method."""
+        tracer = Tracer(enabled=True)
+        api = SampleApi(tracer)
+        api.get_summary()
+        api.get_items(3)
+        api.get_items_parallel(4)
+
+        nested, outer = tracer.finished_spans()[2:4]
+        assert nested.name == "get_items"
+        assert outer.name == "get_summary"
+        assert nested.parent_id == outer.span_id
+        assert nested.trace_id == outer.trace_id
+        assert tracer.fan_out_summary() == {
+            "get_items_parallel": 4,
+            "get_items": 3,
+            "get_summary": 2,
+        }
+
+    def test_error_and_export(self) -> None:
+        """Errors are tagged and spans are exported as zipkin json."""
+        tracer = Tracer(enabled=True)
+        with pytest.raises(ValueError):  # noqa: PT011
+            SampleApi(tracer).fail()
+        SampleApi(tracer).get_items(1)
+
+        exported = json.loads(tracer.export())
+        EXPECTED_NUMBER_OF_SPANS = 3
+        assert len(exported) == EXPECTED_NUMBER_OF_SPANS
+        assert exported[0]["name"] == "fail"
+        assert exported[0]["tags"] == {"error": "ValueError"}
+        assert exported[1]["kind"] == "CLIENT"
+        assert exported[1]["parentId"] == exported[2]["id"]
+        assert "parentId" not in exported[2]
+
+        tracer.clear()
+        assert tracer.finished_spans() == []
+
+    def test_api_methods_are_traced(self) -> None:
+        """Public methods of all api parts are wrapped."""
+        assert ChurchToolsApi.get_persons.__traced__
+        assert ChurchToolsApi.get_services.__traced__
+        assert ChurchToolsApi.get_tags.__traced__
+        assert not hasattr(ChurchToolsApi.iter_calendar_appointments, "__traced__")
+        assert not hasattr(ChurchToolsApi._put_calender_appointment, "__traced__")  # noqa: SLF001